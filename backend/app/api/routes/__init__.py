@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.routes import users, challenges, submissions, badges, activities, leaderboard
+from app.api.routes import users, challenges, submissions, badges, activities, leaderboard, judge
 
 router = APIRouter()
 
@@ -9,3 +9,4 @@ router.include_router(submissions.router, prefix="/submissions", tags=["Submissi
 router.include_router(badges.router, prefix="/badges", tags=["Badges"])
 router.include_router(activities.router, prefix="/activities", tags=["Activities"])
 router.include_router(leaderboard.router, prefix="/leaderboard", tags=["Leaderboard"])
+router.include_router(judge.router, prefix="/judge", tags=["Judge"])
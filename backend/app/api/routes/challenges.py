@@ -1,29 +1,102 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
-from app.schemas.challenge import Challenge, ChallengeCreate, ChallengeUpdate, ChallengeResponse, TestCaseCreate
-from app.auth.jwt import get_current_user
+from enum import Enum
+from typing import Dict, List, Optional
+from app.schemas.challenge import Challenge, ChallengeCreate, ChallengeUpdate, ChallengeResponse, TestCaseCreate, ReferenceSolutionCreate, CheckerCreate
+from app.auth.jwt import get_current_admin, get_current_user
 from app.db.database import get_db
+from app.judge.calibration import calibration
+from app.judge.checker import CHECKER_FILES, CheckerError, checkers
+from app.judge.verdict_cache import verdict_cache
+from app.services.code_execution import SUPPORTED_LANGUAGES
+from app.services.submission_service import get_test_cases
 import uuid
 
 router = APIRouter()
 
+CHALLENGE_COLUMNS = "id, title, description, difficulty, category, points, time_limit, memory_limit, comparator, comparator_epsilon, created_at, updated_at"
+
+def challenge_response(challenge: Dict, test_cases: Optional[List[Dict]] = None, **extra) -> Dict:
+    """A challenge row in the shape of ChallengeResponse, ids as strings."""
+    return {
+        **dict(challenge),
+        "id": str(challenge["id"]),
+        "test_cases": [
+            {**dict(tc), "id": str(tc["id"]), "challenge_id": str(tc["challenge_id"])}
+            for tc in test_cases or []
+        ],
+        **extra
+    }
+
+async def get_visible_test_cases(conn, challenge_id: str) -> List[Dict]:
+    """The sample tests of a challenge, hidden tests stay on the judge."""
+    return await conn.fetch("""
+        SELECT id, challenge_id, input, output, is_hidden
+        FROM test_cases
+        WHERE challenge_id = $1 AND is_hidden = FALSE
+        ORDER BY id
+    """, challenge_id)
+
 @router.get("/", response_model=List[ChallengeResponse])
-async def get_challenges():
+async def get_challenges(
+    skip: int = 0,
+    limit: int = 10,
+    difficulty: Optional[str] = None,
+    category: Optional[str] = None,
+    current_user = Depends(get_current_user)
+):
     pool = await get_db()
     async with pool.acquire() as conn:
-        challenges = await conn.fetch("""
-            SELECT id, title, description, difficulty, category, points, time_limit, created_at, updated_at
+        challenges = await conn.fetch(f"""
+            SELECT {CHALLENGE_COLUMNS}
             FROM challenges
+            WHERE ($1::text IS NULL OR difficulty::text = $1) AND ($2::text IS NULL OR category = $2)
             ORDER BY created_at DESC
-        """)
-        return [dict(challenge) for challenge in challenges]
+            LIMIT $3 OFFSET $4
+        """, difficulty, category, limit, skip)
+        return [challenge_response(challenge) for challenge in challenges]
+
+@router.get("/random", response_model=ChallengeResponse)
+async def get_random_challenge(
+    difficulty: Optional[str] = None,
+    current_user = Depends(get_current_user)
+):
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        challenge = await conn.fetchrow(f"""
+            SELECT {CHALLENGE_COLUMNS}
+            FROM challenges
+            WHERE $1::text IS NULL OR difficulty::text = $1
+            ORDER BY random()
+            LIMIT 1
+        """, difficulty)
+        
+        if not challenge:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No challenges found"
+            )
+        
+        # Count users who solved this challenge, and whether the current user did
+        solved = await conn.fetchrow("""
+            SELECT COUNT(DISTINCT user_id) AS solved_by, BOOL_OR(user_id = $2) AS completed
+            FROM submissions
+            WHERE challenge_id = $1 AND status = 'ACCEPTED'
+        """, challenge["id"], current_user["id"])
+        
+        test_cases = await get_visible_test_cases(conn, challenge["id"])
+    
+    return challenge_response(
+        challenge, test_cases,
+        solved_by=solved["solved_by"],
+        completed=bool(solved["completed"])
+    )
 
 @router.get("/{challenge_id}", response_model=ChallengeResponse)
 async def get_challenge(challenge_id: str):
     pool = await get_db()
     async with pool.acquire() as conn:
-        challenge = await conn.fetchrow("""
-            SELECT id, title, description, difficulty, category, points, time_limit, created_at, updated_at
+        challenge = await conn.fetchrow(f"""
+            SELECT {CHALLENGE_COLUMNS}
             FROM challenges
             WHERE id = $1
         """, challenge_id)
@@ -33,31 +106,43 @@ async def get_challenge(challenge_id: str):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Challenge not found"
             )
-            
-        return dict(challenge)
+        
+        test_cases = await get_visible_test_cases(conn, challenge_id)
+    
+    return challenge_response(challenge, test_cases)
 
 @router.post("/", response_model=ChallengeResponse)
 async def create_challenge(
     challenge: ChallengeCreate,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_admin)
 ):
     pool = await get_db()
     async with pool.acquire() as conn:
-        challenge_id = str(uuid.uuid4())
-        new_challenge = await conn.fetchrow("""
-            INSERT INTO challenges (id, title, description, difficulty, category, points, time_limit)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-            RETURNING id, title, description, difficulty, category, points, time_limit, created_at, updated_at
-        """, challenge_id, challenge.title, challenge.description, 
-            challenge.difficulty, challenge.category, challenge.points, challenge.time_limit)
+        async with conn.transaction():
+            challenge_id = str(uuid.uuid4())
+            new_challenge = await conn.fetchrow(f"""
+                INSERT INTO challenges (id, title, description, difficulty, category, points, time_limit, memory_limit, comparator, comparator_epsilon)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                RETURNING {CHALLENGE_COLUMNS}
+            """, challenge_id, challenge.title, challenge.description, 
+                challenge.difficulty.value, challenge.category, challenge.points, challenge.time_limit,
+                challenge.memory_limit, challenge.comparator.value, challenge.comparator_epsilon)
+            
+            test_cases = []
+            for test_case in challenge.test_cases:
+                test_cases.append(await conn.fetchrow("""
+                    INSERT INTO test_cases (challenge_id, input, output, is_hidden)
+                    VALUES ($1, $2, $3, $4)
+                    RETURNING id, challenge_id, input, output, is_hidden
+                """, challenge_id, test_case.input, test_case.output, test_case.is_hidden))
         
-        return dict(new_challenge)
+        return challenge_response(new_challenge, test_cases)
 
 @router.post("/{challenge_id}/test-cases")
 async def add_test_case(
     challenge_id: str,
     test_case: TestCaseCreate,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_admin)
 ):
     pool = await get_db()
     async with pool.acquire() as conn:
@@ -68,125 +153,212 @@ async def add_test_case(
             RETURNING id, challenge_id, input, output, is_hidden
         """, test_case_id, challenge_id, test_case.input, 
             test_case.output, test_case.is_hidden)
-        
-        return dict(new_test_case)
+    
+    # Verdicts judged against the old test set are no longer valid
+    await verdict_cache.invalidate_challenge(challenge_id)
+    
+    return {**dict(new_test_case), "id": str(new_test_case["id"]), "challenge_id": str(new_test_case["challenge_id"])}
 
-@router.put("/{challenge_id}", response_model=Challenge)
-async def update_challenge(challenge_id: str, challenge_update: ChallengeUpdate, current_user = Depends(get_current_user)):
-    # TODO: Add admin check
+@router.post("/{challenge_id}/reference-solution")
+async def set_reference_solution(
+    challenge_id: str,
+    reference: ReferenceSolutionCreate,
+    current_user = Depends(get_current_admin)
+):
+    """
+    Register the challenge's reference solution and time it over all tests.
+
+    Submissions then get time limits derived from the reference's runtime
+    instead of the challenge's fixed time_limit. Admins only.
+    """
+    language = reference.language.lower()
+    if language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Language {language} is not supported"
+        )
     
-    # Check if challenge exists
     pool = await get_db()
     async with pool.acquire() as conn:
-        existing_challenge = await conn.fetchrow("""
-            SELECT id, title, description, difficulty, category, points, time_limit, created_at, updated_at
+        challenge = await conn.fetchrow("""
+            SELECT id, time_limit
             FROM challenges
             WHERE id = $1
         """, challenge_id)
-        if not existing_challenge:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Challenge not found"
-            )
+    if not challenge:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Challenge not found"
+        )
     
-    # Update challenge
-    update_data = {k: v for k, v in challenge_update.dict().items() if v is not None}
-    updated_challenge = await conn.fetchrow("""
-        UPDATE challenges
-        SET title = $1, description = $2, difficulty = $3, category = $4, points = $5, time_limit = $6
-        WHERE id = $7
-        RETURNING id, title, description, difficulty, category, points, time_limit, created_at, updated_at
-    """, update_data['title'], update_data['description'], update_data['difficulty'], 
-        update_data['category'], update_data['points'], update_data['time_limit'], challenge_id)
+    test_cases = await get_test_cases(challenge_id)
+    if not test_cases:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Add test cases before the reference solution"
+        )
     
-    return dict(updated_challenge)
-
-@router.delete("/{challenge_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_challenge(challenge_id: str, current_user = Depends(get_current_user)):
-    # TODO: Add admin check
+    try:
+        saved = await calibration.benchmark_reference(
+            challenge_id, reference.code, language, test_cases, replace=True
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    # Check if challenge exists
+    return {
+        "language": saved["language"],
+        "runtime_ms": saved["runtime_ms"],
+        "time_limits": calibration.time_limits(challenge["time_limit"], saved)
+    }
+
+@router.get("/{challenge_id}/time-limits")
+async def get_time_limits(challenge_id: str, current_user = Depends(get_current_user)):
+    """
+    The time limit, in seconds, each language gets, from the calibration and
+    reference timing already stored. Nothing is benchmarked for this.
+    """
     pool = await get_db()
     async with pool.acquire() as conn:
-        existing_challenge = await conn.fetchrow("""
-            SELECT id, title, description, difficulty, category, points, time_limit, created_at, updated_at
+        challenge = await conn.fetchrow("""
+            SELECT id, time_limit
             FROM challenges
             WHERE id = $1
         """, challenge_id)
-        if not existing_challenge:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Challenge not found"
-            )
-    
-    # Delete challenge (will cascade delete test cases)
-    await conn.execute("DELETE FROM challenges WHERE id = $1", challenge_id)
+    if not challenge:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Challenge not found"
+        )
     
-    return None
+    reference = await calibration.stored_reference(challenge_id)
+    return {
+        "time_limit": challenge["time_limit"],
+        "reference": {
+            "language": reference["language"],
+            "runtime_ms": reference["runtime_ms"],
+            "benchmarked_at": reference["benchmarked_at"]
+        } if reference else None,
+        "time_limits": calibration.time_limits(challenge["time_limit"], reference)
+    }
 
-@router.get("/random", response_model=ChallengeResponse)
-async def get_random_challenge(
-    difficulty: Optional[str] = None,
-    current_user = Depends(get_current_user)
+@router.post("/{challenge_id}/checker")
+async def set_checker(
+    challenge_id: str,
+    checker: CheckerCreate,
+    current_user = Depends(get_current_admin)
 ):
-    # Build filter conditions
-    where = {}
-    if difficulty:
-        where["difficulty"] = difficulty
+    """
+    Judge the challenge's outputs with a checker program instead of its comparison policy.
+
+    The checker is compiled now, once, and runs as
+    `checker <input> <expected> <actual>` for every test: exit code 0 accepts
+    the output, 1 or 2 rejects it, anything else is a checker failure.
+    Admins only, the checker runs on the judge host and decides every verdict.
+    """
+    language = checker.language.lower()
+    if language not in CHECKER_FILES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Checkers can be written in {', '.join(CHECKER_FILES)}"
+        )
     
-    # Get a random challenge
     pool = await get_db()
     async with pool.acquire() as conn:
-        challenges = await conn.fetch("""
-            SELECT id, title, description, difficulty, category, points, time_limit, created_at, updated_at
-            FROM challenges
-            WHERE difficulty = $1
-            ORDER BY random()
-            LIMIT 1
-        """, difficulty)
-        
-        if not challenges:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No challenges found"
-            )
-        
-        challenge = dict(challenges[0])
+        challenge = await conn.fetchrow("SELECT id FROM challenges WHERE id = $1", challenge_id)
+    if not challenge:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Challenge not found"
+        )
+    
+    try:
+        compiled = await checkers.compile(checker.code, language)
+    except CheckerError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The checker does not compile: {str(e)}"
+        )
     
-    # Check if user has completed this challenge
+    async with pool.acquire() as conn:
+        saved = await conn.fetchrow("""
+            INSERT INTO checkers (challenge_id, language, code, cache_key)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT (challenge_id) DO UPDATE
+            SET language = $2, code = $3, cache_key = $4, created_at = CURRENT_TIMESTAMP
+            RETURNING challenge_id, language, cache_key, created_at
+        """, challenge_id, language, checker.code, compiled.cache_key)
+    
+    # Verdicts reached with the old checker (or policy) no longer hold
+    await verdict_cache.invalidate_challenge(challenge_id)
+    return dict(saved)
+
+@router.delete("/{challenge_id}/checker", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_checker(challenge_id: str, current_user = Depends(get_current_admin)):
+    """Go back to judging the challenge with its comparison policy, admins only."""
     pool = await get_db()
     async with pool.acquire() as conn:
-        completed = await conn.fetchrow("""
-            SELECT id, status
-            FROM submissions
-            WHERE userId = $1 AND challengeId = $2
-        """, current_user['id'], challenge['id'])
+        deleted = await conn.execute("DELETE FROM checkers WHERE challenge_id = $1", challenge_id)
+    if deleted == "DELETE 0":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="This challenge has no checker"
+        )
+    await verdict_cache.invalidate_challenge(challenge_id)
+    return None
+
+# Challenge columns an update may change
+UPDATABLE_COLUMNS = [
+    "title", "description", "difficulty", "category", "points", "time_limit", "memory_limit",
+    "comparator", "comparator_epsilon"
+]
+
+# Columns that change how outputs are judged, so cached verdicts no longer hold
+JUDGING_COLUMNS = {"comparator", "comparator_epsilon"}
+
+@router.put("/{challenge_id}", response_model=Challenge)
+async def update_challenge(challenge_id: str, challenge_update: ChallengeUpdate, current_user = Depends(get_current_admin)):
+    """Change the fields of a challenge that are given, leaving the others as they are."""
+    update_data = {
+        column: value.value if isinstance(value, Enum) else value
+        for column, value in challenge_update.dict().items()
+        if column in UPDATABLE_COLUMNS and value is not None
+    }
+    assignments = [f"{column} = ${i}" for i, column in enumerate(update_data, start=2)]
     
-    # Count users who solved this challenge
     pool = await get_db()
     async with pool.acquire() as conn:
-        solved_count = await conn.fetchval("""
-            SELECT COUNT(DISTINCT userId)
-            FROM submissions
-            WHERE challengeId = $1 AND status = 'ACCEPTED'
-        """, challenge['id'])
+        updated_challenge = await conn.fetchrow(f"""
+            UPDATE challenges
+            SET {", ".join(assignments + ["updated_at = CURRENT_TIMESTAMP"])}
+            WHERE id = $1
+            RETURNING {CHALLENGE_COLUMNS}
+        """, challenge_id, *update_data.values())
+        if not updated_challenge:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Challenge not found"
+            )
+        test_cases = await get_visible_test_cases(conn, challenge_id)
+    
+    if JUDGING_COLUMNS & update_data.keys():
+        await verdict_cache.invalidate_challenge(challenge_id)
     
-    # Filter out hidden test cases for non-admin users
+    return challenge_response(updated_challenge, test_cases)
+
+@router.delete("/{challenge_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_challenge(challenge_id: str, current_user = Depends(get_current_admin)):
     pool = await get_db()
     async with pool.acquire() as conn:
-        test_cases = await conn.fetch("""
-            SELECT id, input, output, is_hidden
-            FROM test_cases
-            WHERE challengeId = $1 AND is_hidden = FALSE
-        """, challenge['id'])
-    
-    visible_test_cases = [dict(tc) for tc in test_cases]
-    
-    challenge_response = {
-        **challenge,
-        "testCases": visible_test_cases,
-        "solvedBy": solved_count,
-        "completed": completed is not None
-    }
+        # Deleting the challenge cascades to its test cases and submissions
+        deleted = await conn.execute("DELETE FROM challenges WHERE id = $1", challenge_id)
+    if deleted == "DELETE 0":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Challenge not found"
+        )
+    await verdict_cache.invalidate_challenge(challenge_id)
     
-    return challenge_response
+    return None
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from app.auth.jwt import get_current_user
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.queue import judge_queue
+from app.judge.jobs import get_job_stats
+from app.judge.cpu_affinity import core_pool
+from app.judge.run_lane import run_lane
+from app.judge.scheduler import judge_scheduler
+from app.judge.metrics import metrics
+from app.judge.verdict_cache import verdict_cache
+
+router = APIRouter()
+
+@router.get("/stats")
+async def get_judge_stats(current_user = Depends(get_current_user)):
+    if settings.JUDGE_BACKEND == "postgres":
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            queue_stats = await get_job_stats(conn)
+    else:
+        queue_stats = judge_queue.stats()
+    
+    return {
+        "backend": settings.JUDGE_BACKEND,
+        "queue": queue_stats,
+        "scheduler": judge_scheduler.stats(),
+        "cores": core_pool.stats(),
+        "run_lane": run_lane.stats(),
+        "verdict_cache": verdict_cache.stats(),
+        "metrics": metrics.snapshot()
+    }
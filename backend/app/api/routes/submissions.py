@@ -1,127 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
-from app.schemas.submission import Submission, SubmissionCreate, SubmissionResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Dict, List, Optional
+from app.schemas.submission import Submission, SubmissionCreate, SubmissionResponse, SubmissionResults, RunRequest, RunResponse
 from app.auth.jwt import get_current_user
 from app.db.database import get_db
-from app.services.code_execution import execute_code
-from app.services.badge_service import check_badges_after_submission
-from app.services.activity_service import create_activity
-from datetime import datetime
+from app.core.config import settings
+from app.judge.queue import judge_queue, JudgeQueueFull
+from app.judge.checker import CheckerError
+from app.judge.jobs import enqueue_job, is_job_active, lease_job
+from app.judge.metrics import metrics
+from app.judge.run_lane import RunLaneBusy
+from app.judge.test_results import get_results
+from app.services.run_service import run_code
+import asyncpg
+import hashlib
 import uuid
 
 router = APIRouter()
 
+SUBMISSION_COLUMNS = "id, user_id, challenge_id, code, language, status, runtime, memory, created_at"
+
+# Submissions with the challenge title and user name SubmissionResponse carries
+SUBMISSION_LIST_QUERY = """
+    SELECT s.id, s.user_id, s.challenge_id, s.code, s.language, s.status, s.runtime, s.memory, s.created_at,
+           c.title AS challenge_title, u.name AS user_name
+    FROM submissions s
+    JOIN challenges c ON s.challenge_id = c.id
+    JOIN users u ON s.user_id = u.id
+"""
+
+def submission_response(submission: Dict) -> Dict:
+    """A submission row in the shape of SubmissionResponse, ids as strings."""
+    return {
+        **dict(submission),
+        "id": str(submission["id"]),
+        "user_id": str(submission["user_id"]),
+        "challenge_id": str(submission["challenge_id"]),
+    }
+
 @router.get("/", response_model=List[SubmissionResponse])
 async def get_submissions(
-    user_id: Optional[str] = None,
     challenge_id: Optional[str] = None,
     status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 10,
     current_user = Depends(get_current_user)
 ):
-    # Build filter conditions
-    where = {}
-    if user_id:
-        where["userId"] = user_id
-    if challenge_id:
-        where["challengeId"] = challenge_id
-    if status:
-        where["status"] = status
-    
-    # Get submissions
+    """The current user's submissions, optionally for one challenge or with one status."""
     pool = await get_db()
     async with pool.acquire() as conn:
-        submissions = await conn.fetch("""
-            SELECT id, user_id, challenge_id, code, language, status, runtime, memory, created_at
-            FROM submissions
-            WHERE user_id = $1 AND challenge_id = $2 AND status = $3
-            ORDER BY created_at DESC
-        """, current_user['id'], challenge_id, status)
-    
-    # Format response
-    submission_responses = []
-    for sub in submissions:
-        submission_responses.append({
-            **sub,
-            "challengeTitle": sub["challengeId"],
-            "challengeDifficulty": "Unknown",
-            "userName": sub["userId"]
-        })
-    
-    return submission_responses
+        submissions = await conn.fetch(SUBMISSION_LIST_QUERY + """
+            WHERE s.user_id = $1
+              AND ($2::uuid IS NULL OR s.challenge_id = $2)
+              AND ($3::text IS NULL OR s.status::text = $3)
+            ORDER BY s.created_at DESC
+            LIMIT $4 OFFSET $5
+        """, current_user['id'], challenge_id, status, limit, skip)
+    return [submission_response(submission) for submission in submissions]
 
 @router.get("/me", response_model=List[SubmissionResponse])
 async def get_my_submissions(
     challenge_id: Optional[str] = None,
     status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 10,
+    current_user = Depends(get_current_user)
+):
+    return await get_submissions(challenge_id, status, skip, limit, current_user)
+
+@router.get("/user/{user_id}", response_model=List[SubmissionResponse])
+async def get_user_submissions(
+    user_id: str,
+    skip: int = 0,
+    limit: int = 10,
     current_user = Depends(get_current_user)
 ):
-    # Build filter conditions
-    where = {"userId": current_user.id}
-    if challenge_id:
-        where["challengeId"] = challenge_id
-    if status:
-        where["status"] = status
-    
-    # Get submissions
     pool = await get_db()
     async with pool.acquire() as conn:
-        submissions = await conn.fetch("""
-            SELECT id, user_id, challenge_id, code, language, status, runtime, memory, created_at
-            FROM submissions
-            WHERE user_id = $1 AND challenge_id = $2 AND status = $3
-            ORDER BY created_at DESC
-        """, current_user['id'], challenge_id, status)
-    
-    # Format response
-    submission_responses = []
-    for sub in submissions:
-        submission_responses.append({
-            **sub,
-            "challengeTitle": sub["challengeId"],
-            "challengeDifficulty": "Unknown",
-            "userName": sub["userId"]
-        })
-    
-    return submission_responses
+        submissions = await conn.fetch(SUBMISSION_LIST_QUERY + """
+            WHERE s.user_id = $1
+            ORDER BY s.created_at DESC
+            LIMIT $2 OFFSET $3
+        """, user_id, limit, skip)
+    return [submission_response(submission) for submission in submissions]
+
+@router.get("/challenge/{challenge_id}", response_model=List[SubmissionResponse])
+async def get_challenge_submissions(
+    challenge_id: str,
+    skip: int = 0,
+    limit: int = 10,
+    current_user = Depends(get_current_user)
+):
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        submissions = await conn.fetch(SUBMISSION_LIST_QUERY + """
+            WHERE s.challenge_id = $1
+            ORDER BY s.created_at DESC
+            LIMIT $2 OFFSET $3
+        """, challenge_id, limit, skip)
+    return [submission_response(submission) for submission in submissions]
 
 @router.get("/{submission_id}", response_model=SubmissionResponse)
 async def get_submission(submission_id: str, current_user = Depends(get_current_user)):
     pool = await get_db()
     async with pool.acquire() as conn:
-        submission = await conn.fetchrow("""
-            SELECT id, user_id, challenge_id, code, language, status, runtime, memory, created_at
-            FROM submissions
-            WHERE id = $1 AND user_id = $2
+        submission = await conn.fetchrow(SUBMISSION_LIST_QUERY + """
+            WHERE s.id = $1 AND s.user_id = $2
         """, submission_id, current_user['id'])
-        
-        if not submission:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Submission not found"
-            )
-        
-        # Check if user is authorized to view this submission
-        if submission["userId"] != current_user.id:
-            # TODO: Add admin check
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to view this submission"
-            )
-        
-        submission_response = {
-            **submission,
-            "challengeTitle": submission["challengeId"],
-            "challengeDifficulty": "Unknown",
-            "userName": submission["userId"]
-        }
-        
-        return submission_response
+    
+    if not submission:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Submission not found"
+        )
+    return submission_response(submission)
+
+@router.get("/{submission_id}/results", response_model=SubmissionResults)
+async def get_submission_results(submission_id: str, current_user = Depends(get_current_user)):
+    """
+    Which tests a judged submission passed, with runtime and memory per test
+    and a short diff of the first failure.
+    """
+    results = await get_results(submission_id, current_user["id"])
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No results for this submission"
+        )
+    return results
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
 
-@router.post("/", response_model=SubmissionResponse, status_code=status.HTTP_201_CREATED)
+def code_hash(code: str, language: str) -> str:
+    return hashlib.sha256(f"{language}\0{code}".encode()).hexdigest()
+
+@router.post("/", response_model=SubmissionResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_submission(
     submission: SubmissionCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user = Depends(get_current_user)
 ):
+    """
+    Create a submission and queue it for the judge.
+
+    Retries are safe: a request repeating an earlier Idempotency-Key gets the
+    submission that request created, and resubmitting code identical to a
+    submission still being judged (double clicks, retries without a key) gets that
+    submission. Neither is judged again.
+    """
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+    submission_hash = code_hash(submission.code, submission.language)
+    
     pool = await get_db()
     async with pool.acquire() as conn:
         # Get challenge
@@ -137,97 +169,145 @@ async def create_submission(
                 detail="Challenge not found"
             )
         
-        # Execute code against test cases
-        execution_result = await execute_code(
-            code=submission.code,
-            language=submission.language,
-            test_cases=challenge["testCases"],
-            time_limit=challenge["time_limit"]
-        )
-        
-        # Create submission
+        # Create a pending submission, the verdict is filled in by the judge
         submission_id = str(uuid.uuid4())
-        new_submission = await conn.fetchrow("""
-            INSERT INTO submissions (id, user_id, challenge_id, code, language, status, runtime, memory)
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-            RETURNING id, user_id, challenge_id, code, language, status, runtime, memory, created_at
-        """, submission_id, current_user['id'], submission.challenge_id, 
-            submission.code, submission.language, execution_result["status"], 
-            execution_result.get("runtime"), execution_result.get("memory"))
-        
-        # If submission is accepted, update user stats and broadcast
-        if execution_result["status"] == "ACCEPTED":
-            # Check if this is the first time the user has solved this challenge
-            previous_accepted = await conn.fetchrow("""
-                SELECT id
-                FROM submissions
-                WHERE user_id = $1 AND challenge_id = $2 AND status = $3 AND id != $4
-            """, current_user['id'], submission.challenge_id, "ACCEPTED", new_submission["id"])
+        existing = None
+        async with conn.transaction():
+            # Serialise identical submissions so only one of them is created
+            await conn.execute(
+                "SELECT pg_advisory_xact_lock(hashtext($1))",
+                f"{current_user['id']}:{submission.challenge_id}:{submission_hash}"
+            )
+            if idempotency_key is not None:
+                existing = await conn.fetchrow(f"""
+                    SELECT {SUBMISSION_COLUMNS}, code_hash
+                    FROM submissions
+                    WHERE user_id = $1 AND idempotency_key = $2
+                """, current_user['id'], idempotency_key)
+                if existing and (
+                    str(existing["challenge_id"]) != str(submission.challenge_id)
+                    or existing["code_hash"] != submission_hash
+                ):
+                    raise HTTPException(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        detail="Idempotency-Key was already used for a different submission"
+                    )
+                if existing:
+                    metrics.incr("submission_idempotent_replays")
             
-            if not previous_accepted:
-                # Update user stats
-                await conn.execute("""
-                    UPDATE users
-                    SET points = points + $1, solved = solved + 1
-                    WHERE id = $2
-                """, challenge["points"], current_user['id'])
-                
-                # Create activity
-                await create_activity(
-                    user_id=current_user['id'],
-                    type="CHALLENGE_COMPLETED",
-                    title=f"Completed '{challenge['title']}' Challenge",
-                    description=f"You solved the challenge in {execution_result.get('runtime', 0) / 1000:.2f} seconds",
-                    metadata={"challengeId": challenge["id"], "points": challenge["points"]}
-                )
-                
-                # Check for badges
-                await check_badges_after_submission(current_user['id'], challenge)
+            if existing is None:
+                existing = await conn.fetchrow(f"""
+                    SELECT {SUBMISSION_COLUMNS}
+                    FROM submissions
+                    WHERE user_id = $1 AND challenge_id = $2 AND code_hash = $3
+                      AND status = 'PENDING'
+                      AND created_at > CURRENT_TIMESTAMP - make_interval(secs => $4)
+                    ORDER BY created_at DESC
+                    LIMIT 1
+                """, current_user['id'], submission.challenge_id, submission_hash,
+                    settings.SUBMISSION_DEDUP_WINDOW)
+                # A submission left PENDING by a judge that stopped is no reason to wait,
+                # whichever process was judging it
+                if existing and not await is_job_active(conn, existing["id"]):
+                    existing = None
+                if existing:
+                    metrics.incr("submission_dedup_hits")
             
-            # Broadcast submission to challenge topic
-            await conn.execute("""
-                INSERT INTO activities (user_id, type, title, description, metadata)
-                VALUES ($1, $2, $3, $4, $5)
-            """, current_user['id'], "new_submission", f"Completed '{challenge['title']}' Challenge", 
-                f"You solved the challenge in {execution_result.get('runtime', 0) / 1000:.2f} seconds", 
-                json.dumps({"challengeId": challenge["id"], "points": challenge["points"]}))
-        else:
-            # Create activity for attempt
-            await create_activity(
-                user_id=current_user['id'],
-                type="CHALLENGE_ATTEMPTED",
-                title=f"Attempted '{challenge['title']}' Challenge",
-                description=f"You've made progress but haven't completed it yet",
-                metadata={"challengeId": challenge["id"], "status": execution_result["status"]}
+            if existing is None:
+                try:
+                    new_submission = await conn.fetchrow(f"""
+                        INSERT INTO submissions (id, user_id, challenge_id, code, language, status, code_hash, idempotency_key)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                        RETURNING {SUBMISSION_COLUMNS}
+                    """, submission_id, current_user['id'], submission.challenge_id, 
+                        submission.code, submission.language, "PENDING", submission_hash, idempotency_key)
+                except asyncpg.UniqueViolationError:
+                    # The same key is being used for different code at this moment
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is already in progress"
+                    )
+                
+                # Out-of-process workers pick the job up from the job table
+                if settings.JUDGE_BACKEND == "postgres":
+                    await enqueue_job(conn, submission_id)
+                # The in-process queue holds the job from the start, so identical
+                # submissions made meanwhile see it being judged
+                else:
+                    await lease_job(conn, submission_id, judge_queue.worker_id, settings.JUDGE_LEASE_SECONDS)
+    
+    if existing is not None:
+        new_submission = existing
+    # Otherwise queue the submission for the in-process judge workers
+    elif settings.JUDGE_BACKEND != "postgres":
+        try:
+            await judge_queue.enqueue(
+                submission_id,
+                str(current_user['id']),
+                timeout=settings.JUDGE_ENQUEUE_TIMEOUT
             )
-        
-        # Update user's last active timestamp
-        await conn.execute("""
-            UPDATE users
-            SET last_active = $1
-            WHERE id = $2
-        """, datetime.now(), current_user['id'])
-        
-        submission_response = {
-            **new_submission,
-            "challengeTitle": challenge["title"],
-            "challengeDifficulty": challenge["difficulty"],
-            "userName": current_user['id']
-        }
-        
-        return submission_response
+        except JudgeQueueFull:
+            async with pool.acquire() as conn:
+                await conn.execute("DELETE FROM submissions WHERE id = $1", submission_id)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The judge is busy, please try again shortly"
+            )
+    
+    submission_response = {
+        **{column: new_submission[column] for column in SUBMISSION_COLUMNS.split(", ")},
+        "id": str(new_submission["id"]),
+        "user_id": str(new_submission["user_id"]),
+        "challenge_id": str(new_submission["challenge_id"]),
+        "challenge_title": challenge["title"],
+        "user_name": current_user['name']
+    }
+    
+    return submission_response
 
-@router.get("/challenge/{challenge_id}", response_model=List[SubmissionResponse])
-async def get_challenge_submissions(
-    challenge_id: str,
+@router.post("/run", response_model=RunResponse)
+async def run_submission(
+    run: RunRequest,
     current_user = Depends(get_current_user)
 ):
+    """Run code against the sample tests or custom input, without submitting it."""
+    if run.inputs is not None:
+        if not run.inputs or len(run.inputs) > settings.RUN_MAX_INPUTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Provide between 1 and {settings.RUN_MAX_INPUTS} inputs"
+            )
+        if any(len(value.encode()) > settings.RUN_MAX_INPUT_KB * 1024 for value in run.inputs):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Inputs are limited to {settings.RUN_MAX_INPUT_KB} KB each"
+            )
+    
     pool = await get_db()
     async with pool.acquire() as conn:
-        submissions = await conn.fetch("""
-            SELECT id, user_id, challenge_id, code, language, status, runtime, memory, created_at
-            FROM submissions
-            WHERE challenge_id = $1 AND user_id = $2
-            ORDER BY created_at DESC
-        """, challenge_id, current_user['id'])
-        return [dict(submission) for submission in submissions]
+        challenge = await conn.fetchrow("""
+            SELECT c.id, c.time_limit, c.memory_limit, c.comparator, c.comparator_epsilon,
+                   ch.language AS checker_language, ch.code AS checker_code
+            FROM challenges c
+            LEFT JOIN checkers ch ON ch.challenge_id = c.id
+            WHERE c.id = $1
+        """, run.challenge_id)
+    
+    if not challenge:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Challenge not found"
+        )
+    
+    try:
+        return await run_code(dict(challenge), run.code, run.language, run.inputs)
+    except RunLaneBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many runs in progress, please try again shortly"
+        )
+    except CheckerError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"The challenge's checker failed: {str(e)}"
+        )
@@ -35,13 +35,22 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     pool = await get_db()
     async with pool.acquire() as conn:
         user = await conn.fetchrow(
-            "SELECT id, email, name, batch, avatar, github, linkedin, points, solved, streak FROM users WHERE id = $1",
+            "SELECT id, email, name, batch, avatar, github, linkedin, points, solved, streak, is_admin FROM users WHERE id = $1",
             user_id
         )
         if user is None:
             raise credentials_exception
         return dict(user)
 
+async def get_current_admin(current_user = Depends(get_current_user)):
+    """The current user, who must be an admin: challenge authoring changes what the judge runs for everyone."""
+    if not current_user.get("is_admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can do this"
+        )
+    return current_user
+
 # Add the missing functions for WebSocket authentication
 def get_token_from_cookie(request: Request) -> Optional[str]:
     """Extract token from cookies in a request"""
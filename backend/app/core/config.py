@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Optional
 import os
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -32,6 +33,93 @@ class Settings(BaseSettings):
     # WebSocket
     WEBSOCKET_URL: str = os.getenv("WEBSOCKET_URL", "ws://localhost:8000/ws")
     
+    # Judge queue
+    JUDGE_CONCURRENCY: int = int(os.getenv("JUDGE_CONCURRENCY", "4"))
+    JUDGE_QUEUE_MAX_SIZE: int = int(os.getenv("JUDGE_QUEUE_MAX_SIZE", "500"))
+    JUDGE_ENQUEUE_TIMEOUT: float = float(os.getenv("JUDGE_ENQUEUE_TIMEOUT", "2"))  # seconds
+    # Per-language lanes, as "language=value" pairs: how many of JUDGE_CONCURRENCY
+    # a language may use at once, and how much of a user's fair share a job costs
+    JUDGE_LANE_CONCURRENCY: str = os.getenv("JUDGE_LANE_CONCURRENCY", "java=2,cpp=2,c=2")
+    JUDGE_LANE_COSTS: str = os.getenv("JUDGE_LANE_COSTS", "java=3,cpp=2,c=2")
+    
+    # "local" judges in the API process, "postgres" hands jobs to app.judge.worker processes
+    JUDGE_BACKEND: str = os.getenv("JUDGE_BACKEND", "local")
+    JUDGE_LEASE_SECONDS: int = int(os.getenv("JUDGE_LEASE_SECONDS", "60"))
+    JUDGE_HEARTBEAT_SECONDS: int = int(os.getenv("JUDGE_HEARTBEAT_SECONDS", "15"))
+    JUDGE_MAX_ATTEMPTS: int = int(os.getenv("JUDGE_MAX_ATTEMPTS", "3"))
+    JUDGE_POLL_INTERVAL: float = float(os.getenv("JUDGE_POLL_INTERVAL", "2"))  # seconds
+    # Resubmitting code identical to a submission still pending this long returns that submission
+    SUBMISSION_DEDUP_WINDOW: int = int(os.getenv("SUBMISSION_DEDUP_WINDOW", "300"))  # seconds
+    # How much of the first failed test's input and outputs a submission's results keep
+    SUBMISSION_DIFF_CHARS: int = int(os.getenv("SUBMISSION_DIFF_CHARS", "200"))
+    
+    # Run lane: sample tests and custom input, separate from judging
+    RUN_CONCURRENCY: int = int(os.getenv("RUN_CONCURRENCY", "2"))
+    RUN_WAIT_TIMEOUT: float = float(os.getenv("RUN_WAIT_TIMEOUT", "2"))  # seconds
+    RUN_TIME_LIMIT: int = int(os.getenv("RUN_TIME_LIMIT", "2"))  # seconds
+    RUN_MEMORY_LIMIT_MB: int = int(os.getenv("RUN_MEMORY_LIMIT_MB", "128"))
+    RUN_MAX_INPUTS: int = int(os.getenv("RUN_MAX_INPUTS", "5"))
+    RUN_MAX_INPUT_KB: int = int(os.getenv("RUN_MAX_INPUT_KB", "64"))
+    
+    # Parallel test execution
+    JUDGE_SHARDS: int = int(os.getenv("JUDGE_SHARDS", "1"))
+    JUDGE_FAIL_FAST: bool = os.getenv("JUDGE_FAIL_FAST", "false").lower() == "true"
+    JUDGE_TEST_TIME_LIMIT_MS: int = int(os.getenv("JUDGE_TEST_TIME_LIMIT_MS", "0"))  # 0: the challenge's time limit
+    JUDGE_PROGRESS_INTERVAL_MS: int = int(os.getenv("JUDGE_PROGRESS_INTERVAL_MS", "200"))
+    
+    # Time limit calibration, see app/judge/calibration.py
+    JUDGE_CALIBRATE: bool = os.getenv("JUDGE_CALIBRATE", "true").lower() == "true"
+    JUDGE_CALIBRATION_REPEATS: int = int(os.getenv("JUDGE_CALIBRATION_REPEATS", "3"))
+    JUDGE_REFERENCE_TIME_LIMIT: int = int(os.getenv("JUDGE_REFERENCE_TIME_LIMIT", "30"))  # seconds
+    JUDGE_REFERENCE_SLACK: float = float(os.getenv("JUDGE_REFERENCE_SLACK", "2.0"))
+    JUDGE_MIN_TIME_LIMIT_MS: int = int(os.getenv("JUDGE_MIN_TIME_LIMIT_MS", "250"))
+    # How much slower than C each language may be, as "language=factor" pairs
+    JUDGE_LANGUAGE_TIME_FACTORS: str = os.getenv("JUDGE_LANGUAGE_TIME_FACTORS", "c=1,cpp=1,java=2,javascript=3,python=5")
+    
+    # Resource limits for judged processes
+    JUDGE_MEMORY_LIMIT_MB: int = int(os.getenv("JUDGE_MEMORY_LIMIT_MB", "256"))
+    JUDGE_MAX_PROCESSES: int = int(os.getenv("JUDGE_MAX_PROCESSES", "1024"))  # RLIMIT_NPROC counts per user
+    JUDGE_MAX_FILE_SIZE_MB: int = int(os.getenv("JUDGE_MAX_FILE_SIZE_MB", "16"))
+    JUDGE_OUTPUT_LIMIT_KB: int = int(os.getenv("JUDGE_OUTPUT_LIMIT_KB", "8192"))  # per stream
+    # Cores reserved for judged processes, one process per core, e.g. "2-7" (empty: no pinning)
+    JUDGE_CPU_CORES: str = os.getenv("JUDGE_CPU_CORES", "")
+    
+    # Judge workspaces, on /dev/shm when usable unless a directory is given
+    JUDGE_WORKSPACE_DIR: str = os.getenv("JUDGE_WORKSPACE_DIR", "")
+    JUDGE_WORKSPACE_POOL_SIZE: int = int(os.getenv("JUDGE_WORKSPACE_POOL_SIZE", "8"))
+    JUDGE_WORKSPACE_MIN_FREE_MB: int = int(os.getenv("JUDGE_WORKSPACE_MIN_FREE_MB", "512"))
+    
+    # Runner backends
+    PYTHON_JUDGE_BACKEND: str = os.getenv("PYTHON_JUDGE_BACKEND", "zygote")
+    JAVASCRIPT_JUDGE_BACKEND: str = os.getenv("JAVASCRIPT_JUDGE_BACKEND", "pool")
+    NODE_POOL_SIZE: int = int(os.getenv("NODE_POOL_SIZE", "4"))
+    JAVA_JUDGE_BACKEND: str = os.getenv("JAVA_JUDGE_BACKEND", "daemon")
+    JVM_POOL_SIZE: int = int(os.getenv("JVM_POOL_SIZE", "2"))
+    JVM_POOL_MAX_JOBS: int = int(os.getenv("JVM_POOL_MAX_JOBS", "200"))
+    
+    # JVM startup: class-data-sharing archive, flags for every judge JVM and initial heap size
+    JAVA_CDS: bool = os.getenv("JAVA_CDS", "true").lower() == "true"
+    JAVA_STARTUP_FLAGS: str = os.getenv("JAVA_STARTUP_FLAGS", "-XX:TieredStopAtLevel=1 -XX:+UseSerialGC -XX:-UsePerfData -Xshare:auto")
+    JAVA_INITIAL_HEAP_MB: int = int(os.getenv("JAVA_INITIAL_HEAP_MB", "32"))
+    
+    # Compile cache
+    COMPILE_CACHE_DIR: str = os.getenv("COMPILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "khwopacoder-compile-cache"))
+    COMPILE_CACHE_MAX_MB: int = int(os.getenv("COMPILE_CACHE_MAX_MB", "512"))
+    
+    # Custom checkers: where compiled checkers are kept, and the limits of one check
+    CHECKER_DIR: str = os.getenv("CHECKER_DIR", os.path.join(tempfile.gettempdir(), "khwopacoder-checkers"))
+    CHECKER_TIME_LIMIT: float = float(os.getenv("CHECKER_TIME_LIMIT", "5"))  # seconds
+    CHECKER_MEMORY_LIMIT_MB: int = int(os.getenv("CHECKER_MEMORY_LIMIT_MB", "256"))
+    
+    # Compiler flags per language
+    CPP_COMPILE_FLAGS: str = os.getenv("CPP_COMPILE_FLAGS", "-O2 -std=c++17")
+    C_COMPILE_FLAGS: str = os.getenv("C_COMPILE_FLAGS", "-O2 -std=c11")
+    JAVA_COMPILE_FLAGS: str = os.getenv("JAVA_COMPILE_FLAGS", "")
+    
+    # Verdict cache
+    VERDICT_CACHE_SIZE: int = int(os.getenv("VERDICT_CACHE_SIZE", "10000"))
+    VERDICT_CACHE_PERSIST: bool = os.getenv("VERDICT_CACHE_PERSIST", "false").lower() == "true"
+    
     class Config:
         env_file = BACKEND_DIR / '.env'
         case_sensitive = True
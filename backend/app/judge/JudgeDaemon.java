@@ -0,0 +1,162 @@
+/*
+ * Warm JVM for the judge.
+ *
+ * Started by app.judge.jvm_pool and kept running between submissions. Each job
+ * loads the submission's compiled classes in a throwaway class loader, calls
+ * the runner's main method and reports back. One job per line on stdin:
+ *
+ *   job    <class_dir>\t<main_class>\t<output_limit>\t<NAME=value>...
+ *   reply  <exit_code> <output_exceeded> <cpu_time_ms> <peak_heap_kb> <recycle> <stdout_bytes> <stderr_bytes>\n
+ *          followed by the raw stdout and stderr bytes
+ *
+ * The NAME=value settings (shard, test data file) are passed to main as
+ * arguments, a shared JVM can't give each job its own environment. Timeouts
+ * are enforced by the judge, which kills the whole JVM when a job overruns.
+ * After an OutOfMemoryError or StackOverflowError, or when a job leaves threads
+ * running (a test abandoned at its deadline), the reply asks the judge to
+ * replace this JVM.
+ */
+import java.io.BufferedReader;
+import java.io.ByteArrayOutputStream;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.management.ManagementFactory;
+import java.lang.management.MemoryPoolMXBean;
+import java.lang.management.MemoryType;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Paths;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import java.util.Set;
+
+public class JudgeDaemon {
+    /** Thrown from System.out/err once a job printed more than its output limit. */
+    static class OutputLimitExceeded extends Error {
+        OutputLimitExceeded() {
+            super("Output limit exceeded");
+        }
+    }
+
+    /** Collects a job's output, up to a limit. */
+    static class BoundedOutput extends OutputStream {
+        final ByteArrayOutputStream buffer = new ByteArrayOutputStream();
+        final long limit;
+        boolean exceeded;
+
+        BoundedOutput(long limit) {
+            this.limit = limit;
+        }
+
+        @Override
+        public void write(int b) {
+            write(new byte[] {(byte) b}, 0, 1);
+        }
+
+        @Override
+        public void write(byte[] b, int off, int len) {
+            if (exceeded) {
+                throw new OutputLimitExceeded();
+            }
+            if (limit > 0 && buffer.size() + len > limit) {
+                buffer.write(b, off, (int) (limit - buffer.size()));
+                exceeded = true;
+                throw new OutputLimitExceeded();
+            }
+            buffer.write(b, off, len);
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        // Replies go to the real stdout, System.out is redirected for every job
+        PrintStream replies = new PrintStream(new FileOutputStream(FileDescriptor.out), false);
+        BufferedReader jobs = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        // Jobs run tests on threads of their own, so CPU time is the whole JVM's
+        com.sun.management.OperatingSystemMXBean osBean =
+                (com.sun.management.OperatingSystemMXBean) ManagementFactory.getOperatingSystemMXBean();
+        List<MemoryPoolMXBean> heapPools = new ArrayList<>();
+        for (MemoryPoolMXBean pool : ManagementFactory.getMemoryPoolMXBeans()) {
+            if (pool.getType() == MemoryType.HEAP) {
+                heapPools.add(pool);
+            }
+        }
+
+        replies.print("ready\n");
+        replies.flush();
+
+        String line;
+        while ((line = jobs.readLine()) != null) {
+            String[] fields = line.split("\t");
+            URL classDir = Paths.get(fields[0]).toUri().toURL();
+            String mainClass = fields[1];
+            long outputLimit = Long.parseLong(fields[2]);
+            String[] jobArgs = Arrays.copyOfRange(fields, 3, fields.length);
+
+            BoundedOutput stdout = new BoundedOutput(outputLimit);
+            BoundedOutput stderr = new BoundedOutput(outputLimit);
+            PrintStream jobOut = new PrintStream(stdout, true, "UTF-8");
+            PrintStream jobErr = new PrintStream(stderr, true, "UTF-8");
+            System.setOut(jobOut);
+            System.setErr(jobErr);
+
+            System.gc();
+            for (MemoryPoolMXBean pool : heapPools) {
+                pool.resetPeakUsage();
+            }
+            Set<Thread> threadsBefore = Thread.getAllStackTraces().keySet();
+            long cpuBefore = osBean.getProcessCpuTime();
+            int exitCode = 0;
+            boolean recycle = false;
+
+            // The submission only sees the platform classes, never the daemon's
+            try (URLClassLoader loader = new URLClassLoader(new URL[] {classDir}, ClassLoader.getPlatformClassLoader())) {
+                Method main = loader.loadClass(mainClass).getMethod("main", String[].class);
+                main.invoke(null, (Object) jobArgs);
+            } catch (Throwable e) {
+                Throwable cause = e instanceof InvocationTargetException ? e.getCause() : e;
+                exitCode = 1;
+                recycle = cause instanceof VirtualMachineError;
+                if (!(cause instanceof OutputLimitExceeded)) {
+                    try {
+                        cause.printStackTrace(jobErr);
+                    } catch (OutputLimitExceeded ignored) {
+                        // The stack trace itself went past the limit
+                    }
+                }
+            }
+            try {
+                jobOut.flush();
+                jobErr.flush();
+            } catch (OutputLimitExceeded ignored) {
+                // Already recorded on the stream
+            }
+
+            long cpuTimeMs = (osBean.getProcessCpuTime() - cpuBefore) / 1000000;
+            for (Thread thread : Thread.getAllStackTraces().keySet()) {
+                if (!threadsBefore.contains(thread) && thread.isAlive()) {
+                    recycle = true;
+                }
+            }
+            long peakHeapBytes = 0;
+            for (MemoryPoolMXBean pool : heapPools) {
+                peakHeapBytes += pool.getPeakUsage().getUsed();
+            }
+            String outputExceeded = stdout.exceeded ? "stdout" : stderr.exceeded ? "stderr" : "-";
+            byte[] out = stdout.buffer.toByteArray();
+            byte[] err = stderr.buffer.toByteArray();
+
+            replies.print(exitCode + " " + outputExceeded + " " + cpuTimeMs + " " + (peakHeapBytes / 1024) + " "
+                    + (recycle ? 1 : 0) + " " + out.length + " " + err.length + "\n");
+            replies.write(out, 0, out.length);
+            replies.write(err, 0, err.length);
+            replies.flush();
+        }
+    }
+}
@@ -0,0 +1,224 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import time
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.metrics import metrics
+from app.judge.scheduler import judge_scheduler, parse_language_map
+from app.judge.verdict_cache import verdict_cache
+from app.services.code_execution import (
+    JAVA_TRAINING_SOLUTION, SUPPORTED_LANGUAGES, execute_code, get_runtime_version
+)
+
+# Solutions that do nothing, their run time is what the language costs before any work
+BASELINE_SOLUTIONS = {
+    "python": "def solve(value):\n    return value\n",
+    "javascript": "function solve(value) { return value; }\n",
+    "java": JAVA_TRAINING_SOLUTION,
+    "cpp": "int solve(int value) { return value; }\n",
+    "c": "int solve(int value) { return value; }\n",
+}
+BASELINE_TESTS = [{"input": "1", "output": "1"}]
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+class Calibration:
+    """
+    Per-language time limits derived from measurements on this judge host.
+
+    At startup every language runs a solution that does nothing, and the
+    fastest of a few runs is that language's overhead (interpreter or JVM
+    start, harness, loading the tests). A challenge's time limit is the time
+    its solution may spend working, each language gets its overhead on top.
+
+    When the challenge has a reference solution the working time is derived
+    from it instead: the reference is timed over all tests (the fastest of
+    JUDGE_CALIBRATION_REPEATS runs), scaled by JUDGE_LANGUAGE_TIME_FACTORS from
+    the reference's language to the submission's, times JUDGE_REFERENCE_SLACK.
+    Every host keeps its own timing of the reference and measures it the first
+    time it judges the challenge, so new hardware never needs limits re-tuned
+    by hand and hosts with different hardware don't re-measure in turn.
+
+    Processes that don't judge submissions (the API with the postgres backend)
+    don't measure anything, they `load` what the last judge host stored.
+    """
+
+    def __init__(self):
+        self.overhead_ms: Dict[str, float] = {}
+        self.host_id = ""
+        self.language_factors = parse_language_map(settings.JUDGE_LANGUAGE_TIME_FACTORS)
+        self._benchmarks: Dict[str, asyncio.Lock] = {}
+
+    async def calibrate(self, languages: Optional[List[str]] = None):
+        """Measure the overhead of every language that is installed."""
+        versions = []
+        for language in languages or list(SUPPORTED_LANGUAGES):
+            version = await get_runtime_version(SUPPORTED_LANGUAGES[language])
+            versions.append(f"{language}={version}")
+            if version.startswith("unknown"):
+                continue
+            wall_time = await self._fastest_run(
+                BASELINE_SOLUTIONS[language], language, BASELINE_TESTS, settings.JUDGE_REFERENCE_TIME_LIMIT
+            )
+            if wall_time is None:
+                print(f"Could not calibrate {language}, its limits get no overhead allowance")
+                continue
+            self.overhead_ms[language] = wall_time
+            metrics.set_gauge(f"calibration_{language}_overhead_ms", wall_time)
+
+        host = "\n".join([cpu_model(), str(os.cpu_count()), *versions])
+        self.host_id = hashlib.sha256(host.encode()).hexdigest()[:16]
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO judge_hosts (host_id, overhead_ms)
+                VALUES ($1, $2)
+                ON CONFLICT (host_id) DO UPDATE
+                SET overhead_ms = $2, calibrated_at = CURRENT_TIMESTAMP
+            """, self.host_id, json.dumps(self.overhead_ms))
+        print(f"Judge calibrated on host {self.host_id}: {self.overhead_ms}")
+
+    async def load(self):
+        """Take the overheads the judge host that calibrated last measured."""
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            host = await conn.fetchrow("""
+                SELECT host_id, overhead_ms
+                FROM judge_hosts
+                ORDER BY calibrated_at DESC
+                LIMIT 1
+            """)
+        if not host:
+            print("No judge host has calibrated yet, limits get no overhead allowance")
+            return
+        # host_id stays unset: a reference timed here wasn't timed on that host
+        self.overhead_ms = json.loads(host["overhead_ms"])
+        print(f"Judge limits loaded from host {host['host_id']}: {self.overhead_ms}")
+
+    async def _fastest_run(self, code: str, language: str, test_cases: List[Dict], time_limit: float) -> Optional[float]:
+        """The lowest wall time of JUDGE_CALIBRATION_REPEATS runs, None if the code doesn't run cleanly."""
+        fastest = None
+        for _ in range(max(1, settings.JUDGE_CALIBRATION_REPEATS)):
+            result = await execute_code(code, language, test_cases, time_limit)
+            # Baseline runs are only timed, the C++ harness can't check answers yet
+            if result["status"] not in ("ACCEPTED", "WRONG_ANSWER") or result.get("wall_time") is None:
+                return None
+            fastest = result["wall_time"] if fastest is None else min(fastest, result["wall_time"])
+        return fastest
+
+    async def benchmark_reference(
+        self, challenge_id: str, code: str, language: str, test_cases: List[Dict],
+        in_slot: bool = False, replace: bool = False
+    ) -> Dict:
+        """
+        Time a reference solution over the tests and store the result as this
+        host's timing. A new reference (`replace`) drops every other host's.
+
+        A caller already holding a judge slot (`in_slot`) has the benchmark run
+        in it: waiting for a second slot deadlocks once every slot is held by a
+        job waiting for this benchmark. Raises ValueError if the reference
+        doesn't pass every test.
+        """
+        start_time = time.monotonic()
+        if in_slot:
+            slot = contextlib.nullcontext()
+        else:
+            slot = judge_scheduler.slot(f"reference:{challenge_id}", language)
+        async with slot:
+            result = await execute_code(code, language, test_cases, settings.JUDGE_REFERENCE_TIME_LIMIT)
+            if result["status"] != "ACCEPTED":
+                raise ValueError(f"The reference solution must pass every test, got {result['status']}: {result.get('message')}")
+            wall_time = await self._fastest_run(code, language, test_cases, settings.JUDGE_REFERENCE_TIME_LIMIT)
+        if wall_time is None:
+            raise ValueError("The reference solution did not run reliably")
+        metrics.observe("reference_benchmark_ms", (time.monotonic() - start_time) * 1000)
+
+        runtime_ms = max(1, int(wall_time - self.overhead_ms.get(language, 0)))
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if replace:
+                    await conn.execute("""
+                        DELETE FROM reference_solutions WHERE challenge_id = $1 AND host_id != $2
+                    """, challenge_id, self.host_id)
+                reference = await conn.fetchrow("""
+                    INSERT INTO reference_solutions (challenge_id, language, code, runtime_ms, host_id, test_set_version)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                    ON CONFLICT (challenge_id, host_id) DO UPDATE
+                    SET language = $2, code = $3, runtime_ms = $4, test_set_version = $6,
+                        benchmarked_at = CURRENT_TIMESTAMP
+                    RETURNING challenge_id, language, code, runtime_ms, host_id, test_set_version, benchmarked_at
+                """, challenge_id, language, code, runtime_ms, self.host_id, verdict_cache.test_set_version(test_cases))
+        return dict(reference)
+
+    async def get_reference(self, challenge_id: str, test_cases: List[Dict], in_slot: bool = False) -> Optional[Dict]:
+        """
+        This host's timing of the challenge's reference. Without one, or with
+        one made on other tests, the reference is measured here first.
+        """
+        # Another host's row still has the reference's code
+        reference = await self.stored_reference(challenge_id)
+        if not reference:
+            return None
+        if reference["host_id"] == self.host_id and reference["test_set_version"] == verdict_cache.test_set_version(test_cases):
+            return reference
+
+        # Only one benchmark per challenge at a time, everyone else uses its result
+        lock = self._benchmarks.setdefault(str(challenge_id), asyncio.Lock())
+        async with lock:
+            if reference["host_id"] == self.host_id and reference["test_set_version"] == verdict_cache.test_set_version(test_cases):
+                return reference
+            try:
+                reference = await self.benchmark_reference(
+                    challenge_id, reference["code"], reference["language"], test_cases, in_slot
+                )
+                metrics.incr("reference_rebenchmarks")
+            except ValueError as e:
+                # Keep judging with the old timing rather than not at all
+                print(f"Re-benchmarking the reference solution of {challenge_id} failed: {str(e)}")
+        return reference
+
+    async def stored_reference(self, challenge_id: str) -> Optional[Dict]:
+        """This host's timing of the challenge's reference, else the latest of any host. Never benchmarks."""
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            reference = await conn.fetchrow("""
+                SELECT challenge_id, language, code, runtime_ms, host_id, test_set_version, benchmarked_at
+                FROM reference_solutions
+                WHERE challenge_id = $1
+                ORDER BY host_id = $2 DESC, benchmarked_at DESC
+                LIMIT 1
+            """, challenge_id, self.host_id)
+        return dict(reference) if reference else None
+
+    def time_limit(self, language: str, challenge_time_limit: float, reference: Optional[Dict] = None) -> float:
+        """The time limit in seconds for `language`, overhead included."""
+        language = language.lower()
+        if reference:
+            factor = self.language_factors.get(language, 1.0) / self.language_factors.get(reference["language"], 1.0)
+            work_ms = max(settings.JUDGE_MIN_TIME_LIMIT_MS, reference["runtime_ms"] * factor * settings.JUDGE_REFERENCE_SLACK)
+        else:
+            work_ms = challenge_time_limit * 1000
+        return round((work_ms + self.overhead_ms.get(language, 0)) / 1000, 3)
+
+    def time_limits(self, challenge_time_limit: float, reference: Optional[Dict] = None) -> Dict[str, float]:
+        return {
+            language: self.time_limit(language, challenge_time_limit, reference)
+            for language in SUPPORTED_LANGUAGES
+        }
+
+# Create a global instance
+calibration = Calibration()
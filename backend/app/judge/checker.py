@@ -0,0 +1,206 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+from app.core.config import settings
+from app.judge.comparator import CheckerError, Comparator, read_range
+from app.judge.compile_cache import CompileCache, compile_cache
+from app.judge.metrics import metrics
+from app.judge.sandbox import _apply_limits, build_limits, child_environment
+from app.services.code_execution import SUPPORTED_LANGUAGES, get_compiler_version, get_runtime_version, write_file
+
+# Checker source and compiled file per language. Python checkers are compiled
+# to bytecode, which checks their syntax on upload and skips parsing on every run.
+CHECKER_FILES = {
+    "python": ("checker.py", "checker.pyc"),
+    "cpp": ("checker.cpp", "checker"),
+}
+
+# Exit codes of a checker, as in testlib: 0 accepted, 1 wrong answer, 2 presentation error
+ACCEPTED_EXIT_CODE = 0
+WRONG_EXIT_CODES = (1, 2)
+
+def compile_command(language: str) -> List[str]:
+    lang_config = SUPPORTED_LANGUAGES[language]
+    source, artifact = CHECKER_FILES[language]
+    if language == "python":
+        # Exits with just the syntax error, not a traceback of py_compile
+        return [
+            lang_config["command"], "-c",
+            "import py_compile, sys\n"
+            f"try: py_compile.compile({source!r}, cfile={artifact!r}, doraise=True)\n"
+            "except py_compile.PyCompileError as e: sys.exit(e.msg)"
+        ]
+    return [lang_config["compile_command"]] + lang_config["compile_flags"] + [source, "-o", artifact]
+
+class Checker:
+    """
+    A compiled checker program that decides whether an output is correct.
+
+    It is run once per test as `checker <input> <expected> <actual>` and
+    answers with its exit code. It has the same interface as Comparator, so
+    the judge uses either one the same way.
+    """
+
+    def __init__(self, cache_key: str, language: str, path: str):
+        self.cache_key = cache_key
+        self.language = language
+        self.path = path
+        self.limits = build_limits(settings.CHECKER_TIME_LIMIT, settings.CHECKER_MEMORY_LIMIT_MB)
+
+    def key(self) -> str:
+        """Identifies the checker in verdict cache keys."""
+        return f"checker:{self.cache_key}"
+
+    def command(self) -> List[str]:
+        if self.language == "python":
+            # Isolated and without site, the checker needs nothing from the environment
+            return [SUPPORTED_LANGUAGES["python"]["command"], "-I", "-S", self.path]
+        return [self.path]
+
+    def compare(
+        self,
+        expected: BinaryIO,
+        expected_range: Tuple[int, int],
+        actual: BinaryIO,
+        actual_range: Tuple[int, int],
+        input_range: Optional[Tuple[int, int]] = None
+    ) -> bool:
+        with tempfile.TemporaryDirectory(prefix="checker-") as scratch:
+            paths = []
+            for name, f, file_range in (
+                ("input", expected, input_range or (0, 0)),
+                ("expected", expected, expected_range),
+                ("actual", actual, actual_range),
+            ):
+                path = os.path.join(scratch, name)
+                with open(path, "wb") as out:
+                    for chunk in read_range(f, *file_range):
+                        out.write(chunk)
+                paths.append(path)
+            return self.run(paths, scratch)
+
+    def run(self, paths: List[str], cwd: str) -> bool:
+        start_time = time.monotonic()
+        try:
+            process = subprocess.run(
+                self.command() + paths,
+                cwd=cwd,
+                env=child_environment(cwd),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=settings.CHECKER_TIME_LIMIT,
+                preexec_fn=lambda: _apply_limits(self.limits),
+                start_new_session=True
+            )
+        except subprocess.TimeoutExpired:
+            metrics.incr("checker_failures")
+            raise CheckerError(f"The checker exceeded {settings.CHECKER_TIME_LIMIT:g} seconds")
+        finally:
+            metrics.observe("checker_ms", (time.monotonic() - start_time) * 1000)
+        metrics.incr("checker_runs")
+
+        if process.returncode == ACCEPTED_EXIT_CODE:
+            return True
+        if process.returncode in WRONG_EXIT_CODES:
+            return False
+        metrics.incr("checker_failures")
+        message = (process.stderr or process.stdout).decode(errors="replace").strip()[-500:]
+        raise CheckerError(f"The checker failed with exit code {process.returncode}" + (f": {message}" if message else ""))
+
+class CheckerStore:
+    """
+    Compiled checkers, ready to run.
+
+    Checkers are compiled through the compile cache, keyed by their source,
+    compiler version and command line, so a checker is compiled once when it
+    is uploaded and every judge after that only copies the result out of the
+    cache. Each compiled checker is kept in its own directory under `root`
+    for the life of the process and shared by every submission.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.checkers: Dict[str, Checker] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def compile(self, code: str, language: str) -> Checker:
+        """Compile a checker, or find it compiled already. Raises CheckerError if it doesn't compile."""
+        language = language.lower()
+        if language not in CHECKER_FILES:
+            raise CheckerError(f"Checkers can be written in {', '.join(CHECKER_FILES)}, not {language}")
+        lang_config = SUPPORTED_LANGUAGES[language]
+        source, artifact = CHECKER_FILES[language]
+        cmd = compile_command(language)
+        if language == "python":
+            version = await get_runtime_version(lang_config)
+        else:
+            version = await get_compiler_version(lang_config)
+        cache_key = CompileCache.make_key({source: code.encode()}, version, cmd)
+
+        if cache_key in self.checkers:
+            return self.checkers[cache_key]
+        lock = self._locks.setdefault(cache_key, asyncio.Lock())
+        async with lock:
+            if cache_key not in self.checkers:
+                path = await self._build(cache_key, code, source, artifact, cmd)
+                self.checkers[cache_key] = Checker(cache_key, language, path)
+        return self.checkers[cache_key]
+
+    async def _build(self, cache_key: str, code: str, source: str, artifact: str, cmd: List[str]) -> str:
+        checker_dir = os.path.join(self.root, cache_key)
+        path = os.path.join(checker_dir, artifact)
+        if os.path.exists(path):
+            return path
+
+        await asyncio.to_thread(os.makedirs, self.root, exist_ok=True)
+        staging_dir = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        await asyncio.to_thread(os.makedirs, staging_dir)
+        try:
+            cached = await asyncio.to_thread(compile_cache.get, cache_key, staging_dir)
+            if cached is not None:
+                metrics.incr("checker_compile_cache_hits")
+                if cached.get("error"):
+                    raise CheckerError(cached["error"])
+            else:
+                metrics.incr("checker_compile_cache_misses")
+                await write_file(os.path.join(staging_dir, source), code)
+                start_time = time.monotonic()
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=staging_dir
+                )
+                stdout, stderr = await process.communicate()
+                metrics.observe("checker_compile_ms", (time.monotonic() - start_time) * 1000)
+                if process.returncode != 0:
+                    error = stderr.decode().strip() or "Compilation failed"
+                    # As for submissions, only the compiler's own diagnostics are kept
+                    if process.returncode > 0 and stderr.strip():
+                        await asyncio.to_thread(compile_cache.put, cache_key, staging_dir, [], error)
+                    raise CheckerError(error)
+                await asyncio.to_thread(compile_cache.put, cache_key, staging_dir, [artifact])
+
+            try:
+                await asyncio.to_thread(os.rename, staging_dir, checker_dir)
+            except OSError:
+                # Another judge process built it first
+                pass
+        finally:
+            await asyncio.to_thread(shutil.rmtree, staging_dir, True)
+        return path
+
+async def get_comparator(challenge: Dict) -> Union[Comparator, Checker]:
+    """How a challenge's outputs are judged: its checker if it has one, else its comparison policy."""
+    if challenge.get("checker_code"):
+        return await checkers.compile(challenge["checker_code"], challenge["checker_language"])
+    return Comparator(challenge.get("comparator") or "exact", challenge.get("comparator_epsilon"))
+
+# Create a global instance
+checkers = CheckerStore(settings.CHECKER_DIR)
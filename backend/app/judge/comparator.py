@@ -0,0 +1,236 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# How outputs are compared, set per challenge
+POLICIES = ("exact", "whitespace", "float", "unordered")
+DEFAULT_EPSILON = 1e-6
+
+# How much of the input, expected and actual output a test record shows
+PREVIEW_BYTES = 1024
+
+# Outputs are compared this much at a time, never held in memory whole
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = b" \t\r\n\x0b\x0c"
+# JSON structure, split into tokens of their own so "[1, 2]" and "[1,2]" tokenize alike
+PUNCTUATION = b"[]{},:"
+TOKEN = re.compile(rb"[\[\]{},:]|[^\s\[\]{},:]+")
+
+def read_range(f: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    f.seek(start)
+    while length > 0:
+        chunk = f.read(min(CHUNK_SIZE, length))
+        if not chunk:
+            return
+        length -= len(chunk)
+        yield chunk
+
+def trim_range(f: BinaryIO, start: int, length: int) -> Tuple[int, int]:
+    """The range without leading and trailing whitespace, reading only as far as the whitespace goes."""
+    # A write cut short (e.g. at the file size limit) leaves the range running past the end of the file
+    end = min(start + length, f.seek(0, os.SEEK_END))
+    while start < end:
+        f.seek(start)
+        chunk = f.read(min(CHUNK_SIZE, end - start))
+        stripped = chunk.lstrip(WHITESPACE)
+        start += len(chunk) - len(stripped)
+        if stripped:
+            break
+    while end > start:
+        size = min(CHUNK_SIZE, end - start)
+        f.seek(end - size)
+        chunk = f.read(size)
+        stripped = chunk.rstrip(WHITESPACE)
+        end -= len(chunk) - len(stripped)
+        if stripped:
+            break
+    return start, end - start
+
+def iter_tokens(f: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    """Whitespace-separated tokens of a file range, with JSON punctuation as tokens of its own."""
+    carry = b""
+    for chunk in read_range(f, start, length):
+        data = carry + chunk
+        tokens = TOKEN.findall(data)
+        # A token running up to the end of the chunk may continue in the next one
+        carry = tokens.pop() if tokens and data[-1] not in WHITESPACE + PUNCTUATION else b""
+        yield from tokens
+    if carry:
+        yield carry
+
+def top_level_items(tokens: Iterator[bytes]) -> List[Tuple[bytes, ...]]:
+    """The items of a top-level JSON array as token tuples, or every token on its own if it isn't one."""
+    tokens = list(tokens)
+    if len(tokens) < 2 or tokens[0] != b"[" or tokens[-1] != b"]":
+        return [(token,) for token in tokens]
+    items, item, depth = [], [], 0
+    for token in tokens[1:-1]:
+        if token in (b"[", b"{"):
+            depth += 1
+        elif token in (b"]", b"}"):
+            depth -= 1
+        if token == b"," and depth == 0:
+            items.append(tuple(item))
+            item = []
+        else:
+            item.append(token)
+    if item:
+        items.append(tuple(item))
+    return items
+
+class Comparator:
+    """
+    Decides whether an actual output matches the expected one.
+
+    - exact: byte for byte, ignoring leading and trailing whitespace
+    - whitespace: the same tokens, however they are spaced
+    - float: the same tokens, numbers equal within `epsilon` (absolute, or
+      relative for numbers larger than 1)
+    - unordered: the same items of the top-level array in any order (or the
+      same tokens in any order if the output isn't an array)
+
+    Everything but unordered streams both outputs in chunks and stops at the
+    first difference, large outputs are never held in memory.
+    """
+
+    def __init__(self, policy: str = "exact", epsilon: Optional[float] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown comparison policy {policy}, expected one of {', '.join(POLICIES)}")
+        self.policy = policy
+        self.epsilon = DEFAULT_EPSILON if epsilon is None else epsilon
+
+    def key(self) -> str:
+        """Identifies the policy in verdict cache keys."""
+        return f"{self.policy}:{self.epsilon!r}" if self.policy == "float" else self.policy
+
+    def compare(
+        self,
+        expected: BinaryIO,
+        expected_range: Tuple[int, int],
+        actual: BinaryIO,
+        actual_range: Tuple[int, int],
+        input_range: Optional[Tuple[int, int]] = None
+    ) -> bool:
+        """Whether the actual range matches the expected one, `input_range` (in `expected`) is for checkers."""
+        if self.policy == "exact":
+            return self._compare_bytes(expected, trim_range(expected, *expected_range), actual, trim_range(actual, *actual_range))
+
+        expected_tokens = iter_tokens(expected, *expected_range)
+        actual_tokens = iter_tokens(actual, *actual_range)
+        if self.policy == "unordered":
+            return Counter(top_level_items(expected_tokens)) == Counter(top_level_items(actual_tokens))
+
+        tokens_equal = self._floats_equal if self.policy == "float" else bytes.__eq__
+        missing = object()
+        while True:
+            expected_token = next(expected_tokens, missing)
+            actual_token = next(actual_tokens, missing)
+            if expected_token is missing or actual_token is missing:
+                return expected_token is actual_token
+            if not tokens_equal(expected_token, actual_token):
+                return False
+
+    def _compare_bytes(self, expected: BinaryIO, expected_range: Tuple[int, int], actual: BinaryIO, actual_range: Tuple[int, int]) -> bool:
+        if expected_range[1] != actual_range[1]:
+            return False
+        expected_start, actual_start = expected_range[0], actual_range[0]
+        remaining = expected_range[1]
+        while remaining > 0:
+            size = min(CHUNK_SIZE, remaining)
+            expected.seek(expected_start)
+            actual.seek(actual_start)
+            if expected.read(size) != actual.read(size):
+                return False
+            expected_start += size
+            actual_start += size
+            remaining -= size
+        return True
+
+    def _floats_equal(self, expected: bytes, actual: bytes) -> bool:
+        if expected == actual:
+            return True
+        try:
+            expected_value, actual_value = float(expected), float(actual)
+        except ValueError:
+            return False
+        if math.isnan(expected_value) or math.isnan(actual_value):
+            return False
+        return abs(expected_value - actual_value) <= self.epsilon * max(1.0, abs(expected_value))
+
+def index_test_data(f: BinaryIO) -> List[Tuple[int, int, int]]:
+    """(start, input length, output length) of every test in a test data file."""
+    f.seek(0)
+    count = int(f.readline())
+    index = []
+    for _ in range(count):
+        input_length, output_length = map(int, f.readline().split())
+        start = f.tell()
+        index.append((start, input_length, output_length))
+        f.seek(start + input_length + output_length)
+    return index
+
+def preview(f: BinaryIO, start: int, length: int) -> str:
+    f.seek(start)
+    text = f.read(min(length, PREVIEW_BYTES)).decode(errors="replace")
+    return text + "..." if length > PREVIEW_BYTES else text
+
+class CheckerError(Exception):
+    """The checker didn't compile, crashed, timed out or exited with an unknown code."""
+
+class OutputChecker:
+    """
+    Judges the test records of one run against the expected outputs.
+
+    Runners write each test's output to an output file and report where it
+    is. The checker compares that range of the output file with the expected
+    output in the test data file, and fills in the record's `passed` and short
+    previews of the input, expected and actual output. A challenge's checker
+    failing raises CheckerError, that is the judge's failure and no verdict.
+    """
+
+    def __init__(self, test_data_path: str, output_path: str, comparator: Comparator):
+        self.test_data_path = test_data_path
+        self.output_path = output_path
+        self.comparator = comparator
+        self.index: Optional[List[Tuple[int, int, int]]] = None
+
+    def check(self, records: List[Dict]) -> List[Dict]:
+        if not records:
+            return records
+        with open(self.test_data_path, "rb") as expected:
+            if self.index is None:
+                self.index = index_test_data(expected)
+            try:
+                actual = open(self.output_path, "rb")
+            except FileNotFoundError:
+                actual = None
+            try:
+                for record in records:
+                    self._check(record, expected, actual)
+            finally:
+                if actual:
+                    actual.close()
+        return records
+
+    def _check(self, record: Dict, expected: BinaryIO, actual: Optional[BinaryIO]):
+        start, input_length, output_length = self.index[record["index"]]
+        expected_range = trim_range(expected, start + input_length, output_length)
+        record["input"] = preview(expected, start, input_length)
+        record["expected"] = preview(expected, *expected_range)
+
+        if record.get("timed_out"):
+            record["actual"] = "Time limit exceeded"
+            record["passed"] = False
+        elif "error" in record:
+            record["actual"] = f"Error: {record.pop('error')}"
+            record["passed"] = False
+        elif actual is None:
+            record["actual"] = ""
+            record["passed"] = False
+        else:
+            actual_range = (record.pop("output_offset"), record.pop("output_length"))
+            record["actual"] = preview(actual, *trim_range(actual, *actual_range))
+            record["passed"] = self.comparator.compare(expected, expected_range, actual, actual_range, (start, input_length))
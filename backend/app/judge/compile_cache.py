@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+META_FILE = "meta.json"
+
+class CompileCache:
+    """
+    A content-addressed, size-bounded on-disk store of compiler output.
+
+    Each entry lives in its own directory named after the cache key and holds
+    the files the compiler produced plus a meta.json describing the result.
+    Compile errors are cached too, so resubmitting broken code is just as cheap.
+    Entries are evicted least-recently-used first once the store grows past
+    `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional[OrderedDict] = None
+        self._total = 0
+
+    @staticmethod
+    def make_key(sources: Dict[str, bytes], compiler_version: str, cmd: List[str]) -> str:
+        digest = hashlib.sha256()
+        digest.update(compiler_version.encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(cmd).encode())
+        for name in sorted(sources):
+            digest.update(b"\0")
+            digest.update(name.encode())
+            digest.update(b"\0")
+            digest.update(hashlib.sha256(sources[name]).digest())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.root):
+            for prefix in os.listdir(self.root):
+                prefix_dir = os.path.join(self.root, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for key in os.listdir(prefix_dir):
+                    meta_path = os.path.join(prefix_dir, key, META_FILE)
+                    try:
+                        with open(meta_path) as f:
+                            size = json.load(f).get("size", 0)
+                        entries.append((os.path.getmtime(meta_path), key, size))
+                    except (OSError, ValueError):
+                        continue
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total = sum(self._index.values())
+
+    def get(self, key: str, dest_dir: str) -> Optional[Dict]:
+        """Copy a cached entry's artifacts into dest_dir and return its metadata."""
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, META_FILE)) as f:
+                meta = json.load(f)
+            for name in meta.get("artifacts", []):
+                shutil.copy2(os.path.join(entry_dir, name), os.path.join(dest_dir, name))
+            os.utime(os.path.join(entry_dir, META_FILE))
+        except (OSError, ValueError):
+            # Missing, half-written or evicted underneath us, treat as a miss
+            return None
+
+        with self._lock:
+            self._load_index()
+            if key in self._index:
+                self._index.move_to_end(key)
+        return meta
+
+    def put(self, key: str, src_dir: str, artifacts: List[str], error: Optional[str] = None):
+        """Store the given artifacts (or a compile error) under key."""
+        entry_dir = self._entry_dir(key)
+        if os.path.exists(entry_dir):
+            return
+
+        staging_dir = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(staging_dir)
+            size = 0
+            for name in artifacts:
+                shutil.copy2(os.path.join(src_dir, name), os.path.join(staging_dir, name))
+                size += os.path.getsize(os.path.join(staging_dir, name))
+            meta = {
+                "artifacts": artifacts,
+                "error": error,
+                "size": size,
+                "created_at": time.time(),
+            }
+            with open(os.path.join(staging_dir, META_FILE), "w") as f:
+                json.dump(meta, f)
+
+            # Publish atomically so concurrent judges never see a partial entry
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            os.rename(staging_dir, entry_dir)
+        except OSError as e:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            print(f"Error storing compile cache entry {key}: {str(e)}")
+            return
+
+        with self._lock:
+            # Loading the index for the first time already picks up the entry just published
+            self._load_index()
+            if key not in self._index:
+                self._index[key] = size
+                self._total += size
+            self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._load_index()
+            return {
+                "entries": len(self._index),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+            }
+
+# Create a global instance
+compile_cache = CompileCache(settings.COMPILE_CACHE_DIR, settings.COMPILE_CACHE_MAX_MB * 1024 * 1024)
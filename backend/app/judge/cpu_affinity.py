@@ -0,0 +1,133 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+from app.core.config import settings
+from app.judge.metrics import metrics
+
+def parse_cpu_list(value: str) -> List[int]:
+    """Parse a Linux CPU list like "2-5,7" into [2, 3, 4, 5, 7]."""
+    cpus = set()
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if "-" in item:
+            first, last = item.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(item))
+    return sorted(cpus)
+
+def set_process_affinity(pid: int, cpus: Set[int]):
+    """
+    Set the CPU affinity of every thread of a process.
+
+    Affinity is per thread on Linux, sched_setaffinity(pid) alone would leave
+    a JVM's or Node's other threads where they were.
+    """
+    try:
+        tids = [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        tids = [pid]
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except (ProcessLookupError, PermissionError):
+            # The thread exited, or isn't ours to move
+            pass
+
+class CorePool:
+    """
+    Dedicated cores for judged processes.
+
+    With JUDGE_CPU_CORES set, the judge keeps itself (the event loop, its
+    threads, compilers) off those cores, and every judged process runs pinned
+    to one of them that nothing else is using. A run waits for a core when all
+    are busy, so timings don't depend on what else the machine is doing and
+    throughput grows with the cores reserved. Keep other services off the
+    cores too (isolcpus, a cpuset for Postgres) for the full effect.
+    """
+
+    def __init__(self, cores: List[int]):
+        self.cores = cores
+        self.free: Deque[int] = deque()
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.judge_cpus: Optional[Set[int]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cores)
+
+    def start(self):
+        """Check the configured cores and move this process off them, called once at startup."""
+        if not self.cores or self.judge_cpus is not None:
+            return
+        allowed = os.sched_getaffinity(0)
+        unusable = [core for core in self.cores if core not in allowed]
+        if unusable:
+            print(f"Judge cores {unusable} are not available to this process, not using them")
+        self.cores = [core for core in self.cores if core in allowed]
+        self.free = deque(self.cores)
+
+        self.judge_cpus = allowed - set(self.cores)
+        if self.judge_cpus:
+            set_process_affinity(os.getpid(), self.judge_cpus)
+        else:
+            # Every core is reserved, the judge has to share them
+            self.judge_cpus = allowed
+        print(f"Judged processes pinned to cores {self.cores}, judge on {sorted(self.judge_cpus)}")
+
+    @asynccontextmanager
+    async def core(self) -> AsyncIterator[Optional[int]]:
+        """Hold a free core for one judged process, None when pinning is disabled."""
+        if not self.enabled:
+            yield None
+            return
+        self.start()
+
+        start_time = time.monotonic()
+        if self.free and not self.waiters:
+            core = self.free.popleft()
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                core = await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Handed a core just as the run was cancelled
+                    self._release(waiter.result())
+                else:
+                    self.waiters.remove(waiter)
+                raise
+            metrics.incr("judge_core_waits")
+        metrics.observe("judge_core_wait_ms", (time.monotonic() - start_time) * 1000)
+        metrics.set_gauge("judge_cores_busy", len(self.cores) - len(self.free))
+        metrics.incr(f"judge_core_{core}_runs")
+
+        try:
+            yield core
+        finally:
+            self._release(core)
+
+    def _release(self, core: int):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(core)
+                return
+        self.free.append(core)
+        metrics.set_gauge("judge_cores_busy", len(self.cores) - len(self.free))
+
+    def stats(self) -> Dict:
+        return {
+            "cores": self.cores,
+            "busy": len(self.cores) - len(self.free),
+            "waiting": len(self.waiters),
+        }
+
+# Create a global instance
+core_pool = CorePool(parse_cpu_list(settings.JUDGE_CPU_CORES))
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.judge.metrics import metrics
+
+ARCHIVE_FILE = "judge.jsa"
+CLASS_LIST_FILE = "classes.lst"
+
+# Longest a training run or archive dump may take
+BUILD_TIMEOUT = 120
+
+# Archive paths keyed by build hash, "" once building one has failed
+_archives: Dict[str, str] = {}
+
+async def _run(cmd: List[str], cwd: str, env: Optional[Dict] = None):
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=env
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), BUILD_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise RuntimeError(f"{cmd[0]} timed out")
+    if process.returncode != 0:
+        raise RuntimeError(f"{cmd[0]} failed: {stderr.decode().strip()}")
+
+async def get_cds_archive(
+    java: str,
+    javac: str,
+    java_version: str,
+    flags: List[str],
+    training_files: Dict[str, bytes],
+    main_class: str
+) -> Optional[str]:
+    """
+    Build a class-data-sharing archive for Java runs and return its path.
+
+    A training run of `main_class` (compiled from `training_files`) records
+    which JDK classes the test runner loads, and those are dumped into an
+    archive that every run then maps instead of loading and verifying them
+    again. The runner and solution classes differ per submission and are left
+    out, so the archive is valid whatever a run's classpath is. The archive is
+    keyed by the JDK version and flags, so a JDK upgrade builds a new one.
+    Returns None if the archive can't be built.
+    """
+    digest = hashlib.sha256()
+    for part in (java_version, json.dumps(flags), json.dumps(sorted(training_files)), main_class):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    for name in sorted(training_files):
+        digest.update(training_files[name])
+    build_hash = digest.hexdigest()[:16]
+    if build_hash in _archives:
+        return _archives[build_hash] or None
+
+    path = os.path.join(settings.COMPILE_CACHE_DIR, f"java-cds-{build_hash}")
+    archive = os.path.join(path, ARCHIVE_FILE)
+    if not os.path.isdir(path):
+        staging_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        start_time = time.time()
+        try:
+            os.makedirs(staging_path)
+            for name, content in training_files.items():
+                with open(os.path.join(staging_path, name), "wb") as f:
+                    f.write(content)
+
+            sources = sorted(name for name in training_files if name.endswith(".java"))
+            await _run([javac] + sources, staging_path)
+            await _run(
+                [java] + flags + [f"-XX:DumpLoadedClassList={CLASS_LIST_FILE}", "-cp", ".", main_class],
+                staging_path,
+                env={"PATH": os.environ.get("PATH", ""), "HOME": staging_path}
+            )
+
+            # Keep the JDK's classes only, the training classes aren't on any run's classpath
+            app_classes = {name[:-len(".java")] for name in sources}
+            class_list = []
+            with open(os.path.join(staging_path, CLASS_LIST_FILE)) as f:
+                for line in f:
+                    fields = line.split()
+                    if not fields:
+                        continue
+                    # "@lambda-proxy <caller> ..." entries belong to the class that made the lambda
+                    owner = fields[1] if fields[0] == "@lambda-proxy" and len(fields) > 1 else fields[0]
+                    if owner.split("$")[0] not in app_classes:
+                        class_list.append(line)
+            with open(os.path.join(staging_path, CLASS_LIST_FILE), "w") as f:
+                f.writelines(class_list)
+
+            await _run(
+                [java] + flags + ["-Xshare:dump", f"-XX:SharedClassListFile={CLASS_LIST_FILE}", f"-XX:SharedArchiveFile={ARCHIVE_FILE}"],
+                staging_path
+            )
+            os.rename(staging_path, path)
+            metrics.observe("java_cds_build_ms", (time.time() - start_time) * 1000)
+        except Exception as e:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            if not os.path.isfile(archive):
+                print(f"Error building the Java CDS archive, Java runs start without it: {str(e)}")
+                _archives[build_hash] = ""
+                return None
+
+    _archives[build_hash] = archive
+    return archive
@@ -0,0 +1,154 @@
+import os
+import socket
+import uuid
+from typing import Dict, List, Optional
+
+# Channel used to wake up idle judge workers when a job is queued
+JOBS_CHANNEL = "judge_jobs"
+
+def new_worker_id() -> str:
+    """An id for a process judging submissions, unique across hosts and restarts."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+async def enqueue_job(conn, submission_id: str):
+    """Add a submission to the judge job table and wake up a worker."""
+    await conn.execute("""
+        INSERT INTO judge_jobs (submission_id)
+        VALUES ($1)
+        ON CONFLICT (submission_id) DO NOTHING
+    """, submission_id)
+    await conn.execute("SELECT pg_notify($1, $2)", JOBS_CHANNEL, str(submission_id))
+
+async def is_job_active(conn, submission_id: str) -> bool:
+    """
+    Whether a submission's job is waiting for a worker or being judged, by
+    any process. A running job whose lease ran out has lost its judge.
+    """
+    return await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1
+            FROM judge_jobs
+            WHERE submission_id = $1
+              AND (state = 'queued'
+                   OR (state = 'running' AND lease_expires_at >= CURRENT_TIMESTAMP))
+        )
+    """, submission_id)
+
+async def claim_job(conn, worker_id: str, lease_seconds: int, skip_languages: Optional[List[str]] = None) -> Optional[Dict]:
+    """
+    Claim a queued job, or a running job whose lease has expired.
+
+    Jobs of users with the fewest jobs running go first, oldest first among
+    those, so one user's burst of submissions doesn't hold up everyone else.
+    Jobs in `skip_languages` (lanes this worker has no room in) are left for
+    other workers. FOR UPDATE SKIP LOCKED lets many workers claim concurrently
+    without blocking on each other or claiming the same row twice.
+    """
+    job = await conn.fetchrow("""
+        UPDATE judge_jobs
+        SET state = 'running',
+            attempts = attempts + 1,
+            worker_id = $1,
+            lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $2),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE submission_id = (
+            SELECT j.submission_id
+            FROM judge_jobs j
+            JOIN submissions s ON s.id = j.submission_id
+            WHERE (j.state = 'queued'
+                   OR (j.state = 'running' AND j.lease_expires_at < CURRENT_TIMESTAMP))
+              AND NOT s.language = ANY($3::text[])
+            ORDER BY (
+                SELECT COUNT(*)
+                FROM judge_jobs r
+                JOIN submissions rs ON rs.id = r.submission_id
+                WHERE r.state = 'running'
+                  AND r.lease_expires_at >= CURRENT_TIMESTAMP
+                  AND rs.user_id = s.user_id
+            ), j.created_at
+            FOR UPDATE OF j SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING submission_id, attempts
+    """, worker_id, lease_seconds, skip_languages or [])
+    return dict(job) if job else None
+
+async def lease_job(conn, submission_id: str, worker_id: str, lease_seconds: int) -> bool:
+    """
+    Take the job of a submission judged in the API process, unless another
+    process holds a lease on it that has not expired. Returns whether the
+    lease was taken, or is already held by `worker_id`.
+    """
+    leased = await conn.fetchval("""
+        INSERT INTO judge_jobs (submission_id, state, attempts, worker_id, lease_expires_at)
+        VALUES ($1, 'running', 1, $2, CURRENT_TIMESTAMP + make_interval(secs => $3))
+        ON CONFLICT (submission_id) DO UPDATE
+        SET state = 'running',
+            attempts = CASE WHEN judge_jobs.worker_id = $2 THEN judge_jobs.attempts ELSE judge_jobs.attempts + 1 END,
+            worker_id = $2,
+            lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $3),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE judge_jobs.state != 'running'
+           OR judge_jobs.lease_expires_at < CURRENT_TIMESTAMP
+           OR judge_jobs.worker_id = $2
+        RETURNING submission_id
+    """, submission_id, worker_id, lease_seconds)
+    return leased is not None
+
+async def renew_leases(conn, submission_ids: List[str], worker_id: str, lease_seconds: int):
+    """Extend the leases a process holds on the jobs it has queued or is judging."""
+    await conn.execute("""
+        UPDATE judge_jobs
+        SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $3),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE submission_id = ANY($1::uuid[]) AND worker_id = $2 AND state = 'running'
+    """, submission_ids, worker_id, lease_seconds)
+
+async def expire_leases(conn, worker_id: str):
+    """Give up the leases of a stopping process, so its jobs can be recovered right away."""
+    await conn.execute("""
+        UPDATE judge_jobs
+        SET lease_expires_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+        WHERE worker_id = $1 AND state = 'running'
+    """, worker_id)
+
+async def heartbeat_job(conn, submission_id: str, worker_id: str, lease_seconds: int) -> bool:
+    """Extend the lease of a running job. Returns False if the lease was lost."""
+    result = await conn.execute("""
+        UPDATE judge_jobs
+        SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $3),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE submission_id = $1 AND worker_id = $2 AND state = 'running'
+    """, submission_id, worker_id, lease_seconds)
+    return result != "UPDATE 0"
+
+async def finish_job(conn, submission_id: str, worker_id: str, state: str = "done"):
+    await conn.execute("""
+        UPDATE judge_jobs
+        SET state = $3, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE submission_id = $1 AND worker_id = $2
+    """, submission_id, worker_id, state)
+
+async def release_job(conn, submission_id: str, worker_id: str):
+    """Put a job back in the queue so another worker can retry it."""
+    await conn.execute("""
+        UPDATE judge_jobs
+        SET state = 'queued', worker_id = NULL, lease_expires_at = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE submission_id = $1 AND worker_id = $2
+    """, submission_id, worker_id)
+
+async def get_job_stats(conn) -> Dict:
+    rows = await conn.fetch("""
+        SELECT state, COUNT(*) AS count,
+               EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(created_at)) AS oldest_seconds
+        FROM judge_jobs
+        WHERE state IN ('queued', 'running')
+        GROUP BY state
+    """)
+    stats = {"queued": 0, "running": 0, "oldest_queued_seconds": 0}
+    for row in rows:
+        stats[row["state"]] = row["count"]
+        if row["state"] == "queued":
+            stats["oldest_queued_seconds"] = float(row["oldest_seconds"] or 0)
+    return stats
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.judge.sandbox import run_sandboxed
+from app.judge.worker_pool import PooledWorker, WorkerPool
+
+DAEMON_SOURCE = os.path.join(os.path.dirname(__file__), "JudgeDaemon.java")
+
+# Directory holding the compiled daemon, "" once building it has failed
+_daemon_classpath: Optional[str] = None
+
+async def get_daemon_classpath() -> Optional[str]:
+    """Compile JudgeDaemon.java once and return its class directory, or None if it can't be built."""
+    global _daemon_classpath
+    if _daemon_classpath is not None:
+        return _daemon_classpath or None
+
+    with open(DAEMON_SOURCE, "rb") as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    path = os.path.join(settings.COMPILE_CACHE_DIR, f"jvm-daemon-{source_hash}")
+
+    if not os.path.isdir(path):
+        staging_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(staging_path)
+            process = await asyncio.create_subprocess_exec(
+                "javac", "-d", staging_path, DAEMON_SOURCE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode().strip())
+            os.rename(staging_path, path)
+        except Exception as e:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            print(f"Error building the judge JVM daemon, falling back to one JVM per run: {str(e)}")
+            _daemon_classpath = ""
+            return None
+
+    _daemon_classpath = path
+    return path
+
+class JvmWorker(PooledWorker):
+    """
+    A warm JVM running JudgeDaemon.
+
+    Each job's classes are loaded in their own class loader, so submissions
+    never see each other's classes. The heap limit is the JVM's own -Xmx and
+    memory is reported as the job's peak heap usage.
+    """
+
+    name = "jvm_daemon"
+    max_jobs = settings.JVM_POOL_MAX_JOBS
+
+    async def worker_args(self) -> List[str]:
+        return list(self.command) + ["-cp", await get_daemon_classpath(), "JudgeDaemon"]
+
+    async def exchange(self, job: Dict) -> Optional[Dict]:
+        settings_args = [f"{name}={value}" for name, value in job["env"].items()]
+        # The JVM is already warm, and runners find their files through JUDGE_WORKDIR
+        settings_args += [f"JUDGE_WORKDIR={job['cwd']}", "JUDGE_STARTUP_CPU_MS=0"]
+        line = "\t".join([job["cwd"], job["target"], str(job["output_limit"])] + settings_args)
+        self.process.stdin.write(line.encode() + b"\n")
+        await self.process.stdin.drain()
+
+        header = await self.process.stdout.readline()
+        if not header:
+            return None
+        exit_code, output_exceeded, cpu_time_ms, peak_heap_kb, recycle, stdout_size, stderr_size = header.split()
+        try:
+            stdout = await self.process.stdout.readexactly(int(stdout_size))
+            stderr = await self.process.stdout.readexactly(int(stderr_size))
+        except asyncio.IncompleteReadError:
+            return None
+
+        return {
+            "returncode": int(exit_code),
+            "stdout": stdout,
+            "stderr": stderr,
+            "timed_out": False,
+            "output_exceeded": None if output_exceeded == b"-" else output_exceeded.decode(),
+            "cpu_time_ms": int(cpu_time_ms),
+            "memory_kb": int(peak_heap_kb),
+            "recycle": recycle == b"1",
+        }
+
+class JvmPool(WorkerPool):
+    """A pool of warm JVMs that judge Java without JVM startup and JIT warm-up per run."""
+
+    def __init__(self, size: int):
+        super().__init__(JvmWorker, size)
+
+    async def run(
+        self,
+        cmd: List[str],
+        cwd: str,
+        timeout: float,
+        limits: Optional[Dict] = None,
+        env: Optional[Dict] = None
+    ) -> Dict:
+        if not await get_daemon_classpath():
+            return await run_sandboxed(cmd, cwd, timeout, limits=limits, env=env)
+        return await super().run(cmd, cwd, timeout, limits=limits, env=env)
@@ -0,0 +1,57 @@
+/*
+ * Runs a judged command and reports its kernel resource usage.
+ *
+ * Usage: launcher <report_fd> <command> [args...]
+ *
+ * A child's ru_maxrss includes whatever its image held before exec, so a
+ * process forked straight from the judge inherits the judge's RSS. Forking
+ * the command from this tiny program instead keeps the measurement honest.
+ * The wait4 status and rusage are written to report_fd as one line:
+ * "<status> <user_us> <sys_us> <maxrss_kb>".
+ */
+#include <errno.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+int main(int argc, char** argv) {
+    if (argc < 3) {
+        fprintf(stderr, "usage: %s <report_fd> <command> [args...]\n", argv[0]);
+        return 127;
+    }
+
+    int report_fd = atoi(argv[1]);
+    pid_t pid = fork();
+    if (pid < 0) {
+        perror("fork");
+        return 127;
+    }
+    if (pid == 0) {
+        close(report_fd);
+        execvp(argv[2], argv + 2);
+        perror(argv[2]);
+        _exit(127);
+    }
+
+    int status;
+    struct rusage usage;
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR) {
+            perror("wait4");
+            return 127;
+        }
+    }
+
+    dprintf(report_fd, "%d %ld %ld %ld\n", status,
+            (long)usage.ru_utime.tv_sec * 1000000L + usage.ru_utime.tv_usec,
+            (long)usage.ru_stime.tv_sec * 1000000L + usage.ru_stime.tv_usec,
+            usage.ru_maxrss);
+    close(report_fd);
+
+    if (WIFSIGNALED(status)) {
+        return 128 + WTERMSIG(status);
+    }
+    return WEXITSTATUS(status);
+}
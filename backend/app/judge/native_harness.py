@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Dict, List
+from app.core.config import settings
+from app.judge.metrics import metrics
+
+HARNESS_SOURCE_FILE = "harness.cpp"
+HARNESS_OBJECT_FILE = "harness.o"
+PRELUDE_FILE = "judge_prelude.h"
+
+# Built harnesses, keyed by build hash
+_harnesses: Dict[str, Dict] = {}
+
+async def _run_compiler(cmd: List[str], cwd: str):
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"Error building the judge harness: {stderr.decode().strip()}")
+
+async def get_native_harness(
+    compiler: str,
+    compiler_version: str,
+    flags: List[str],
+    harness_source: str,
+    prelude_source: str
+) -> Dict:
+    """
+    Build the C/C++ test harness object and precompiled prelude header.
+
+    They are built once per compiler version, flags and source, into the
+    compile cache directory, and every submission is then compiled with
+    `-include <prelude>` and linked against the object instead of recompiling
+    the harness. Returns the paths of the object and the prelude header (GCC
+    picks up the .gch next to it).
+    """
+    digest = hashlib.sha256()
+    for part in (compiler, compiler_version, json.dumps(flags), harness_source, prelude_source):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    build_hash = digest.hexdigest()[:16]
+    if build_hash in _harnesses:
+        return _harnesses[build_hash]
+
+    path = os.path.join(settings.COMPILE_CACHE_DIR, f"native-harness-{build_hash}")
+    if not os.path.isdir(path):
+        staging_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        start_time = time.time()
+        try:
+            os.makedirs(staging_path)
+            with open(os.path.join(staging_path, HARNESS_SOURCE_FILE), "w") as f:
+                f.write(harness_source)
+            with open(os.path.join(staging_path, PRELUDE_FILE), "w") as f:
+                f.write(prelude_source)
+
+            await asyncio.gather(
+                _run_compiler([compiler] + flags + ["-x", "c++-header", PRELUDE_FILE, "-o", f"{PRELUDE_FILE}.gch"], staging_path),
+                _run_compiler([compiler] + flags + ["-c", HARNESS_SOURCE_FILE, "-o", HARNESS_OBJECT_FILE], staging_path)
+            )
+            os.rename(staging_path, path)
+            metrics.observe("native_harness_build_ms", (time.time() - start_time) * 1000)
+        except OSError:
+            # Another judge published the same build first
+            shutil.rmtree(staging_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+        except BaseException:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+
+    _harnesses[build_hash] = {
+        "object": os.path.join(path, HARNESS_OBJECT_FILE),
+        "prelude": os.path.join(path, PRELUDE_FILE),
+    }
+    return _harnesses[build_hash]
@@ -0,0 +1,155 @@
+import asyncio
+import contextlib
+import json
+import os
+from typing import Dict, List, Optional
+from app.judge.sandbox import READ_CHUNK_SIZE, _kill_group, _read_pipe, get_launcher, parse_usage_report
+from app.judge.worker_pool import PooledWorker, WorkerPool
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "node_pool_worker.js")
+
+# The rlimits of a job, a worker is started under them
+RLIMITS = ("cpu_seconds", "address_space", "max_processes", "max_file_size")
+
+class NodeWorker(PooledWorker):
+    """
+    A node process booted ahead of the job it runs.
+
+    The worker waits for its job, then runs the job's test runner as its main
+    module, as `node <runner>` would. Nothing inside a node process separates
+    a job from it, so isolation comes only from the process and its rlimits:
+    a worker runs a single job, it is started under that job's rlimits, and
+    the job's CPU time and peak memory come from the kernel through the
+    launcher, never from the process itself. The pool boots the replacement
+    while the worker is still judging, so runs don't wait for node to start.
+    """
+
+    name = "node_pool_worker"
+    # A job can change anything in the process it ran in, workers are never reused
+    max_jobs = 1
+
+    def __init__(self, command, limits: Optional[Dict] = None):
+        super().__init__(command, limits)
+        self.launcher: Optional[str] = None
+        self.report_read: Optional[int] = None
+        self.node_pid: Optional[int] = None
+
+    @classmethod
+    def spawn_limits(cls, limits: Optional[Dict]) -> Optional[Dict]:
+        return {name: limits[name] for name in RLIMITS if limits and limits.get(name)} or None
+
+    @property
+    def judged_pid(self) -> int:
+        return self.node_pid or self.process.pid
+
+    async def worker_args(self) -> List[str]:
+        args = list(self.command) + [WORKER_SCRIPT]
+        if self.launcher:
+            return [self.launcher, str(self.pass_fds[0])] + args
+        return args
+
+    async def start(self):
+        # The launcher reports the kernel's accounting of node once it exits
+        self.launcher = await get_launcher()
+        if self.launcher:
+            self.report_read, report_write = os.pipe()
+            self.pass_fds = (report_write,)
+        try:
+            await super().start()
+        finally:
+            for fd in self.pass_fds:
+                os.close(fd)
+            self.pass_fds = ()
+        if self.launcher:
+            pid = self.process.pid
+            try:
+                with open(f"/proc/{pid}/task/{pid}/children") as f:
+                    self.node_pid = int(f.read().split()[0])
+            except (OSError, IndexError, ValueError):
+                pass
+
+    async def exchange(self, job: Dict) -> Optional[Dict]:
+        self.process.stdin.write(json.dumps(job).encode() + b"\n")
+        await self.process.stdin.drain()
+        self.process.stdin.close()
+
+        # From here on stderr is the job's, read in full rather than its tail
+        self._stderr_task.cancel()
+        await asyncio.gather(self._stderr_task, return_exceptions=True)
+        self._stderr_task = None
+
+        output_limit = job["output_limit"] or None
+        overflowed = []
+
+        async def capture(stream: asyncio.StreamReader, name: str) -> bytes:
+            data = bytearray()
+            while True:
+                chunk = await stream.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return bytes(data)
+                data.extend(chunk)
+                if output_limit and len(data) > output_limit:
+                    del data[output_limit:]
+                    overflowed.append(name)
+                    _kill_group(self.process.pid)
+                    return bytes(data)
+
+        pipes = [capture(self.process.stdout, "stdout"), capture(self.process.stderr, "stderr")]
+        if self.report_read is not None:
+            pipes.append(_read_pipe(os.fdopen(self.report_read, "rb")))
+            self.report_read = None
+        readers = asyncio.gather(*pipes)
+
+        timed_out = False
+        try:
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=job["timeout_ms"] / 1000)
+            except asyncio.TimeoutError:
+                timed_out = True
+            # Whatever the job left running would keep the pipes open
+            _kill_group(self.process.pid)
+            stdout, stderr, *report = await readers
+        except asyncio.CancelledError:
+            readers.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await readers
+            raise
+        await self.process.wait()
+
+        if report and report[0].strip():
+            status, cpu_time_ms, memory_kb = parse_usage_report(report[0])
+            returncode = os.waitstatus_to_exitcode(status)
+        else:
+            # Without the launcher there is no usage to report, the rlimits still apply
+            returncode, cpu_time_ms, memory_kb = self.process.returncode, 0, 0
+        return {
+            "returncode": returncode,
+            "signal": -returncode if returncode < 0 else None,
+            "stdout": stdout,
+            "stderr": stderr,
+            "timed_out": timed_out,
+            "output_exceeded": overflowed[0] if overflowed else None,
+            "cpu_time_ms": cpu_time_ms,
+            "memory_kb": memory_kb,
+            "recycle": True,
+        }
+
+    async def stop(self):
+        await super().stop()
+        self._close_report()
+
+    async def kill(self):
+        await super().kill()
+        self._close_report()
+
+    def _close_report(self):
+        # Left open when the worker goes without running a job
+        if self.report_read is not None:
+            os.close(self.report_read)
+            self.report_read = None
+
+class NodePool(WorkerPool):
+    """A pool of node workers booted ahead of the runs that need them, so JavaScript judging doesn't wait for V8 to start."""
+
+    def __init__(self, size: int):
+        super().__init__(NodeWorker, size)
@@ -0,0 +1,48 @@
+/*
+ * Node.js process booted ahead of a judge job.
+ *
+ * Started by app.judge.node_pool before the job it runs arrives, so the job
+ * doesn't wait for node to boot. It reads one JSON job line from stdin,
+ *
+ *   job    {"target", "cwd", "env", "timeout_ms", "output_limit"}
+ *
+ * and runs the job's test runner as its main module, in the job's working
+ * directory and environment, as `node <target>` would. From then on its
+ * stdout, stderr and exit status are the job's.
+ *
+ * Nothing in here separates the job from this process: the process runs a
+ * single job, and its limits are the rlimits it was started under.
+ */
+'use strict';
+
+let pending = '';
+
+function onData(chunk) {
+    pending += chunk;
+    const newline = pending.indexOf('\n');
+    if (newline < 0) {
+        return;
+    }
+    process.stdin.removeListener('data', onData);
+    process.stdin.removeListener('end', onEnd);
+    process.stdin.destroy();
+    runJob(JSON.parse(pending.slice(0, newline)));
+}
+
+// Retired without a job
+function onEnd() {
+    process.exit(0);
+}
+
+function runJob(job) {
+    process.chdir(job.cwd);
+    Object.assign(process.env, job.env);
+    process.argv = [process.argv[0], job.target];
+    require(job.target);
+}
+
+process.stdin.setEncoding('utf8');
+process.stdin.on('data', onData);
+process.stdin.on('end', onEnd);
+
+process.stdout.write('ready\n');
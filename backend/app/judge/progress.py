@@ -0,0 +1,88 @@
+import asyncio
+import json
+from typing import Dict
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.metrics import metrics
+from app.websockets.connection_manager import manager
+
+# Channel judge workers publish progress on when they run outside the API process
+PROGRESS_CHANNEL = "judge_progress"
+
+# NOTIFY payloads are limited to 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7900
+
+def progress_message(user_id: str, submission_id: str, event: Dict) -> Dict:
+    return {
+        "type": "judge_progress",
+        "user_id": str(user_id),
+        "submission_id": str(submission_id),
+        **event,
+    }
+
+async def publish_progress(user_id: str, submission_id: str, event: Dict):
+    """
+    Send a judge event to the submitting user's WebSocket connections.
+
+    In-process judging sends it directly. Out-of-process workers (the postgres
+    judge backend) don't hold any WebSockets, so they NOTIFY the API processes,
+    which relay it. Progress is best effort and never fails the judgement.
+    """
+    message = progress_message(user_id, submission_id, event)
+    try:
+        if settings.JUDGE_BACKEND == "postgres":
+            payload = json.dumps(message)
+            if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+                # Batches of test results are split up, anything else this big is dropped
+                results = event.get("results")
+                if isinstance(results, list) and len(results) > 1:
+                    half = len(results) // 2
+                    await publish_progress(user_id, submission_id, {**event, "results": results[:half]})
+                    await publish_progress(user_id, submission_id, {**event, "results": results[half:]})
+                else:
+                    metrics.incr("judge_progress_dropped")
+                return
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                await conn.execute("SELECT pg_notify($1, $2)", PROGRESS_CHANNEL, payload)
+        else:
+            await manager.broadcast_to_user(message["user_id"], message)
+        metrics.incr("judge_progress_events")
+    except Exception as e:
+        print(f"Error publishing judge progress for submission {submission_id}: {str(e)}")
+
+class ProgressRelay:
+    """Forwards progress NOTIFYs from judge workers to this process's WebSockets."""
+
+    def __init__(self):
+        self.conn = None
+
+    async def start(self):
+        if self.conn is not None:
+            return
+        pool = await get_db()
+        self.conn = await pool.acquire()
+        await self.conn.add_listener(PROGRESS_CHANNEL, self._on_notify)
+        print("Judge progress relay started")
+
+    async def stop(self):
+        if self.conn is None:
+            return
+        pool = await get_db()
+        try:
+            await self.conn.remove_listener(PROGRESS_CHANNEL, self._on_notify)
+        finally:
+            await pool.release(self.conn)
+            self.conn = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        # Only this process knows whether the user is connected to it
+        if message.get("user_id") in manager.user_connections:
+            asyncio.create_task(manager.broadcast_to_user(message["user_id"], message))
+
+# Create a global instance
+progress_relay = ProgressRelay()
@@ -0,0 +1,206 @@
+import asyncio
+import time
+from typing import Dict, Optional, Set
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.jobs import expire_leases, finish_job, lease_job, new_worker_id, renew_leases
+from app.judge.metrics import metrics
+from app.services.submission_service import fail_submission, judge_submission
+
+class JudgeQueueFull(Exception):
+    """Raised when a job cannot be queued because the queue is full."""
+
+class JudgeJob:
+    def __init__(self, submission_id: str, user_id: str):
+        self.submission_id = submission_id
+        self.user_id = user_id
+        self.enqueued_at = time.monotonic()
+
+class JudgeQueue:
+    """
+    A bounded in-process queue of submissions waiting to be judged.
+
+    Every queued job gets a task right away, and the judge scheduler decides
+    which of them executes next, so the queue holds jobs but doesn't order
+    them. A job waiting for its turn holds only its submission row; test data
+    is loaded once the scheduler lets it run. At most `max_size` jobs are
+    queued or running at once.
+
+    Every job holds a lease on its submission's row in judge_jobs, renewed
+    while the job is queued or running. Other API processes sharing the
+    database see which submissions are being judged, and only pick up those
+    whose judge stopped.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.worker_id = new_worker_id()
+        self.tasks: Set[asyncio.Task] = set()
+        # Submissions queued or being judged, by id
+        self.submissions: Set[str] = set()
+        self.space: Optional[asyncio.Semaphore] = None
+        self.lease_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.space is not None:
+            return
+        self.space = asyncio.Semaphore(self.max_size)
+        self.lease_task = asyncio.create_task(self._keep_leases())
+        print(f"Judge queue {self.worker_id} started, up to {self.max_size} jobs")
+
+    async def stop(self):
+        if self.lease_task is not None:
+            self.lease_task.cancel()
+            await asyncio.gather(self.lease_task, return_exceptions=True)
+            self.lease_task = None
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = set()
+        if self.space is not None:
+            try:
+                pool = await get_db()
+                async with pool.acquire() as conn:
+                    await expire_leases(conn, self.worker_id)
+            except Exception as e:
+                print(f"Judge queue could not give up its leases: {str(e)}")
+        self.space = None
+        print("Judge queue stopped")
+
+    async def recover(self, fail_when_full: bool = True):
+        """
+        Queue the PENDING submissions no judge holds a lease on, whose jobs
+        were lost when the process judging them stopped. Those that don't fit
+        fail, or wait for a later recovery with `fail_when_full=False`.
+        """
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            submissions = await conn.fetch("""
+                SELECT s.id, s.user_id
+                FROM submissions s
+                WHERE s.status = 'PENDING'
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM judge_jobs j
+                      WHERE j.submission_id = s.id
+                        AND (j.state = 'queued'
+                             OR (j.state = 'running' AND j.lease_expires_at >= CURRENT_TIMESTAMP))
+                  )
+                ORDER BY s.created_at
+            """)
+        recovered = 0
+        for submission in submissions:
+            submission_id = str(submission["id"])
+            if self.has(submission_id):
+                continue
+            try:
+                if await self.enqueue(submission_id, str(submission["user_id"])):
+                    recovered += 1
+            except JudgeQueueFull:
+                if not fail_when_full:
+                    break
+                await fail_submission(submission_id, "The judge queue was full when it restarted")
+        if recovered:
+            metrics.incr("judge_queue_recovered", recovered)
+            print(f"Judge queue recovered {recovered} pending submissions")
+
+    def has(self, submission_id: str) -> bool:
+        """Whether a submission is queued or being judged."""
+        return str(submission_id) in self.submissions
+
+    async def enqueue(self, submission_id: str, user_id: str, timeout: float = 0) -> bool:
+        """
+        Queue a submission, waiting up to `timeout` seconds for a free slot.
+        Returns False when another process already holds the submission's job.
+        """
+        if self.space is None:
+            await self.start()
+
+        submission_id = str(submission_id)
+        self.submissions.add(submission_id)
+        try:
+            if self.space.locked() and timeout <= 0:
+                raise asyncio.TimeoutError()
+            await asyncio.wait_for(self.space.acquire(), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            self.submissions.discard(submission_id)
+            metrics.incr("judge_queue_rejected")
+            raise JudgeQueueFull(f"Judge queue is full ({self.max_size} jobs)")
+        except BaseException:
+            self.submissions.discard(submission_id)
+            raise
+
+        # Another API process may have recovered the submission first
+        leased = False
+        try:
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                leased = await lease_job(conn, submission_id, self.worker_id, settings.JUDGE_LEASE_SECONDS)
+        finally:
+            if not leased:
+                self.submissions.discard(submission_id)
+                self.space.release()
+        if not leased:
+            return False
+
+        job = JudgeJob(submission_id, user_id)
+        task = asyncio.create_task(self._run(job))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        metrics.incr("judge_queue_enqueued")
+        metrics.set_gauge("judge_queue_depth", len(self.tasks))
+        return True
+
+    async def _run(self, job: JudgeJob):
+        start_time = time.monotonic()
+        try:
+            await judge_submission(job.submission_id)
+            metrics.incr("judge_jobs_completed")
+            await self._finish(job, "done")
+        except Exception as e:
+            metrics.incr("judge_jobs_failed")
+            print(f"Judge queue failed on submission {job.submission_id}: {str(e)}")
+            # Left PENDING it would never be judged, and identical submissions would wait on it
+            try:
+                await fail_submission(job.submission_id, str(e))
+            except Exception as e:
+                print(f"Could not fail submission {job.submission_id}: {str(e)}")
+            await self._finish(job, "failed")
+        finally:
+            metrics.observe("judge_job_duration_ms", (time.monotonic() - start_time) * 1000)
+            self.submissions.discard(job.submission_id)
+            self.space.release()
+            metrics.set_gauge("judge_queue_depth", len(self.tasks) - 1)
+
+    async def _finish(self, job: JudgeJob, state: str):
+        try:
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                await finish_job(conn, job.submission_id, self.worker_id, state)
+        except Exception as e:
+            # The lease runs out on its own
+            print(f"Could not finish the job of submission {job.submission_id}: {str(e)}")
+
+    async def _keep_leases(self):
+        """Renew the leases of this process's jobs, and pick up jobs whose judge stopped."""
+        while True:
+            await asyncio.sleep(settings.JUDGE_HEARTBEAT_SECONDS)
+            try:
+                if self.submissions:
+                    pool = await get_db()
+                    async with pool.acquire() as conn:
+                        await renew_leases(
+                            conn, list(self.submissions), self.worker_id, settings.JUDGE_LEASE_SECONDS
+                        )
+                await self.recover(fail_when_full=False)
+            except Exception as e:
+                print(f"Judge queue could not renew its leases: {str(e)}")
+
+    def stats(self) -> Dict:
+        return {
+            "depth": len(self.tasks),
+            "max_size": self.max_size,
+        }
+
+# Create a global instance
+judge_queue = JudgeQueue(settings.JUDGE_QUEUE_MAX_SIZE)
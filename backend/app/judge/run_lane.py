@@ -0,0 +1,53 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+from app.core.config import settings
+from app.judge.metrics import metrics
+
+class RunLaneBusy(Exception):
+    """Raised when no run slot frees up in time."""
+
+class RunLane:
+    """
+    The concurrency budget for exploratory runs (sample tests, custom input).
+
+    Runs don't go through the judge queue, they execute right away in the
+    request, but at most `concurrency` at a time, so trying code out never
+    takes judge capacity away from real submissions.
+    """
+
+    def __init__(self, concurrency: int, wait_timeout: float):
+        self.concurrency = concurrency
+        self.wait_timeout = wait_timeout
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.running = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a run slot, waiting up to `wait_timeout` seconds for one."""
+        start_time = time.monotonic()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            metrics.incr("run_lane_rejected")
+            raise RunLaneBusy(f"All {self.concurrency} run slots are busy")
+        metrics.observe("run_lane_wait_ms", (time.monotonic() - start_time) * 1000)
+
+        self.running += 1
+        metrics.set_gauge("run_lane_running", self.running)
+        try:
+            yield
+        finally:
+            self.running -= 1
+            metrics.set_gauge("run_lane_running", self.running)
+            self.semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+        }
+
+# Create a global instance
+run_lane = RunLane(settings.RUN_CONCURRENCY, settings.RUN_WAIT_TIMEOUT)
@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import hashlib
+import math
+import os
+import resource
+import signal
+import subprocess
+import time
+import uuid
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+# Environment variables judged processes may inherit, everything else
+# (database URLs, secrets) stays in the judge.
+INHERITED_ENV = ["PATH", "LANG", "LC_ALL", "JAVA_HOME"]
+
+LAUNCHER_SOURCE = os.path.join(os.path.dirname(__file__), "launcher.c")
+
+# Path of the built launcher, "" once building it has failed
+_launcher_path: Optional[str] = None
+
+async def get_launcher() -> Optional[str]:
+    """Build launcher.c once and return the binary's path, or None if it can't be built."""
+    global _launcher_path
+    if _launcher_path is not None:
+        return _launcher_path or None
+
+    with open(LAUNCHER_SOURCE, "rb") as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    path = os.path.join(settings.COMPILE_CACHE_DIR, f"launcher-{source_hash}")
+
+    if not os.path.exists(path):
+        os.makedirs(settings.COMPILE_CACHE_DIR, exist_ok=True)
+        staging_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "gcc", "-O2", "-o", staging_path, LAUNCHER_SOURCE,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode().strip())
+            os.rename(staging_path, path)
+        except Exception as e:
+            print(f"Error building judge launcher, memory usage will include the judge's own RSS: {str(e)}")
+            _launcher_path = ""
+            return None
+
+    _launcher_path = path
+    return path
+
+def build_limits(time_limit: float, memory_limit_mb: int, limit_address_space: bool = True) -> Dict:
+    """Build the resource limits for one judged process."""
+    return {
+        "cpu_seconds": math.ceil(time_limit) + 1,
+        "address_space": memory_limit_mb * 1024 * 1024 if limit_address_space else None,
+        "memory_kb": memory_limit_mb * 1024,
+        "max_processes": settings.JUDGE_MAX_PROCESSES,
+        "max_file_size": settings.JUDGE_MAX_FILE_SIZE_MB * 1024 * 1024,
+        "output_bytes": settings.JUDGE_OUTPUT_LIMIT_KB * 1024,
+    }
+
+def _apply_limits(limits: Dict):
+    """Runs in the child between fork and exec."""
+    if limits.get("cpu_seconds"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["cpu_seconds"], limits["cpu_seconds"] + 1))
+    if limits.get("address_space"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["address_space"], limits["address_space"]))
+    if limits.get("max_processes"):
+        resource.setrlimit(resource.RLIMIT_NPROC, (limits["max_processes"], limits["max_processes"]))
+    if limits.get("max_file_size"):
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits["max_file_size"], limits["max_file_size"]))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if limits.get("cpu_core") is not None:
+        os.sched_setaffinity(0, {limits["cpu_core"]})
+
+# How much of a stream is read per chunk
+READ_CHUNK_SIZE = 64 * 1024
+
+async def _read_pipe(pipe, limit: Optional[int] = None, on_overflow=None) -> bytes:
+    """
+    Read a pipe to EOF, keeping at most `limit` bytes.
+
+    Once the limit is passed `on_overflow` is called and reading stops, so a
+    program printing in a loop costs the judge `limit` bytes and no more.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=READ_CHUNK_SIZE)
+    transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    data = bytearray()
+    try:
+        while True:
+            chunk = await reader.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            data.extend(chunk)
+            if limit is not None and len(data) > limit:
+                del data[limit:]
+                if on_overflow:
+                    on_overflow()
+                break
+        return bytes(data)
+    finally:
+        transport.close()
+
+async def _wait4(pid: int):
+    """Wait for a child without blocking the event loop and return (status, rusage)."""
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        # No pidfd support, fall back to a blocking wait on a worker thread
+        _, status, rusage = await asyncio.to_thread(os.wait4, pid, 0)
+        return status, rusage
+
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+    _, status, rusage = os.wait4(pid, 0)
+    return status, rusage
+
+def _kill_group(pid: int):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def child_environment(cwd: str, env: Optional[Dict] = None) -> Dict:
+    """The environment of a judged process: INHERITED_ENV, HOME and `env`."""
+    child_env = {name: os.environ[name] for name in INHERITED_ENV if name in os.environ}
+    child_env["HOME"] = cwd
+    child_env.update(env or {})
+    return child_env
+
+def parse_usage_report(report: bytes):
+    """Parse a "<status> <user_us> <sys_us> <maxrss_kb>" line into (status, cpu_time_ms, max_rss_kb)."""
+    status, user_us, sys_us, max_rss_kb = (int(v) for v in report.split())
+    return status, (user_us + sys_us) // 1000, max_rss_kb
+
+async def supervise(pid: int, pipes: List, waiter: asyncio.Future, timeout: float, limits: Optional[Dict] = None) -> Dict:
+    """
+    Capture a started judged process's output and enforce its timeout.
+
+    `pipes` are the process's stdout and stderr, capped at the output limit,
+    followed by any other pipes to read to EOF. `waiter` resolves once the
+    process has been reaped and keeps running if we're cancelled, so the
+    killed process is still reaped.
+    """
+    output_limit = (limits or {}).get("output_bytes")
+    overflowed = []
+
+    def on_overflow(stream: str):
+        overflowed.append(stream)
+        _kill_group(pid)
+
+    readers = asyncio.gather(
+        _read_pipe(pipes[0], output_limit, lambda: on_overflow("stdout")),
+        _read_pipe(pipes[1], output_limit, lambda: on_overflow("stderr")),
+        *[_read_pipe(pipe) for pipe in pipes[2:]]
+    )
+    timed_out = False
+    try:
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill_group(pid)
+        await asyncio.shield(waiter)
+        # Grandchildren may still hold the pipes open
+        _kill_group(pid)
+        outputs = await readers
+    except asyncio.CancelledError:
+        _kill_group(pid)
+        readers.cancel()
+        # Retrieved here, or the cancelled readers are logged as never retrieved
+        with contextlib.suppress(asyncio.CancelledError):
+            await readers
+        raise
+
+    return {
+        "timed_out": timed_out,
+        "output_exceeded": overflowed[0] if overflowed else None,
+        "stdout": outputs[0],
+        "stderr": outputs[1],
+        "other": outputs[2:],
+    }
+
+def build_result(outcome: Dict, status: int, wall_time_ms: int, cpu_time_ms: int, max_rss_kb: int) -> Dict:
+    """The result of a judged run, as returned by run_sandboxed."""
+    return {
+        "returncode": os.waitstatus_to_exitcode(status),
+        "signal": os.WTERMSIG(status) if os.WIFSIGNALED(status) else None,
+        "timed_out": outcome["timed_out"],
+        "output_exceeded": outcome["output_exceeded"],
+        "stdout": outcome["stdout"],
+        "stderr": outcome["stderr"],
+        "wall_time_ms": wall_time_ms,
+        "cpu_time_ms": cpu_time_ms,
+        "max_rss_kb": max_rss_kb,
+    }
+
+async def run_sandboxed(
+    cmd: List[str],
+    cwd: str,
+    timeout: float,
+    limits: Optional[Dict] = None,
+    env: Optional[Dict] = None
+) -> Dict:
+    """
+    Run a judged process under resource limits and collect kernel accounting.
+
+    The child gets its own session so the whole process group can be killed,
+    and is reaped with wait4 so peak RSS and CPU time come from the kernel
+    rather than from what the program reports about itself.
+    """
+    child_env = child_environment(cwd, env)
+
+    # The launcher forks the command and reports its rusage over a pipe
+    launcher = await get_launcher()
+    report_read, report_write = os.pipe() if launcher else (None, None)
+    if launcher:
+        cmd = [launcher, str(report_write)] + cmd
+
+    start_time = time.monotonic()
+    try:
+        process = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            env=child_env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=(lambda: _apply_limits(limits)) if limits else None,
+            start_new_session=True,
+            pass_fds=(report_write,) if launcher else ()
+        )
+    except Exception:
+        if launcher:
+            os.close(report_read)
+        raise
+    finally:
+        if launcher:
+            os.close(report_write)
+
+    pipes = [process.stdout, process.stderr]
+    if launcher:
+        pipes.append(os.fdopen(report_read, "rb"))
+    waiter = asyncio.ensure_future(_wait4(process.pid))
+    try:
+        outcome = await supervise(process.pid, pipes, waiter, timeout, limits)
+    finally:
+        if waiter.done() and not waiter.cancelled():
+            process.returncode = os.waitstatus_to_exitcode(waiter.result()[0])
+
+    wall_time_ms = int((time.monotonic() - start_time) * 1000)
+    status, rusage = waiter.result()
+    cpu_time_ms = int((rusage.ru_utime + rusage.ru_stime) * 1000)
+    max_rss_kb = rusage.ru_maxrss
+
+    report = outcome["other"]
+    if report and report[0].strip():
+        # The command's own status and usage, as seen by the launcher
+        status, cpu_time_ms, max_rss_kb = parse_usage_report(report[0])
+
+    return build_result(outcome, status, wall_time_ms, cpu_time_ms, max_rss_kb)
+
+# Messages runtimes print when an allocation fails under RLIMIT_AS or a heap limit
+OUT_OF_MEMORY_MARKERS = [
+    b"MemoryError",
+    b"std::bad_alloc",
+    b"JavaScript heap out of memory",
+    b"java.lang.OutOfMemoryError",
+]
+
+def classify_limits(result: Dict, limits: Optional[Dict]) -> Optional[str]:
+    """Return TIME_LIMIT_EXCEEDED, MEMORY_LIMIT_EXCEEDED or OUTPUT_LIMIT_EXCEEDED if a limit was hit."""
+    # Checked first, the kill on overflow (or SIGXFSZ past the file size limit) would otherwise look like a crash
+    if result.get("output_exceeded") or result.get("signal") == signal.SIGXFSZ:
+        return "OUTPUT_LIMIT_EXCEEDED"
+    if result["timed_out"] or result["signal"] == signal.SIGXCPU:
+        return "TIME_LIMIT_EXCEEDED"
+    if limits and limits.get("cpu_seconds") and result["cpu_time_ms"] >= limits["cpu_seconds"] * 1000:
+        return "TIME_LIMIT_EXCEEDED"
+
+    if limits and limits.get("memory_kb"):
+        if result["max_rss_kb"] > limits["memory_kb"]:
+            return "MEMORY_LIMIT_EXCEEDED"
+        if result["returncode"] != 0 and any(marker in result["stderr"] for marker in OUT_OF_MEMORY_MARKERS):
+            return "MEMORY_LIMIT_EXCEEDED"
+
+    return None
@@ -0,0 +1,172 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from app.core.config import settings
+from app.judge.metrics import metrics
+
+def parse_language_map(value: str) -> Dict[str, float]:
+    """Parse "java=2,cpp=1.5" into {"java": 2.0, "cpp": 1.5}."""
+    result = {}
+    for item in value.split(","):
+        if "=" in item:
+            language, number = item.split("=", 1)
+            result[language.strip()] = float(number)
+    return result
+
+class Waiter:
+    def __init__(self, user_id: str, start_tag: float, seq: int):
+        self.user_id = user_id
+        self.start_tag = start_tag
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+    def __lt__(self, other: "Waiter") -> bool:
+        return (self.start_tag, self.seq) < (other.start_tag, other.seq)
+
+class Lane:
+    def __init__(self, language: str, concurrency: int, cost: float):
+        self.language = language
+        self.concurrency = concurrency
+        self.cost = cost
+        self.running = 0
+        self.waiters: List[Waiter] = []
+
+    def head(self) -> Optional[Waiter]:
+        # Waiters that gave up are dropped lazily
+        while self.waiters and self.waiters[0].future.done():
+            heapq.heappop(self.waiters)
+        return self.waiters[0] if self.waiters else None
+
+class JudgeScheduler:
+    """
+    Decides which waiting execution runs next.
+
+    At most `concurrency` executions run at once, and each language has a lane
+    with its own cap, so a burst of Java submissions can't take every slot from
+    Python. Across users it is weighted fair queueing (start-time fair
+    queueing): each user has a virtual clock that advances by the cost of each
+    job they run, and the job with the earliest virtual start goes first. A user
+    with 50 queued submissions is interleaved with everyone else instead of
+    being served first, and languages that are expensive to run cost more.
+    """
+
+    def __init__(self, concurrency: int, lane_concurrency: Dict[str, float], lane_costs: Dict[str, float]):
+        self.concurrency = concurrency
+        self.lane_concurrency = lane_concurrency
+        self.lane_costs = lane_costs
+        self.running = 0
+        self.lanes: Dict[str, Lane] = {}
+        self.virtual_time = 0.0
+        self.user_finish: Dict[str, float] = {}
+        self.user_jobs: Dict[str, int] = {}
+        self._seq = itertools.count()
+
+    def _lane(self, language: str) -> Lane:
+        if language not in self.lanes:
+            concurrency = int(self.lane_concurrency.get(language, self.concurrency))
+            cost = self.lane_costs.get(language, 1.0)
+            self.lanes[language] = Lane(language, max(1, min(concurrency, self.concurrency)), cost)
+        return self.lanes[language]
+
+    def _dispatch(self):
+        while self.running < self.concurrency:
+            best_lane, best = None, None
+            for lane in self.lanes.values():
+                if lane.running >= lane.concurrency:
+                    continue
+                waiter = lane.head()
+                if waiter and (best is None or waiter < best):
+                    best_lane, best = lane, waiter
+            if best is None:
+                break
+
+            heapq.heappop(best_lane.waiters)
+            self.virtual_time = max(self.virtual_time, best.start_tag)
+            best_lane.running += 1
+            self.running += 1
+            best.future.set_result(None)
+            self._update_gauges(best_lane)
+
+    def _update_gauges(self, lane: Lane):
+        metrics.set_gauge(f"judge_lane_{lane.language}_running", lane.running)
+        metrics.set_gauge(f"judge_lane_{lane.language}_waiting", len(lane.waiters))
+        metrics.set_gauge("judge_running", self.running)
+
+    def _release(self, lane: Lane):
+        lane.running -= 1
+        self.running -= 1
+        self._update_gauges(lane)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, language: str) -> AsyncIterator[None]:
+        """Wait for this user's turn in the language's lane, and hold the slot while running."""
+        lane = self._lane(language)
+        # Users who were idle don't bank credit, they start from the current virtual time
+        start_tag = max(self.virtual_time, self.user_finish.get(user_id, 0.0))
+        self.user_finish[user_id] = start_tag + lane.cost
+        self.user_jobs[user_id] = self.user_jobs.get(user_id, 0) + 1
+
+        waiter = Waiter(user_id, start_tag, next(self._seq))
+        heapq.heappush(lane.waiters, waiter)
+        self._update_gauges(lane)
+        self._dispatch()
+
+        try:
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # Granted the slot just as the caller gave up
+                    self._release(lane)
+                else:
+                    # Give back the turn this job would have taken
+                    if self.user_finish.get(user_id) == start_tag + lane.cost:
+                        self.user_finish[user_id] = start_tag
+                    self._update_gauges(lane)
+                raise
+            metrics.observe(f"judge_lane_{language}_wait_ms", (time.monotonic() - waiter.enqueued_at) * 1000)
+
+            try:
+                yield
+            finally:
+                self._release(lane)
+        finally:
+            self.user_jobs[user_id] -= 1
+            if not self.user_jobs[user_id]:
+                # Nothing else of theirs is queued or running, forget the user
+                del self.user_jobs[user_id]
+                self.user_finish.pop(user_id, None)
+
+    def full_languages(self) -> List[str]:
+        """Languages whose lane is full, counting the jobs already waiting for it."""
+        return [
+            language for language, lane in self.lanes.items()
+            if lane.running + len(lane.waiters) >= lane.concurrency
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "lanes": {
+                language: {
+                    "concurrency": lane.concurrency,
+                    "cost": lane.cost,
+                    "running": lane.running,
+                    "waiting": sum(1 for w in lane.waiters if not w.future.done()),
+                }
+                for language, lane in self.lanes.items()
+            },
+        }
+
+# Create a global instance
+judge_scheduler = JudgeScheduler(
+    settings.JUDGE_CONCURRENCY,
+    parse_language_map(settings.JUDGE_LANE_CONCURRENCY),
+    parse_language_map(settings.JUDGE_LANE_COSTS),
+)
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from app.judge.metrics import metrics
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    Callers that arrive while a call for their key is running wait for it and
+    share its result instead of running again. If that call fails or is
+    cancelled they make their own call, one caller's failure never becomes
+    another's verdict.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        while key in self.calls:
+            future = self.calls[key]
+            try:
+                result = await asyncio.shield(future)
+                metrics.incr(f"{self.name}_shared")
+                return result
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # This caller was cancelled, not the call it waited for
+                    raise
+            except Exception:
+                pass
+
+        future = asyncio.get_running_loop().create_future()
+        self.calls[key] = future
+        try:
+            result = await call()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+            else:
+                future.cancel()
+            # Nobody may be waiting, don't log "exception was never retrieved"
+            if not future.cancelled():
+                future.exception()
+            raise
+        finally:
+            del self.calls[key]
+
+# Create a global instance
+judge_flights = SingleFlight("judge_single_flight")
@@ -0,0 +1,101 @@
+import json
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.db.database import get_db
+
+def first_difference(expected: str, actual: str) -> int:
+    """The offset of the first character where two outputs differ."""
+    for offset, (e, a) in enumerate(zip(expected, actual)):
+        if e != a:
+            return offset
+    return min(len(expected), len(actual))
+
+def clip(text: Optional[str], start: int = 0) -> Optional[str]:
+    if text is None:
+        return None
+    end = start + settings.SUBMISSION_DIFF_CHARS
+    return ("..." if start > 0 else "") + text[start:end] + ("..." if len(text) > end else "")
+
+def failure_diff(record: Dict, hidden: bool) -> Dict:
+    """
+    A short diff of a failed test: the expected and actual output around the
+    first difference. Hidden tests keep their input and expected output secret.
+    """
+    expected, actual = record.get("expected") or "", record.get("actual") or ""
+    offset = first_difference(expected, actual)
+    start = max(0, offset - settings.SUBMISSION_DIFF_CHARS // 4)
+    return {
+        "index": record["index"],
+        "hidden": hidden,
+        "timed_out": bool(record.get("timed_out")),
+        "offset": offset,
+        "input": None if hidden else clip(record.get("input")),
+        "expected": None if hidden else clip(expected, start),
+        "actual": clip(actual, start),
+    }
+
+def pack_results(results: List[Dict], test_cases: List[Dict]) -> Dict:
+    """
+    The per-test results of a run, packed for storage.
+
+    `passed` is a bitmap with bit i set if test i passed. Runtimes (CPU ms)
+    and memory (KB) are arrays indexed by test, None for tests that never ran
+    because the run stopped early. Only the first failure keeps a diff.
+    """
+    test_count = len(test_cases)
+    bitmap = bytearray((test_count + 7) // 8)
+    runtimes: List[Optional[float]] = [None] * test_count
+    memory: List[Optional[int]] = [None] * test_count
+    first_failure = None
+    for record in sorted(results, key=lambda r: r.get("index", 0)):
+        index = record.get("index")
+        if index is None or not 0 <= index < test_count:
+            continue
+        runtimes[index] = round(record.get("cpu_time_ms") or 0, 3)
+        memory[index] = record.get("memory")
+        if record.get("passed"):
+            bitmap[index // 8] |= 1 << (index % 8)
+        elif first_failure is None:
+            first_failure = failure_diff(record, bool(test_cases[index].get("is_hidden")))
+    return {
+        "test_count": test_count,
+        "passed": bytes(bitmap),
+        "runtimes": runtimes,
+        "memory": memory,
+        "first_failure": first_failure,
+    }
+
+async def save_results(conn, submission_id: str, results: List[Dict], test_cases: List[Dict]):
+    """Store a submission's packed results in a single statement, replacing any from an earlier judgement."""
+    packed = pack_results(results, test_cases)
+    await conn.execute("""
+        INSERT INTO submission_results (submission_id, test_count, passed, runtimes, memory, first_failure)
+        VALUES ($1, $2, $3, $4, $5, $6)
+        ON CONFLICT (submission_id) DO UPDATE
+        SET test_count = $2, passed = $3, runtimes = $4, memory = $5, first_failure = $6
+    """, submission_id, packed["test_count"], packed["passed"], packed["runtimes"], packed["memory"],
+        json.dumps(packed["first_failure"]) if packed["first_failure"] else None)
+
+def unpack_results(row: Dict) -> Dict:
+    bitmap = row["passed"]
+    passed = [bool(bitmap[i // 8] & (1 << (i % 8))) for i in range(row["test_count"])]
+    return {
+        "test_count": row["test_count"],
+        "passed_count": sum(passed),
+        "passed": passed,
+        "runtimes": list(row["runtimes"]),
+        "memory": list(row["memory"]),
+        "first_failure": json.loads(row["first_failure"]) if row["first_failure"] else None,
+    }
+
+async def get_results(submission_id: str, user_id: str) -> Optional[Dict]:
+    """A user's submission results, None if there are none (still pending, or judged before results were kept)."""
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("""
+            SELECT r.test_count, r.passed, r.runtimes, r.memory, r.first_failure
+            FROM submission_results r
+            JOIN submissions s ON s.id = r.submission_id
+            WHERE r.submission_id = $1 AND s.user_id = $2
+        """, submission_id, user_id)
+    return unpack_results(dict(row)) if row else None
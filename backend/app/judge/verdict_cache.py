@@ -0,0 +1,128 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.metrics import metrics
+
+# Only verdicts that depend purely on the code and the tests are worth reusing,
+# time and memory limit verdicts can change with judge load. A compilation
+# error is only reused when the compiler reported it (compiler_diagnostic),
+# not when compiling failed for reasons of the judge's own.
+CACHEABLE_STATUSES = {"ACCEPTED", "WRONG_ANSWER", "COMPILATION_ERROR"}
+
+def is_cacheable(result: Dict) -> bool:
+    status = result.get("status")
+    if status == "COMPILATION_ERROR":
+        return bool(result.get("compiler_diagnostic"))
+    return status in CACHEABLE_STATUSES
+
+class VerdictCache:
+    """
+    Memoizes judge results for identical (code, language, test set, limits).
+
+    Entries live in an in-memory LRU and, optionally, in the verdict_cache table
+    so they survive restarts and are shared between judge workers. The test set
+    version is a hash of the test cases themselves, so editing tests can never
+    return a stale verdict even in processes that missed an invalidation.
+    """
+
+    def __init__(self, max_entries: int, persist: bool):
+        self.max_entries = max_entries
+        self.persist = persist
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def test_set_version(test_cases: List[Dict]) -> str:
+        payload = json.dumps([[tc["input"], tc["output"]] for tc in test_cases])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def make_key(code: str, language: str, test_set_version: str, time_limit: int, memory_limit: Optional[int] = None, comparator: str = "exact") -> str:
+        digest = hashlib.sha256()
+        for part in (code, language.lower(), test_set_version, str(time_limit), str(memory_limit), comparator):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self._record(hit=True)
+            return self.entries[key][1]
+
+        if self.persist:
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow("""
+                    SELECT challenge_id, result
+                    FROM verdict_cache
+                    WHERE key = $1
+                """, key)
+            result = json.loads(row["result"]) if row else None
+            # Not compilation errors stored before they were told apart from the judge's own failures
+            if result is not None and is_cacheable(result):
+                self._remember(key, str(row["challenge_id"]), result)
+                self._record(hit=True)
+                return result
+
+        self._record(hit=False)
+        return None
+
+    async def put(self, key: str, challenge_id: str, result: Dict):
+        if not is_cacheable(result):
+            return
+        self._remember(key, str(challenge_id), result)
+
+        if self.persist:
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                await conn.execute("""
+                    INSERT INTO verdict_cache (key, challenge_id, result)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (key) DO NOTHING
+                """, key, challenge_id, json.dumps(result))
+
+    async def invalidate_challenge(self, challenge_id: str):
+        """Drop every cached verdict of a challenge, e.g. after its tests changed."""
+        challenge_id = str(challenge_id)
+        for key in [k for k, (cid, _) in self.entries.items() if cid == challenge_id]:
+            del self.entries[key]
+
+        if self.persist:
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                await conn.execute("DELETE FROM verdict_cache WHERE challenge_id = $1", challenge_id)
+
+    def _remember(self, key: str, challenge_id: str, result: Dict):
+        self.entries[key] = (challenge_id, result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+            metrics.incr("verdict_cache_hits")
+        else:
+            self.misses += 1
+            metrics.incr("verdict_cache_misses")
+        total = self.hits + self.misses
+        metrics.set_gauge("verdict_cache_hit_rate", round(self.hits / total, 4))
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "persist": self.persist,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0,
+        }
+
+# Create a global instance
+verdict_cache = VerdictCache(settings.VERDICT_CACHE_SIZE, settings.VERDICT_CACHE_PERSIST)
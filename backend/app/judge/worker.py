@@ -0,0 +1,140 @@
+"""
+Standalone judge worker.
+
+Claims submissions from the judge_jobs table and judges them, so judging can be
+scaled separately from the API. Run one or more per host with:
+
+    python -m app.judge.worker --concurrency 4
+"""
+import argparse
+import asyncio
+import signal
+import time
+from app.core.config import settings
+from app.db.database import init_db, close_db, get_db
+from app.judge.jobs import JOBS_CHANNEL, claim_job, heartbeat_job, finish_job, release_job, new_worker_id
+from app.judge.calibration import calibration
+from app.judge.cpu_affinity import core_pool
+from app.judge.metrics import metrics
+from app.judge.scheduler import judge_scheduler
+from app.services.code_execution import stop_executors
+from app.services.submission_service import judge_submission, fail_submission
+
+class JudgeWorker:
+    def __init__(self, worker_id: str, concurrency: int):
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.stopping = asyncio.Event()
+        self.wakeup = asyncio.Event()
+        self.listen_conn = None
+
+    async def run(self):
+        pool = await get_db()
+
+        # Wake up idle slots as soon as a job is queued instead of waiting for the next poll
+        self.listen_conn = await pool.acquire()
+        await self.listen_conn.add_listener(JOBS_CHANNEL, self._on_notify)
+
+        print(f"Judge worker {self.worker_id} started with {self.concurrency} slots")
+        try:
+            await asyncio.gather(*[self._slot(i) for i in range(self.concurrency)])
+        finally:
+            await self.listen_conn.remove_listener(JOBS_CHANNEL, self._on_notify)
+            await pool.release(self.listen_conn)
+            print(f"Judge worker {self.worker_id} stopped")
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.wakeup.set()
+
+    async def _slot(self, slot_id: int):
+        pool = await get_db()
+        while not self.stopping.is_set():
+            async with pool.acquire() as conn:
+                job = await claim_job(
+                    conn, self.worker_id, settings.JUDGE_LEASE_SECONDS,
+                    skip_languages=judge_scheduler.full_languages()
+                )
+
+            if not job:
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=settings.JUDGE_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(job)
+
+    async def _process(self, job):
+        pool = await get_db()
+        submission_id = job["submission_id"]
+
+        if job["attempts"] > settings.JUDGE_MAX_ATTEMPTS:
+            # Every earlier attempt crashed or lost its lease, stop retrying
+            await fail_submission(submission_id, "Judging failed repeatedly")
+            async with pool.acquire() as conn:
+                await finish_job(conn, submission_id, self.worker_id, state="failed")
+            metrics.incr("judge_jobs_failed")
+            return
+
+        start_time = time.monotonic()
+        judge_task = asyncio.create_task(judge_submission(submission_id))
+        heartbeat_task = asyncio.create_task(self._heartbeat(submission_id, judge_task))
+        try:
+            await judge_task
+            async with pool.acquire() as conn:
+                await finish_job(conn, submission_id, self.worker_id)
+            metrics.incr("judge_jobs_completed")
+        except asyncio.CancelledError:
+            if not judge_task.cancelled():
+                raise
+            # The heartbeat cancelled judging, another worker owns the job now
+            print(f"Judge worker {self.worker_id} lost the lease on {submission_id}")
+        except Exception as e:
+            print(f"Judge worker {self.worker_id} failed on submission {submission_id}: {str(e)}")
+            async with pool.acquire() as conn:
+                await release_job(conn, submission_id, self.worker_id)
+            metrics.incr("judge_jobs_failed")
+        finally:
+            heartbeat_task.cancel()
+            metrics.observe("judge_job_duration_ms", (time.monotonic() - start_time) * 1000)
+
+    async def _heartbeat(self, submission_id: str, judge_task: asyncio.Task):
+        pool = await get_db()
+        while True:
+            await asyncio.sleep(settings.JUDGE_HEARTBEAT_SECONDS)
+            async with pool.acquire() as conn:
+                alive = await heartbeat_job(conn, submission_id, self.worker_id, settings.JUDGE_LEASE_SECONDS)
+            if not alive:
+                judge_task.cancel()
+                return
+
+async def main():
+    parser = argparse.ArgumentParser(description="KhwopaCoder judge worker")
+    parser.add_argument("--concurrency", type=int, default=settings.JUDGE_CONCURRENCY)
+    parser.add_argument("--worker-id", default=new_worker_id())
+    args = parser.parse_args()
+
+    await init_db()
+    judge_scheduler.concurrency = args.concurrency
+    core_pool.start()
+    if settings.JUDGE_CALIBRATE:
+        await calibration.calibrate()
+    worker = JudgeWorker(args.worker_id, args.concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await stop_executors()
+        await close_db()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,307 @@
+import asyncio
+import os
+import signal
+import time
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.judge.cpu_affinity import core_pool, set_process_affinity
+from app.judge.metrics import metrics
+from app.judge.sandbox import INHERITED_ENV, _apply_limits
+
+# How long a worker may take to start before we give up on it
+STARTUP_TIMEOUT = 10
+
+# Extra time a worker gets past the job timeout before it is killed
+KILL_GRACE_SECONDS = 1
+
+# How much of a dead worker's stderr is kept for the error message
+STDERR_TAIL_BYTES = 4096
+
+class PooledWorker:
+    """
+    A warm runtime process that runs judge jobs one at a time.
+
+    Subclasses say how to start the process (`worker_args`) and how to hand it
+    a job (`exchange`). A reply is a dict with returncode, stdout, stderr,
+    timed_out, output_exceeded, cpu_time_ms, memory_kb and recycle, and
+    optionally the signal that killed the job.
+    
+    A worker is started under `limits`, by default only the rlimits no job
+    can outgrow.
+    """
+
+    name = "worker"
+    max_jobs = 100
+
+    def __init__(self, command: Tuple[str, ...], limits: Optional[Dict] = None):
+        self.command = command
+        self.limits = limits
+        self.pass_fds: Tuple[int, ...] = ()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.jobs = 0
+        self.hung = False
+        self.stderr_tail = b""
+        self._stderr_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def spawn_limits(cls, limits: Optional[Dict]) -> Optional[Dict]:
+        """The limits to start a worker under for a job with `limits`, None for the shared ones."""
+        return None
+
+    @property
+    def key(self) -> Tuple:
+        """Workers are interchangeable when they run the same command under the same limits."""
+        return worker_key(self.command, self.limits)
+
+    @property
+    def judged_pid(self) -> int:
+        """The process that runs the jobs, pinned to a job's core."""
+        return self.process.pid
+
+    async def worker_args(self) -> List[str]:
+        raise NotImplementedError
+
+    async def exchange(self, job: Dict) -> Optional[Dict]:
+        """Send a job and read its reply, None if the worker exited instead."""
+        raise NotImplementedError
+
+    async def start(self):
+        # CPU and address space limits can't apply to a process shared by many jobs
+        limits = self.limits or {
+            "max_processes": settings.JUDGE_MAX_PROCESSES,
+            "max_file_size": settings.JUDGE_MAX_FILE_SIZE_MB * 1024 * 1024,
+        }
+        self.process = await asyncio.create_subprocess_exec(
+            *await self.worker_args(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={name: os.environ[name] for name in INHERITED_ENV if name in os.environ},
+            preexec_fn=lambda: _apply_limits(limits),
+            pass_fds=self.pass_fds,
+            start_new_session=True,
+            # A reply carries the job's captured stdout and stderr
+            limit=2 * settings.JUDGE_OUTPUT_LIMIT_KB * 1024 + 64 * 1024
+        )
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        try:
+            ready = await asyncio.wait_for(self.process.stdout.readline(), timeout=STARTUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            ready = b""
+        if ready.strip() != b"ready":
+            await self.kill()
+            raise RuntimeError(f"Judge {self.name} failed to start: {self.stderr_tail.decode(errors='replace')}")
+        metrics.incr(f"{self.name}_starts")
+
+    async def _drain_stderr(self):
+        while True:
+            chunk = await self.process.stderr.read(4096)
+            if not chunk:
+                return
+            self.stderr_tail = (self.stderr_tail + chunk)[-STDERR_TAIL_BYTES:]
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def run(self, job: Dict, timeout: float) -> Optional[Dict]:
+        """Run one job and return the reply, or None if the worker died or hung."""
+        try:
+            reply = await asyncio.wait_for(self.exchange(job), timeout=timeout + KILL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            self.hung = True
+            await self.kill()
+            return None
+        if reply is None:
+            await self.process.wait()
+            if self._stderr_task:
+                await self._stderr_task
+            return None
+
+        self.jobs += 1
+        return reply
+
+    def worn_out(self, reply: Dict) -> bool:
+        """Whether the worker should be replaced after this reply."""
+        return reply["recycle"] or self.jobs >= self.max_jobs
+
+    async def stop(self):
+        if self.alive:
+            # Closing stdin tells the worker to exit
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                await self.kill()
+
+    async def kill(self):
+        if self.process is None:
+            return
+        # The whole group, so nothing a job started outlives the worker
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await self.process.wait()
+
+def worker_key(command: Tuple[str, ...], limits: Optional[Dict]) -> Tuple:
+    return command, tuple(sorted((limits or {}).items()))
+
+class WorkerPool:
+    """
+    A bounded pool of warm workers of one kind.
+
+    Workers are keyed by their command line, since limits like the heap size
+    are flags of the worker process, and by the limits they were started
+    under. They are replaced once worn out or when a job crashed or hung them. A replacement is started in the background as
+    soon as a worker retires, so the next job doesn't wait for it to boot.
+    Runs return the same result as run_sandboxed.
+    """
+
+    def __init__(self, worker_class, size: int):
+        self.worker_class = worker_class
+        self.size = size
+        self.idle: Dict[Tuple, List[PooledWorker]] = {}
+        # Replacements still starting, by worker key
+        self.starting: Dict[Tuple, List[asyncio.Task]] = {}
+        self.workers = 0
+        self._slots = asyncio.Semaphore(size)
+
+    async def _acquire(self, command: Tuple[str, ...], limits: Optional[Dict]) -> PooledWorker:
+        key = worker_key(command, limits)
+        idle = self.idle.get(key)
+        while idle:
+            worker = idle.pop()
+            if worker.alive:
+                return worker
+            self.workers -= 1
+
+        starting = self.starting.get(key)
+        while starting:
+            try:
+                worker = await starting.pop()
+            except Exception:
+                # It failed to start and was already uncounted
+                continue
+            if worker.alive:
+                return worker
+            self.workers -= 1
+
+        # Make room by retiring an idle worker with a different key
+        if self.workers >= self.size:
+            for workers in self.idle.values():
+                if workers:
+                    await workers.pop().stop()
+                    self.workers -= 1
+                    break
+
+        worker = self.worker_class(command, limits)
+        self.workers += 1
+        try:
+            await worker.start()
+        except BaseException:
+            self.workers -= 1
+            raise
+        return worker
+
+    async def _release(self, worker: PooledWorker, reusable: bool):
+        if reusable and worker.alive:
+            self.idle.setdefault(worker.key, []).append(worker)
+            return
+        self.workers -= 1
+        await worker.kill()
+        self._start_replacement(worker.command, worker.limits)
+
+    def _start_replacement(self, command: Tuple[str, ...], limits: Optional[Dict]):
+        """Start a worker for the next job with this command line and limits, without waiting for it."""
+        async def start() -> PooledWorker:
+            worker = self.worker_class(command, limits)
+            try:
+                await worker.start()
+            except BaseException:
+                self.workers -= 1
+                await worker.kill()
+                raise
+            return worker
+
+        self.workers += 1
+        self.starting.setdefault(worker_key(command, limits), []).append(asyncio.create_task(start()))
+
+    async def run(
+        self,
+        cmd: List[str],
+        cwd: str,
+        timeout: float,
+        limits: Optional[Dict] = None,
+        env: Optional[Dict] = None
+    ) -> Dict:
+        """Run `cmd` (runtime, its flags and the runner to start) in a pooled worker."""
+        command, target = tuple(cmd[:-1]), cmd[-1]
+        job = {
+            "target": target,
+            "cwd": cwd,
+            "env": {"HOME": cwd, **(env or {})},
+            "timeout_ms": int(timeout * 1000),
+            "output_limit": (limits or {}).get("output_bytes") or 0,
+        }
+
+        core = (limits or {}).get("cpu_core")
+        async with self._slots:
+            worker = await self._acquire(command, self.worker_class.spawn_limits(limits))
+            reusable = False
+            if core is not None:
+                # The worker is shared, it's pinned for this job only
+                await asyncio.to_thread(set_process_affinity, worker.judged_pid, {core})
+            start_time = time.monotonic()
+            try:
+                reply = await worker.run(job, timeout)
+                reusable = reply is not None and not worker.worn_out(reply)
+            except asyncio.CancelledError:
+                # The job can't be interrupted from outside, so the worker goes
+                await worker.kill()
+                raise
+            finally:
+                if core is not None and worker.alive:
+                    await asyncio.to_thread(set_process_affinity, worker.judged_pid, core_pool.judge_cpus)
+                await self._release(worker, reusable)
+            wall_time_ms = int((time.monotonic() - start_time) * 1000)
+
+        if reply is None:
+            # The worker crashed (e.g. ran out of heap) or hung past the timeout
+            return {
+                "returncode": worker.process.returncode,
+                "signal": None,
+                "timed_out": worker.hung,
+                "output_exceeded": None,
+                "stdout": b"",
+                "stderr": worker.stderr_tail,
+                "wall_time_ms": wall_time_ms,
+                "cpu_time_ms": 0,
+                "max_rss_kb": 0,
+            }
+
+        return {
+            "returncode": reply["returncode"],
+            "signal": reply.get("signal"),
+            "timed_out": reply["timed_out"],
+            "output_exceeded": reply["output_exceeded"],
+            "stdout": reply["stdout"],
+            "stderr": reply["stderr"],
+            "wall_time_ms": wall_time_ms,
+            "cpu_time_ms": int(reply["cpu_time_ms"]),
+            "max_rss_kb": reply["memory_kb"],
+        }
+
+    async def stop(self):
+        tasks = [task for tasks in self.starting.values() for task in tasks]
+        for task in tasks:
+            task.cancel()
+        for started in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(started, PooledWorker):
+                await started.stop()
+        self.starting.clear()
+        for workers in self.idle.values():
+            for worker in workers:
+                await worker.stop()
+        self.idle.clear()
+        self.workers = 0
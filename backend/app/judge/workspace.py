@@ -0,0 +1,118 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from app.core.config import settings
+from app.judge.metrics import metrics
+
+# RAM-backed directory workspaces go to when it is usable
+SHARED_MEMORY_DIR = "/dev/shm"
+WORKSPACE_ROOT_NAME = "khwopacoder-workspaces"
+
+def choose_workspace_root() -> str:
+    """
+    JUDGE_WORKSPACE_DIR if set, otherwise /dev/shm when it allows running
+    executables and has JUDGE_WORKSPACE_MIN_FREE_MB free (Docker mounts a 64 MB
+    noexec one by default), otherwise the system temp directory.
+    """
+    if settings.JUDGE_WORKSPACE_DIR:
+        return settings.JUDGE_WORKSPACE_DIR
+    try:
+        stats = os.statvfs(SHARED_MEMORY_DIR)
+        free_mb = stats.f_bavail * stats.f_frsize // (1024 * 1024)
+        if (
+            not stats.f_flag & os.ST_NOEXEC
+            and os.access(SHARED_MEMORY_DIR, os.W_OK)
+            and free_mb >= settings.JUDGE_WORKSPACE_MIN_FREE_MB
+        ):
+            return os.path.join(SHARED_MEMORY_DIR, WORKSPACE_ROOT_NAME)
+    except OSError:
+        pass
+    return os.path.join(tempfile.gettempdir(), WORKSPACE_ROOT_NAME)
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _clear_directory(path: str) -> bool:
+    """Remove everything inside `path`, returns False if something couldn't be removed."""
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+    except OSError:
+        return False
+    return True
+
+class WorkspacePool:
+    """
+    Reusable working directories for judge runs.
+
+    Every run gets a workspace to itself. When it's released its contents are
+    cleared and it is kept for the next run, up to `size` idle workspaces, so
+    runs don't create and delete a directory tree each time. All file system
+    work happens in a thread, a slow disk never stalls the event loop.
+    Workspaces are named after the judge's pid, and ones left behind by a judge
+    that died are removed when the pool starts.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.root: Optional[str] = None
+        self._idle: List[str] = []
+
+    def _prepare_root(self) -> str:
+        root = choose_workspace_root()
+        os.makedirs(root, exist_ok=True)
+        for name in os.listdir(root):
+            parts = name.split("-")
+            if len(parts) == 3 and parts[0] == "ws" and parts[1].isdigit() and not _is_alive(int(parts[1])):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        print(f"Judge workspaces in {root}")
+        return root
+
+    def _create(self) -> str:
+        path = os.path.join(self.root, f"ws-{os.getpid()}-{uuid.uuid4().hex[:12]}")
+        os.mkdir(path, 0o700)
+        return path
+
+    async def _release(self, path: str):
+        if len(self._idle) < self.size and await asyncio.to_thread(_clear_directory, path):
+            self._idle.append(path)
+        else:
+            await asyncio.to_thread(shutil.rmtree, path, True)
+
+    @asynccontextmanager
+    async def workspace(self) -> AsyncIterator[str]:
+        """An empty directory for one run, returned to the pool afterwards."""
+        if self.root is None:
+            self.root = await asyncio.to_thread(self._prepare_root)
+        if self._idle:
+            path = self._idle.pop()
+            metrics.incr("workspace_reuses")
+        else:
+            path = await asyncio.to_thread(self._create)
+        try:
+            yield path
+        finally:
+            await self._release(path)
+
+    async def clear(self):
+        """Remove the idle workspaces, called on shutdown."""
+        idle, self._idle = self._idle, []
+        for path in idle:
+            await asyncio.to_thread(shutil.rmtree, path, True)
+
+# Create a global instance
+workspace_pool = WorkspacePool(settings.JUDGE_WORKSPACE_POOL_SIZE)
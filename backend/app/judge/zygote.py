@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+from typing import Dict, List, Optional
+from app.judge.metrics import metrics
+from app.judge.sandbox import (
+    build_result,
+    child_environment,
+    parse_usage_report,
+    run_sandboxed,
+    supervise,
+    INHERITED_ENV,
+)
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(__file__), "zygote_server.py")
+
+# How long a zygote may take to start before we give up on it
+STARTUP_TIMEOUT = 10
+
+class PythonZygote:
+    """
+    A long-lived Python process that forks a fresh child for every run.
+
+    The zygote (see zygote_server.py) pre-imports the test runner's
+    dependencies, so a run costs a fork instead of interpreter startup. Runs
+    return the same result as run_sandboxed. If the zygote can't be started
+    (no pidfd support, the interpreter is missing) runs fall back to spawning
+    the interpreter directly.
+    """
+
+    def __init__(self, python: str):
+        self.python = python
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.socket_dir: Optional[str] = None
+        self.disabled = not hasattr(os, "pidfd_open") or not hasattr(socket, "send_fds")
+        self._lock = asyncio.Lock()
+
+    @property
+    def socket_path(self) -> str:
+        return os.path.join(self.socket_dir, "zygote.sock")
+
+    async def ensure_started(self) -> bool:
+        async with self._lock:
+            if self.disabled:
+                return False
+            if self.process and self.process.returncode is None:
+                return True
+
+            self._cleanup()
+            self.socket_dir = tempfile.mkdtemp(prefix="khwopacoder-zygote-")
+            env = {name: os.environ[name] for name in INHERITED_ENV if name in os.environ}
+            try:
+                self.process = await asyncio.create_subprocess_exec(
+                    self.python, SERVER_SCRIPT, self.socket_path,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    env=env,
+                    cwd=self.socket_dir
+                )
+                ready = await asyncio.wait_for(self.process.stdout.readline(), timeout=STARTUP_TIMEOUT)
+                if ready.strip() != b"ready":
+                    raise RuntimeError(f"unexpected startup output {ready!r}")
+            except Exception as e:
+                print(f"Error starting Python zygote, falling back to one interpreter per run: {str(e)}")
+                self.disabled = True
+                await self.stop()
+                return False
+
+            metrics.incr("python_zygote_starts")
+            return True
+
+    async def run(
+        self,
+        cmd: List[str],
+        cwd: str,
+        timeout: float,
+        limits: Optional[Dict] = None,
+        env: Optional[Dict] = None
+    ) -> Dict:
+        """Run `cmd` (an interpreter command line) in a child forked from the zygote."""
+        if not await self.ensure_started():
+            return await run_sandboxed(cmd, cwd, timeout, limits=limits, env=env)
+
+        loop = asyncio.get_running_loop()
+        request = json.dumps({
+            "argv": cmd[1:],
+            "cwd": cwd,
+            "env": child_environment(cwd, env),
+            "limits": limits,
+        }).encode()
+
+        stdout_read, stdout_write = os.pipe()
+        stderr_read, stderr_write = os.pipe()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        conn.setblocking(False)
+        try:
+            start_time = time.monotonic()
+            await loop.sock_connect(conn, self.socket_path)
+            socket.send_fds(conn, [request], [stdout_write, stderr_write])
+        except Exception:
+            conn.close()
+            for fd in (stdout_read, stderr_read):
+                os.close(fd)
+            raise
+        finally:
+            os.close(stdout_write)
+            os.close(stderr_write)
+
+        pipes = [os.fdopen(stdout_read, "rb"), os.fdopen(stderr_read, "rb")]
+        waiter = None
+        try:
+            reply = await loop.sock_recv(conn, 64)
+            if not reply:
+                raise RuntimeError("Python zygote exited before starting the run")
+            waiter = asyncio.ensure_future(loop.sock_recv(conn, 256))
+            outcome = await supervise(int(reply), pipes, waiter, timeout, limits)
+        except BaseException:
+            for pipe in pipes:
+                pipe.close()
+            if waiter and not waiter.done():
+                # The zygote still reaps the killed child, hang up once it reports
+                waiter.add_done_callback(lambda _: conn.close())
+            else:
+                conn.close()
+            raise
+        conn.close()
+
+        report = waiter.result()
+        if not report:
+            raise RuntimeError("Python zygote exited during the run")
+        wall_time_ms = int((time.monotonic() - start_time) * 1000)
+        status, cpu_time_ms, max_rss_kb = parse_usage_report(report)
+        return build_result(outcome, status, wall_time_ms, cpu_time_ms, max_rss_kb)
+
+    async def stop(self):
+        if self.process and self.process.returncode is None:
+            # Closing stdin tells the zygote to exit
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        self.process = None
+        self._cleanup()
+
+    def _cleanup(self):
+        if self.socket_dir:
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+            self.socket_dir = None
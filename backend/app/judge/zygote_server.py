@@ -0,0 +1,161 @@
+"""
+Python zygote for the judge.
+
+Started once per judge process by app.judge.zygote, it imports everything the
+Python test runner needs up front and forks a fresh child for every run, so
+judged Python code doesn't pay for interpreter startup and imports each time.
+It runs in the judged interpreter, so only the standard library may be used.
+
+Usage: python zygote_server.py <socket_path>
+
+One run per connection on the Unix socket:
+  judge -> zygote  a JSON request {"argv", "cwd", "env", "limits"}, with the
+                   child's stdout and stderr passed along as file descriptors
+  zygote -> judge  "<pid>" once the child is forked, then
+                   "<status> <user_us> <sys_us> <maxrss_kb>" once it is reaped
+
+The zygote exits when its stdin is closed, i.e. when the judge goes away.
+"""
+import os
+import resource
+import runpy
+import selectors
+import socket
+import sys
+import traceback
+import json
+
+# Imported by the test runner, loaded once here so children inherit them
+RUNNER_MODULES = ("ast", "mmap", "time")
+for name in RUNNER_MODULES:
+    __import__(name)
+
+def apply_limits(limits):
+    """Same limits as app.judge.sandbox._apply_limits."""
+    if limits.get("cpu_seconds"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["cpu_seconds"], limits["cpu_seconds"] + 1))
+    if limits.get("address_space"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["address_space"], limits["address_space"]))
+    if limits.get("max_processes"):
+        resource.setrlimit(resource.RLIMIT_NPROC, (limits["max_processes"], limits["max_processes"]))
+    if limits.get("max_file_size"):
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits["max_file_size"], limits["max_file_size"]))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if limits.get("cpu_core") is not None:
+        os.sched_setaffinity(0, {limits["cpu_core"]})
+
+def close_inherited_fds():
+    """Close every descriptor but stdin/stdout/stderr, the child must not see the zygote's sockets."""
+    try:
+        fds = [int(fd) for fd in os.listdir("/proc/self/fd")]
+    except OSError:
+        fds = range(3, 4096)
+    for fd in fds:
+        if fd > 2:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+def run_child(request, stdout_fd, stderr_fd):
+    """Runs in the forked child, never returns."""
+    exit_code = 1
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        close_inherited_fds()
+
+        apply_limits(request.get("limits") or {})
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.argv = request["argv"]
+        sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))
+
+        runpy.run_path(sys.argv[0], run_name="__main__")
+        exit_code = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            exit_code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+def main():
+    socket_path = sys.argv[1]
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    listener.bind(socket_path)
+    listener.listen(128)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    selector.register(sys.stdin, selectors.EVENT_READ, "stdin")
+    connections = {}
+
+    print("ready", flush=True)
+
+    while True:
+        for key, _ in selector.select():
+            if key.data == "stdin":
+                if not os.read(sys.stdin.fileno(), 1024):
+                    return
+            elif key.data == "accept":
+                conn, _ = listener.accept()
+                selector.register(conn, selectors.EVENT_READ, "request")
+            elif key.data == "request":
+                conn = key.fileobj
+                selector.unregister(conn)
+                try:
+                    message, fds, _, _ = socket.recv_fds(conn, 1 << 20, 2)
+                except OSError:
+                    conn.close()
+                    continue
+                if not message or len(fds) != 2:
+                    for fd in fds:
+                        os.close(fd)
+                    conn.close()
+                    continue
+
+                request = json.loads(message)
+                pid = os.fork()
+                if pid == 0:
+                    run_child(request, *fds)
+                for fd in fds:
+                    os.close(fd)
+
+                connections[pid] = conn
+                selector.register(os.pidfd_open(pid), selectors.EVENT_READ, pid)
+                try:
+                    conn.send(f"{pid}".encode())
+                except OSError:
+                    pass
+            else:
+                pid = key.data
+                selector.unregister(key.fileobj)
+                os.close(key.fileobj)
+                _, status, usage = os.wait4(pid, 0)
+                conn = connections.pop(pid)
+                report = "%d %d %d %d" % (
+                    status,
+                    int(usage.ru_utime * 1000000),
+                    int(usage.ru_stime * 1000000),
+                    usage.ru_maxrss
+                )
+                try:
+                    conn.send(report.encode())
+                except OSError:
+                    pass
+                conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,12 @@ class Difficulty(str, Enum):
     MEDIUM = "MEDIUM"
     HARD = "HARD"
 
+class ComparatorPolicy(str, Enum):
+    EXACT = "exact"
+    WHITESPACE = "whitespace"
+    FLOAT = "float"
+    UNORDERED = "unordered"
+
 class TestCaseBase(BaseModel):
     input: str
     output: str
@@ -20,6 +26,14 @@ class TestCase(TestCaseBase):
     id: str
     challenge_id: str
 
+class ReferenceSolutionCreate(BaseModel):
+    code: str
+    language: str
+
+class CheckerCreate(BaseModel):
+    code: str
+    language: str  # python or cpp
+
 class ChallengeBase(BaseModel):
     title: str
     description: str
@@ -27,6 +41,9 @@ class ChallengeBase(BaseModel):
     category: str
     points: int
     time_limit: int  # in seconds
+    memory_limit: int = 256  # in MB
+    comparator: ComparatorPolicy = ComparatorPolicy.EXACT
+    comparator_epsilon: float = 1e-6  # for the float comparator
 
 class ChallengeCreate(ChallengeBase):
     test_cases: List[TestCaseCreate]
@@ -38,6 +55,9 @@ class ChallengeUpdate(BaseModel):
     category: Optional[str] = None
     points: Optional[int] = None
     time_limit: Optional[int] = None
+    memory_limit: Optional[int] = None
+    comparator: Optional[ComparatorPolicy] = None
+    comparator_epsilon: Optional[float] = None
 
 class Challenge(ChallengeBase):
     id: str
@@ -1,13 +1,15 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
 class Status(str, Enum):
+    PENDING = "PENDING"
     ACCEPTED = "ACCEPTED"
     WRONG_ANSWER = "WRONG_ANSWER"
     TIME_LIMIT_EXCEEDED = "TIME_LIMIT_EXCEEDED"
     MEMORY_LIMIT_EXCEEDED = "MEMORY_LIMIT_EXCEEDED"
+    OUTPUT_LIMIT_EXCEEDED = "OUTPUT_LIMIT_EXCEEDED"
     RUNTIME_ERROR = "RUNTIME_ERROR"
     COMPILATION_ERROR = "COMPILATION_ERROR"
 
@@ -33,3 +35,45 @@ class SubmissionResponse(Submission):
 
     class Config:
         from_attributes = True
+
+class FailedTest(BaseModel):
+    index: int
+    hidden: bool = False
+    timed_out: bool = False
+    # Where expected and actual output first differ, both are cut to a window around it
+    offset: int = 0
+    input: Optional[str] = None
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+
+class SubmissionResults(BaseModel):
+    test_count: int
+    passed_count: int
+    passed: List[bool]
+    runtimes: List[Optional[float]]  # CPU milliseconds per test, None if it never ran
+    memory: List[Optional[int]]  # in KB
+    first_failure: Optional[FailedTest] = None
+
+class RunRequest(BaseModel):
+    challenge_id: str
+    code: str
+    language: str
+    # Custom inputs to run instead of the challenge's sample tests
+    inputs: Optional[List[str]] = None
+
+class RunResult(BaseModel):
+    index: int
+    input: str
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+    passed: Optional[bool] = None
+    timed_out: bool = False
+    cpu_time_ms: Optional[float] = None
+
+class RunResponse(BaseModel):
+    # A Status, or COMPLETED for custom inputs
+    status: str
+    message: Optional[str] = None
+    runtime: Optional[int] = None  # in milliseconds
+    memory: Optional[int] = None  # in KB
+    results: List[RunResult] = []
@@ -1,4 +1,5 @@
 from app.db.database import get_db
+import json
 from datetime import datetime
 
 async def create_activity(user_id: str, activity_type: str, title: str, description: str, metadata: dict = None):
@@ -8,7 +9,7 @@ async def create_activity(user_id: str, activity_type: str, title: str, descript
             INSERT INTO activities (user_id, type, title, description, metadata)
             VALUES ($1, $2, $3, $4, $5)
             RETURNING id, user_id, type, title, description, metadata, created_at
-        """, user_id, activity_type, title, description, metadata)
+        """, user_id, activity_type, title, description, json.dumps(metadata, default=str) if metadata is not None else None)
         return dict(activity)
 
 async def get_user_activities(user_id: str, limit: int = 10):
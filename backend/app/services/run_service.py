@@ -0,0 +1,55 @@
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.calibration import calibration
+from app.judge.checker import get_comparator
+from app.judge.metrics import metrics
+from app.judge.run_lane import run_lane
+from app.services.code_execution import execute_code
+
+async def get_sample_test_cases(challenge_id: str) -> List[Dict]:
+    """The visible test cases of a challenge, in the shape execute_code expects."""
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        test_cases = await conn.fetch("""
+            SELECT input, output
+            FROM test_cases
+            WHERE challenge_id = $1 AND is_hidden = FALSE
+            ORDER BY id
+        """, challenge_id)
+        return [dict(tc) for tc in test_cases]
+
+async def run_code(challenge: Dict, code: str, language: str, inputs: Optional[List[str]] = None) -> Dict:
+    """
+    Run code against a challenge's sample tests, or against `inputs` if given.
+
+    Nothing is written to the database. Runs get the run lane's own slots and
+    limits (RUN_TIME_LIMIT plus the language's calibrated overhead,
+    RUN_MEMORY_LIMIT_MB, never more than the challenge's), they aren't queued
+    behind submissions. Custom inputs have no
+    expected output, so their results only carry what the code returned.
+    """
+    if inputs is not None:
+        test_cases = [{"input": value, "output": ""} for value in inputs]
+    else:
+        test_cases = await get_sample_test_cases(challenge["id"])
+        if not test_cases:
+            return {"status": "ACCEPTED", "message": "This challenge has no sample tests", "results": []}
+
+    time_limit = calibration.time_limit(language, min(challenge["time_limit"], settings.RUN_TIME_LIMIT))
+    memory_limit = min(challenge["memory_limit"] or settings.JUDGE_MEMORY_LIMIT_MB, settings.RUN_MEMORY_LIMIT_MB)
+    comparator = await get_comparator(challenge)
+
+    async with run_lane.slot():
+        result = await execute_code(code, language, test_cases, time_limit, memory_limit, comparator=comparator)
+    metrics.incr("run_lane_runs")
+
+    if inputs is not None:
+        for record in result.get("results", []):
+            record["expected"] = None
+            record["passed"] = None
+        # Without expected output there is nothing to get wrong
+        if result["status"] in ("ACCEPTED", "WRONG_ANSWER"):
+            result["status"] = "COMPLETED"
+            result["message"] = f"Ran {len(inputs)} custom input(s)"
+    return result
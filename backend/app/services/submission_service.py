@@ -0,0 +1,210 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.db.database import get_db
+from app.services.code_execution import execute_code
+from app.judge.calibration import calibration
+from app.judge.checker import CheckerError, get_comparator
+from app.judge.progress import publish_progress
+from app.judge.scheduler import judge_scheduler
+from app.judge.single_flight import judge_flights
+from app.judge.test_results import save_results
+from app.judge.verdict_cache import verdict_cache
+from app.services.badge_service import check_badges_after_submission
+from app.services.activity_service import create_activity
+
+async def get_test_cases(challenge_id: str) -> List[Dict]:
+    """Get all test cases of a challenge in the shape execute_code expects."""
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        test_cases = await conn.fetch("""
+            SELECT input, output, is_hidden
+            FROM test_cases
+            WHERE challenge_id = $1
+            ORDER BY id
+        """, challenge_id)
+        return [dict(tc) for tc in test_cases]
+
+async def judge_submission(submission_id: str) -> Optional[Dict]:
+    """
+    Judge a PENDING submission and record its verdict.
+
+    No database connection is held while the code runs, so a slow judgement
+    does not pin a pool slot. Progress (compiling, finished tests, the verdict)
+    is pushed to the user's WebSockets as it happens. The challenge's checker
+    failing raises CheckerError, nothing is recorded or cached then.
+    """
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        submission = await conn.fetchrow("""
+            SELECT s.id, s.user_id, s.challenge_id, s.code, s.language, s.status,
+                   c.title, c.difficulty, c.points, c.time_limit, c.memory_limit,
+                   c.comparator, c.comparator_epsilon,
+                   ch.language AS checker_language, ch.code AS checker_code
+            FROM submissions s
+            JOIN challenges c ON s.challenge_id = c.id
+            LEFT JOIN checkers ch ON ch.challenge_id = c.id
+            WHERE s.id = $1
+        """, submission_id)
+
+    if not submission or submission["status"] != "PENDING":
+        return None
+
+    user_id = str(submission["user_id"])
+
+    async def on_progress(event: Dict):
+        await publish_progress(user_id, submission_id, event)
+
+    # Test data is loaded once the job's turn comes, so queued jobs hold no more than their row
+    async with judge_scheduler.slot(user_id, submission["language"]):
+        test_cases = await get_test_cases(submission["challenge_id"])
+
+        # The challenge's limit as calibrated for this language on this host
+        reference = await calibration.get_reference(submission["challenge_id"], test_cases, in_slot=True)
+        time_limit = calibration.time_limit(submission["language"], submission["time_limit"], reference)
+        # The challenge's checker, compiled when it was uploaded, or its comparison policy
+        comparator = await get_comparator(dict(submission))
+
+        # Identical code against the same tests gets the same verdict without running again
+        cache_key = verdict_cache.make_key(
+            submission["code"],
+            submission["language"],
+            verdict_cache.test_set_version(test_cases),
+            time_limit,
+            submission["memory_limit"],
+            comparator.key()
+        )
+        execution_result = await verdict_cache.get(cache_key)
+
+        async def execute() -> Dict:
+            result = await execute_code(
+                code=submission["code"],
+                language=submission["language"],
+                test_cases=test_cases,
+                time_limit=time_limit,
+                memory_limit=submission["memory_limit"],
+                on_progress=on_progress,
+                comparator=comparator
+            )
+            await verdict_cache.put(cache_key, submission["challenge_id"], result)
+            return result
+
+        if execution_result is None:
+            try:
+                # Identical code already being judged is waited for instead of run twice
+                execution_result = await judge_flights.do(cache_key, execute)
+            except CheckerError:
+                # Not the submission's verdict: the job fails, to be retried or given up on
+                raise
+            except Exception as e:
+                execution_result = {
+                    "status": "RUNTIME_ERROR",
+                    "message": str(e)
+                }
+
+    if not await record_verdict(dict(submission), execution_result, test_cases):
+        # Another judge got to it first and reported its own verdict
+        return None
+    results = execution_result.get("results") or []
+    await on_progress({
+        "event": "verdict",
+        "status": execution_result["status"],
+        "message": execution_result.get("message"),
+        "runtime": execution_result.get("runtime"),
+        "memory": execution_result.get("memory"),
+        "passed": sum(1 for r in results if r.get("passed")),
+        "total": len(test_cases),
+    })
+    return execution_result
+
+async def fail_submission(submission_id: str, message: str):
+    """Give up on a submission that could not be judged."""
+    print(f"Giving up on submission {submission_id}: {message}")
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            UPDATE submissions
+            SET status = $1
+            WHERE id = $2 AND status = 'PENDING'
+        """, "RUNTIME_ERROR", submission_id)
+
+async def record_verdict(submission: Dict, execution_result: Dict, test_cases: Optional[List[Dict]] = None) -> bool:
+    """
+    Store the verdict of a judged submission, its per-test results and update
+    user stats. Returns False when the submission already had a verdict.
+    """
+    user_id = submission["user_id"]
+    challenge = {
+        "id": submission["challenge_id"],
+        "title": submission["title"],
+        "difficulty": submission["difficulty"],
+        "points": submission["points"],
+    }
+
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            # Only the first verdict counts, a submission judged twice is recorded once
+            recorded = await conn.fetchval("""
+                UPDATE submissions
+                SET status = $1, runtime = $2, memory = $3
+                WHERE id = $4 AND status = 'PENDING'
+                RETURNING id
+            """, execution_result["status"], execution_result.get("runtime"),
+                execution_result.get("memory"), submission["id"])
+            if recorded is None:
+                return False
+            if test_cases:
+                await save_results(conn, submission["id"], execution_result.get("results") or [], test_cases)
+
+            # Holding the user's row serialises verdicts of the same user, so
+            # two submissions accepted at once do not both count as the first solve
+            await conn.execute("SELECT id FROM users WHERE id = $1 FOR UPDATE", user_id)
+
+            first_solve = False
+            if execution_result["status"] == "ACCEPTED":
+                # Check if this is the first time the user has solved this challenge
+                previous_accepted = await conn.fetchrow("""
+                    SELECT id
+                    FROM submissions
+                    WHERE user_id = $1 AND challenge_id = $2 AND status = $3 AND id != $4
+                """, user_id, challenge["id"], "ACCEPTED", submission["id"])
+
+                if not previous_accepted:
+                    first_solve = True
+                    await conn.execute("""
+                        UPDATE users
+                        SET points = points + $1, solved = solved + 1
+                        WHERE id = $2
+                    """, challenge["points"], user_id)
+
+            # Update user's last active timestamp
+            await conn.execute("""
+                UPDATE users
+                SET last_active = $1
+                WHERE id = $2
+            """, datetime.now(), user_id)
+
+    try:
+        if first_solve:
+            await create_activity(
+                user_id=user_id,
+                activity_type="CHALLENGE_COMPLETED",
+                title=f"Completed '{challenge['title']}' Challenge",
+                description=f"You solved the challenge in {(execution_result.get('runtime') or 0) / 1000:.2f} seconds",
+                metadata={"challengeId": str(challenge["id"]), "points": challenge["points"]}
+            )
+
+            # Check for badges
+            await check_badges_after_submission(user_id, challenge)
+        elif execution_result["status"] != "ACCEPTED":
+            await create_activity(
+                user_id=user_id,
+                activity_type="CHALLENGE_ATTEMPTED",
+                title=f"Attempted '{challenge['title']}' Challenge",
+                description="You've made progress but haven't completed it yet",
+                metadata={"challengeId": str(challenge["id"]), "status": execution_result["status"]}
+            )
+    except Exception as e:
+        print(f"Error recording activity for submission {submission['id']}: {str(e)}")
+
+    return True
@@ -4,10 +4,12 @@ from datetime import datetime
 from enum import Enum
 
 class Status(str, Enum):
+    PENDING = "PENDING"
     ACCEPTED = "ACCEPTED"
     WRONG_ANSWER = "WRONG_ANSWER"
     TIME_LIMIT_EXCEEDED = "TIME_LIMIT_EXCEEDED"
     MEMORY_LIMIT_EXCEEDED = "MEMORY_LIMIT_EXCEEDED"
+    OUTPUT_LIMIT_EXCEEDED = "OUTPUT_LIMIT_EXCEEDED"
     RUNTIME_ERROR = "RUNTIME_ERROR"
     COMPILATION_ERROR = "COMPILATION_ERROR"
 
@@ -68,11 +68,18 @@ class ConnectionManager:
         if user_id not in self.user_connections:
             return
         
-        for websocket in self.user_connections[user_id]:
-            if isinstance(message, dict):
-                await websocket.send_json(message)
-            else:
-                await websocket.send_text(str(message))
+        # Iterate over a copy, a connection that went away is dropped on the way
+        for websocket in list(self.user_connections[user_id]):
+            try:
+                if isinstance(message, dict):
+                    await websocket.send_json(message)
+                else:
+                    await websocket.send_text(str(message))
+            except Exception:
+                if user_id in self.user_connections and websocket in self.user_connections[user_id]:
+                    self.user_connections[user_id].remove(websocket)
+                    if not self.user_connections[user_id]:
+                        del self.user_connections[user_id]
 
 # Create a global instance
 manager = ConnectionManager()
@@ -1,6 +1,6 @@
 -- First, create all ENUM types
 CREATE TYPE "Difficulty" AS ENUM ('EASY', 'MEDIUM', 'HARD');
-CREATE TYPE "Status" AS ENUM ('ACCEPTED', 'WRONG_ANSWER', 'TIME_LIMIT_EXCEEDED', 'MEMORY_LIMIT_EXCEEDED', 'RUNTIME_ERROR', 'COMPILATION_ERROR');
+CREATE TYPE "Status" AS ENUM ('PENDING', 'ACCEPTED', 'WRONG_ANSWER', 'TIME_LIMIT_EXCEEDED', 'MEMORY_LIMIT_EXCEEDED', 'OUTPUT_LIMIT_EXCEEDED', 'RUNTIME_ERROR', 'COMPILATION_ERROR');
 CREATE TYPE "ActivityType" AS ENUM ('CHALLENGE_COMPLETED', 'BADGE_EARNED', 'RANK_UP', 'CHALLENGE_ATTEMPTED', 'STREAK');
 
 -- Then create the tables
@@ -16,6 +16,7 @@ CREATE TABLE "users" (
     "points" INTEGER NOT NULL DEFAULT 0,
     "solved" INTEGER NOT NULL DEFAULT 0,
     "streak" INTEGER NOT NULL DEFAULT 0,
+    "is_admin" BOOLEAN NOT NULL DEFAULT false,
     "last_active" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
@@ -39,6 +40,9 @@ CREATE TABLE "challenges" (
     "category" VARCHAR(100) NOT NULL,
     "points" INTEGER NOT NULL,
     "time_limit" INTEGER NOT NULL,
+    "memory_limit" INTEGER NOT NULL DEFAULT 256,
+    "comparator" VARCHAR(20) NOT NULL DEFAULT 'exact',
+    "comparator_epsilon" DOUBLE PRECISION NOT NULL DEFAULT 1e-6,
     "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
@@ -60,9 +64,74 @@ CREATE TABLE "submissions" (
     "status" "Status" NOT NULL,
     "runtime" INTEGER,
     "memory" INTEGER,
+    "code_hash" VARCHAR(64),
+    "idempotency_key" VARCHAR(255),
     "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- A retried request with the same Idempotency-Key gets the submission it created the first time
+CREATE UNIQUE INDEX "submissions_idempotency_idx" ON "submissions" ("user_id", "idempotency_key") WHERE "idempotency_key" IS NOT NULL;
+-- Finds identical code that is still waiting for the judge
+CREATE INDEX "submissions_pending_code_idx" ON "submissions" ("user_id", "challenge_id", "code_hash") WHERE "status" = 'PENDING';
+
+-- Per-test results of a judged submission: a pass bitmap, runtimes and memory by test, the first failure's diff
+CREATE TABLE "submission_results" (
+    "submission_id" UUID PRIMARY KEY REFERENCES submissions(id) ON DELETE CASCADE,
+    "test_count" INTEGER NOT NULL,
+    "passed" BYTEA NOT NULL,
+    "runtimes" REAL[] NOT NULL,
+    "memory" INTEGER[] NOT NULL,
+    "first_failure" JSONB
+);
+
+CREATE TABLE "judge_jobs" (
+    "submission_id" UUID PRIMARY KEY REFERENCES submissions(id) ON DELETE CASCADE,
+    "state" VARCHAR(20) NOT NULL DEFAULT 'queued',
+    "attempts" INTEGER NOT NULL DEFAULT 0,
+    "worker_id" VARCHAR(255),
+    "lease_expires_at" TIMESTAMP,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX "judge_jobs_claim_idx" ON "judge_jobs" ("created_at") WHERE "state" IN ('queued', 'running');
+
+CREATE TABLE "reference_solutions" (
+    "challenge_id" UUID NOT NULL REFERENCES challenges(id) ON DELETE CASCADE,
+    "language" VARCHAR(50) NOT NULL,
+    "code" TEXT NOT NULL,
+    "runtime_ms" INTEGER NOT NULL,
+    "host_id" VARCHAR(64) NOT NULL,
+    "test_set_version" VARCHAR(64) NOT NULL,
+    "benchmarked_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Every judge host keeps its own timing of the reference
+    PRIMARY KEY ("challenge_id", "host_id")
+);
+
+-- What each judge host measured at startup, for processes that don't judge to serve
+CREATE TABLE "judge_hosts" (
+    "host_id" VARCHAR(64) PRIMARY KEY,
+    "overhead_ms" JSONB NOT NULL,
+    "calibrated_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE "checkers" (
+    "challenge_id" UUID PRIMARY KEY REFERENCES challenges(id) ON DELETE CASCADE,
+    "language" VARCHAR(50) NOT NULL,
+    "code" TEXT NOT NULL,
+    "cache_key" VARCHAR(64) NOT NULL,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE "verdict_cache" (
+    "key" VARCHAR(64) PRIMARY KEY,
+    "challenge_id" UUID NOT NULL REFERENCES challenges(id) ON DELETE CASCADE,
+    "result" JSONB NOT NULL,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX "verdict_cache_challenge_idx" ON "verdict_cache" ("challenge_id");
+
 CREATE TABLE "badges" (
     "id" UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     "name" VARCHAR(255) UNIQUE NOT NULL,
@@ -3,9 +3,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.auth.routes import router as auth_router
 from app.users.routes import router as users_router
-from app.challenges.routes import router as challenges_router
-from app.submissions.routes import router as submissions_router
+from app.api.routes import challenges, submissions, judge
+from app.websockets.routes import router as websocket_router
 from app.db.database import init_db, close_db
+from app.judge.calibration import calibration
+from app.judge.cpu_affinity import core_pool
+from app.judge.progress import progress_relay
+from app.judge.queue import judge_queue
+from app.services.code_execution import stop_executors
 import asyncio
 import signal
 
@@ -23,15 +28,34 @@ app.add_middleware(
 # Include routers
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(users_router, prefix="/users", tags=["users"])
-app.include_router(challenges_router, prefix="/challenges", tags=["challenges"])
-app.include_router(submissions_router, prefix="/submissions", tags=["submissions"])
+app.include_router(challenges.router, prefix="/challenges", tags=["challenges"])
+app.include_router(submissions.router, prefix="/submissions", tags=["submissions"])
+app.include_router(judge.router, prefix="/judge", tags=["judge"])
+app.include_router(websocket_router, tags=["websockets"])
 
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    core_pool.start()
+    if settings.JUDGE_CALIBRATE:
+        # The judge workers measure their own hosts, the API only serves what they stored
+        if settings.JUDGE_BACKEND == "postgres":
+            await calibration.load()
+        else:
+            await calibration.calibrate()
+    # With the postgres backend judging happens in separate app.judge.worker processes,
+    # which send their progress here to be passed on to the users' WebSockets
+    if settings.JUDGE_BACKEND != "postgres":
+        await judge_queue.start()
+        await judge_queue.recover()
+    else:
+        await progress_relay.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    await judge_queue.stop()
+    await progress_relay.stop()
+    await stop_executors()
     await close_db()
 
 # Handle graceful shutdown
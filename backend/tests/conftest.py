@@ -0,0 +1,109 @@
+import asyncio
+import os
+import tempfile
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Tests that need Postgres run against a scratch database created on the
+# server TEST_DATABASE_URL points at, and are skipped without it
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+TEST_DATABASE_NAME = f"khwopacoder_test_{os.getpid()}"
+
+def database_url(name: str) -> str:
+    parts = urlsplit(TEST_DATABASE_URL)
+    return urlunsplit(parts._replace(path=f"/{name}"))
+
+# The settings are read when app.core.config is imported, so set them first
+scratch = tempfile.mkdtemp(prefix="khwopacoder-tests-")
+os.environ["DATABASE_URL"] = database_url(TEST_DATABASE_NAME) if TEST_DATABASE_URL else ""
+os.environ["JUDGE_CALIBRATE"] = "false"
+os.environ["JUDGE_BACKEND"] = "local"
+# Tests recover pending submissions themselves, not on the judge queue's timer
+os.environ["JUDGE_HEARTBEAT_SECONDS"] = "3600"
+os.environ["COMPILE_CACHE_DIR"] = os.path.join(scratch, "compile-cache")
+os.environ["CHECKER_DIR"] = os.path.join(scratch, "checkers")
+
+async def create_database():
+    import asyncpg
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await conn.execute(f'DROP DATABASE IF EXISTS "{TEST_DATABASE_NAME}"')
+        await conn.execute(f'CREATE DATABASE "{TEST_DATABASE_NAME}"')
+    finally:
+        await conn.close()
+    conn = await asyncpg.connect(database_url(TEST_DATABASE_NAME))
+    try:
+        await conn.execute((BACKEND_DIR / "init.sql").read_text())
+    finally:
+        await conn.close()
+
+async def drop_database():
+    import asyncpg
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await conn.execute(f'DROP DATABASE IF EXISTS "{TEST_DATABASE_NAME}" WITH (FORCE)')
+    finally:
+        await conn.close()
+
+@pytest.fixture(scope="session")
+def database():
+    """A fresh database with the schema from init.sql, for the whole test session."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    asyncio.run(create_database())
+    yield os.environ["DATABASE_URL"]
+    asyncio.run(drop_database())
+
+@pytest.fixture(scope="session")
+def portal():
+    """
+    One event loop for the whole session: the judge keeps its pools, zygotes
+    and scheduler in globals that belong to the loop that created them.
+    """
+    import anyio
+    from app.services.code_execution import stop_executors
+    with anyio.from_thread.start_blocking_portal() as portal:
+        yield portal
+        portal.call(stop_executors)
+
+@pytest.fixture(scope="session")
+def client(database, portal):
+    """The served app, started on the session's event loop."""
+    from fastapi.testclient import TestClient
+    import main
+    client = TestClient(main.app)
+    client.portal = portal
+    portal.call(main.startup_event)
+    yield client
+    portal.call(main.shutdown_event)
+
+def create_user(client, is_admin: bool = False) -> dict:
+    """A user in the test database, with headers that authenticate as them."""
+    from app.auth.jwt import create_access_token
+    from app.db.database import get_db
+
+    async def insert():
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            return await conn.fetchval("""
+                INSERT INTO users (email, name, password, batch, is_admin)
+                VALUES ($1, $2, 'x', '2024', $3)
+                RETURNING id
+            """, f"{uuid.uuid4().hex}@example.com", "Test User", is_admin)
+
+    user_id = client.portal.call(insert)
+    token = create_access_token({"sub": str(user_id)})
+    return {"id": str(user_id), "headers": {"Authorization": f"Bearer {token}"}}
+
+@pytest.fixture
+def admin(client):
+    return create_user(client, is_admin=True)
+
+@pytest.fixture
+def user(client):
+    return create_user(client)
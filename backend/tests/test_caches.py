@@ -0,0 +1,104 @@
+import asyncio
+import shutil
+import uuid
+
+import pytest
+
+from app.judge.verdict_cache import VerdictCache
+from app.services import code_execution, submission_service
+from app.services.code_execution import execute_code
+from test_submissions import SUM_SOLUTION, create_challenge, submit, wait_for_verdict
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_cacheable_verdicts():
+    cache = VerdictCache(max_entries=10, persist=False)
+    run(cache.put("accepted", "c", {"status": "ACCEPTED"}))
+    run(cache.put("tle", "c", {"status": "TIME_LIMIT_EXCEEDED"}))
+    run(cache.put("diagnostic", "c", {"status": "COMPILATION_ERROR", "compiler_diagnostic": True}))
+    run(cache.put("judge-failure", "c", {"status": "COMPILATION_ERROR", "message": "harness build failed"}))
+
+    assert run(cache.get("accepted")) == {"status": "ACCEPTED"}
+    assert run(cache.get("tle")) is None
+    assert run(cache.get("diagnostic"))["status"] == "COMPILATION_ERROR"
+    assert run(cache.get("judge-failure")) is None
+
+def test_verdicts_are_dropped_with_their_challenge():
+    cache = VerdictCache(max_entries=10, persist=False)
+    run(cache.put("a", "one", {"status": "ACCEPTED"}))
+    run(cache.put("b", "two", {"status": "ACCEPTED"}))
+    run(cache.invalidate_challenge("one"))
+    assert run(cache.get("a")) is None
+    assert run(cache.get("b")) is not None
+
+def test_least_recently_used_verdict_is_evicted():
+    cache = VerdictCache(max_entries=2, persist=False)
+    run(cache.put("a", "c", {"status": "ACCEPTED"}))
+    run(cache.put("b", "c", {"status": "ACCEPTED"}))
+    run(cache.get("a"))
+    run(cache.put("c", "c", {"status": "ACCEPTED"}))
+    assert run(cache.get("b")) is None
+    assert run(cache.get("a")) is not None
+
+def test_key_covers_tests_limits_and_comparator():
+    tests = [{"input": "[1, 2]", "output": "3"}]
+    version = VerdictCache.test_set_version(tests)
+    key = VerdictCache.make_key(SUM_SOLUTION, "python", version, 2, 256, "exact")
+    assert VerdictCache.make_key(SUM_SOLUTION, "Python", version, 2, 256, "exact") == key
+
+    other_tests = VerdictCache.test_set_version([{"input": "[1, 2]", "output": "4"}])
+    assert VerdictCache.make_key(SUM_SOLUTION, "python", other_tests, 2, 256, "exact") != key
+    assert VerdictCache.make_key(SUM_SOLUTION, "python", version, 3, 256, "exact") != key
+    assert VerdictCache.make_key(SUM_SOLUTION, "python", version, 2, 512, "exact") != key
+    assert VerdictCache.make_key(SUM_SOLUTION, "python", version, 2, 256, "float:1e-06") != key
+
+def test_persisted_verdicts_are_shared(client, admin):
+    challenge_id = create_challenge(client, admin)["id"]
+    worker_a = VerdictCache(max_entries=10, persist=True)
+    worker_b = VerdictCache(max_entries=10, persist=True)
+    key = uuid.uuid4().hex
+
+    client.portal.call(worker_a.put, key, challenge_id, {"status": "ACCEPTED"})
+    assert client.portal.call(worker_b.get, key) == {"status": "ACCEPTED"}
+
+    client.portal.call(worker_b.invalidate_challenge, challenge_id)
+    worker_a.entries.clear()
+    assert client.portal.call(worker_a.get, key) is None
+
+def test_identical_code_is_judged_once(client, admin, user, monkeypatch):
+    executions = []
+    execute = submission_service.execute_code
+
+    async def recording_execute_code(**kwargs):
+        executions.append(kwargs["code"])
+        return await execute(**kwargs)
+
+    monkeypatch.setattr(submission_service, "execute_code", recording_execute_code)
+    challenge_id = create_challenge(client, admin)["id"]
+    # Unlike any code other tests judged against the same tests
+    code = f"# {uuid.uuid4().hex}\n{SUM_SOLUTION}"
+
+    for author in (user, admin):
+        submission = submit(client, author, challenge_id, code)
+        assert wait_for_verdict(client, author, submission["id"])["status"] == "ACCEPTED"
+    assert executions == [code]
+
+needs_gcc = pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc is not installed")
+TEST_CASES = [{"input": "1", "output": "1", "is_hidden": False}]
+
+@needs_gcc
+def test_compiler_errors_are_diagnostics(portal):
+    result = portal.call(execute_code, "int solve(int n) { return n }", "c", TEST_CASES, 2)
+    assert result["status"] == "COMPILATION_ERROR"
+    assert result["compiler_diagnostic"]
+
+@needs_gcc
+def test_judge_failures_while_compiling_are_not_diagnostics(portal, monkeypatch):
+    async def broken_harness():
+        raise RuntimeError("Could not build the C harness")
+
+    monkeypatch.setattr(code_execution, "get_cpp_harness", broken_harness)
+    result = portal.call(execute_code, "int solve(int n) { return n; }", "c", TEST_CASES, 2)
+    assert result["status"] == "COMPILATION_ERROR"
+    assert not result["compiler_diagnostic"]
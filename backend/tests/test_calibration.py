@@ -0,0 +1,90 @@
+import json
+
+from app.db.database import get_db
+from app.judge.calibration import calibration
+from app.judge.verdict_cache import verdict_cache
+from test_submissions import SUM_CHALLENGE, SUM_SOLUTION, create_challenge
+
+TEST_CASES = SUM_CHALLENGE["test_cases"]
+
+async def insert_reference(challenge_id: str, host_id: str, runtime_ms: int):
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            INSERT INTO reference_solutions (challenge_id, language, code, runtime_ms, host_id, test_set_version)
+            VALUES ($1, 'python', $2, $3, $4, $5)
+        """, challenge_id, SUM_SOLUTION, runtime_ms, host_id, verdict_cache.test_set_version(TEST_CASES))
+
+async def reference_hosts(challenge_id: str) -> list:
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT host_id FROM reference_solutions WHERE challenge_id = $1 ORDER BY host_id
+        """, challenge_id)
+    return [row["host_id"] for row in rows]
+
+def test_each_host_uses_its_own_reference_timing(client, admin, monkeypatch):
+    challenge = create_challenge(client, admin)
+    client.portal.call(insert_reference, challenge["id"], "host-a", 100)
+    client.portal.call(insert_reference, challenge["id"], "host-b", 300)
+
+    async def benchmark_reference(*args, **kwargs):
+        raise AssertionError("Both hosts have a timing")
+
+    monkeypatch.setattr(calibration, "benchmark_reference", benchmark_reference)
+    for host_id, runtime_ms in (("host-a", 100), ("host-b", 300), ("host-a", 100)):
+        monkeypatch.setattr(calibration, "host_id", host_id)
+        reference = client.portal.call(calibration.get_reference, challenge["id"], TEST_CASES)
+        assert reference["runtime_ms"] == runtime_ms
+
+def test_a_new_host_times_the_reference_itself(client, admin, monkeypatch):
+    challenge = create_challenge(client, admin)
+    client.portal.call(insert_reference, challenge["id"], "host-a", 100)
+
+    monkeypatch.setattr(calibration, "host_id", "host-b")
+    reference = client.portal.call(calibration.get_reference, challenge["id"], TEST_CASES)
+    assert reference["host_id"] == "host-b"
+    assert client.portal.call(reference_hosts, challenge["id"]) == ["host-a", "host-b"]
+
+def test_a_new_reference_replaces_every_hosts_timing(client, admin, monkeypatch):
+    challenge = create_challenge(client, admin)
+    client.portal.call(insert_reference, challenge["id"], "host-a", 100)
+
+    monkeypatch.setattr(calibration, "host_id", "host-b")
+    response = client.post(
+        f"/challenges/{challenge['id']}/reference-solution",
+        json={"language": "python", "code": SUM_SOLUTION},
+        headers=admin["headers"]
+    )
+    assert response.status_code == 200, response.text
+    assert client.portal.call(reference_hosts, challenge["id"]) == ["host-b"]
+
+def test_time_limits_are_served_without_benchmarking(client, admin, user, monkeypatch):
+    challenge = create_challenge(client, admin)
+    assert client.get(f"/challenges/{challenge['id']}/time-limits").status_code == 401
+
+    client.portal.call(insert_reference, challenge["id"], "host-a", 100)
+
+    async def benchmark_reference(*args, **kwargs):
+        raise AssertionError("Time limits are only read")
+
+    monkeypatch.setattr(calibration, "benchmark_reference", benchmark_reference)
+    monkeypatch.setattr(calibration, "host_id", "host-b")
+    response = client.get(f"/challenges/{challenge['id']}/time-limits", headers=user["headers"])
+    assert response.status_code == 200, response.text
+    assert response.json()["reference"]["runtime_ms"] == 100
+
+async def insert_host(host_id: str, overhead_ms: dict):
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            INSERT INTO judge_hosts (host_id, overhead_ms) VALUES ($1, $2)
+        """, host_id, json.dumps(overhead_ms))
+
+def test_overheads_are_loaded_from_the_last_judge_host(client, monkeypatch):
+    monkeypatch.setattr(calibration, "overhead_ms", {})
+    monkeypatch.setattr(calibration, "host_id", "")
+    client.portal.call(insert_host, "judge-host", {"python": 40.0})
+    client.portal.call(calibration.load)
+    assert calibration.overhead_ms == {"python": 40.0}
+    assert calibration.host_id == ""
@@ -0,0 +1,48 @@
+from test_submissions import create_challenge
+
+def test_update_changes_only_the_given_fields(client, admin):
+    challenge = create_challenge(client, admin)
+    response = client.put(
+        f"/challenges/{challenge['id']}",
+        json={"memory_limit": 64, "time_limit": 5},
+        headers=admin["headers"]
+    )
+    assert response.status_code == 200, response.text
+
+    served = client.get(f"/challenges/{challenge['id']}").json()
+    assert served["memory_limit"] == 64
+    assert served["time_limit"] == 5
+    assert served["title"] == challenge["title"]
+    assert served["difficulty"] == challenge["difficulty"]
+
+def test_update_of_a_missing_challenge(client, admin):
+    response = client.put(
+        "/challenges/00000000-0000-0000-0000-000000000000",
+        json={"memory_limit": 64},
+        headers=admin["headers"]
+    )
+    assert response.status_code == 404
+
+def test_only_admins_update_challenges(client, admin, user):
+    challenge = create_challenge(client, admin)
+    response = client.put(f"/challenges/{challenge['id']}", json={"memory_limit": 64}, headers=user["headers"])
+    assert response.status_code == 403
+
+def test_comparator_change_rejudges_the_same_code(client, admin, user):
+    from test_submissions import submit, wait_for_verdict
+
+    challenge = create_challenge(client, admin, test_cases=[{"input": "[0.1, 0.2]", "output": "0.3"}])
+    code = "def solve(a, b):\n    return a + b\n"
+    first = wait_for_verdict(client, user, submit(client, user, challenge["id"], code)["id"])
+    assert first["status"] == "WRONG_ANSWER"
+
+    response = client.put(
+        f"/challenges/{challenge['id']}",
+        json={"comparator": "float", "comparator_epsilon": 1e-9},
+        headers=admin["headers"]
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["comparator"] == "float"
+
+    second = wait_for_verdict(client, user, submit(client, user, challenge["id"], code)["id"])
+    assert second["status"] == "ACCEPTED"
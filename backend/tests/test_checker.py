@@ -0,0 +1,131 @@
+import asyncio
+import io
+import shutil
+
+import pytest
+
+from app.judge.checker import CheckerError, CheckerStore
+from app.judge.metrics import metrics
+from app.judge.verdict_cache import verdict_cache
+from test_submissions import SUM_SOLUTION, create_challenge, submit, wait_for_verdict
+
+# Accepts any pair of numbers adding up to the expected output
+PAIR_CHECKER = """
+import json, sys
+expected = int(open(sys.argv[2]).read())
+try:
+    a, b = json.loads(open(sys.argv[3]).read())
+except ValueError:
+    sys.exit(2)
+sys.exit(0 if a + b == expected else 1)
+"""
+
+PAIR_CHECKER_CPP = """
+#include <fstream>
+int main(int argc, char** argv) {
+    std::ifstream expected(argv[2]), actual(argv[3]);
+    long long want, a, b;
+    char open_bracket, comma;
+    expected >> want;
+    if (!(actual >> open_bracket >> a >> comma >> b)) return 2;
+    return a + b == want ? 0 : 1;
+}
+"""
+
+def compile_checker(root, code: str, language: str):
+    return asyncio.run(CheckerStore(str(root)).compile(code, language))
+
+def check(checker, expected: str, actual: str) -> bool:
+    expected_file, actual_file = io.BytesIO(expected.encode()), io.BytesIO(actual.encode())
+    return checker.compare(expected_file, (0, len(expected)), actual_file, (0, len(actual)))
+
+@pytest.mark.parametrize("language, code", [
+    ("python", PAIR_CHECKER),
+    pytest.param(
+        "cpp", PAIR_CHECKER_CPP,
+        marks=pytest.mark.skipif(shutil.which("g++") is None, reason="g++ is not installed")
+    ),
+])
+def test_checker_decides_by_exit_code(tmp_path, language, code):
+    checker = compile_checker(tmp_path, code, language)
+    assert check(checker, "5", "[2, 3]")
+    assert check(checker, "5", "[1, 4]")
+    assert not check(checker, "5", "[1, 1]")
+    assert not check(checker, "5", "nonsense")
+
+def test_checker_failures_are_errors(tmp_path):
+    checker = compile_checker(tmp_path, "raise SystemExit(3)\n", "python")
+    with pytest.raises(CheckerError, match="exit code 3"):
+        check(checker, "5", "5")
+
+def test_checker_that_does_not_compile(tmp_path):
+    with pytest.raises(CheckerError):
+        compile_checker(tmp_path, "def broken(:\n", "python")
+    with pytest.raises(CheckerError, match="not javascript"):
+        compile_checker(tmp_path, "process.exit(0)", "javascript")
+
+def test_checker_is_compiled_once(tmp_path):
+    code = PAIR_CHECKER + f"# {tmp_path.name}\n"
+    first = compile_checker(tmp_path / "a", code, "python")
+    assert compile_checker(tmp_path / "a", code, "python").path == first.path
+
+    # Another judge process copies it out of the compile cache
+    hits = metrics.counters.get("checker_compile_cache_hits", 0)
+    other = compile_checker(tmp_path / "b", code, "python")
+    assert metrics.counters.get("checker_compile_cache_hits", 0) == hits + 1
+    assert other.key() == first.key()
+
+def set_checker(client, admin, challenge_id: str, code: str):
+    response = client.post(
+        f"/challenges/{challenge_id}/checker",
+        json={"language": "python", "code": code},
+        headers=admin["headers"]
+    )
+    assert response.status_code == 200, response.text
+
+def test_submissions_are_judged_by_the_checker(client, admin, user):
+    challenge = create_challenge(client, admin, test_cases=[{"input": "[5]", "output": "5"}])
+    set_checker(client, admin, challenge["id"], PAIR_CHECKER)
+
+    code = "def solve(n):\n    return [1, n - 1]\n"
+    judged = wait_for_verdict(client, user, submit(client, user, challenge["id"], code)["id"])
+    assert judged["status"] == "ACCEPTED"
+
+    response = client.delete(f"/challenges/{challenge['id']}/checker", headers=admin["headers"])
+    assert response.status_code == 204
+    judged = wait_for_verdict(client, user, submit(client, user, challenge["id"], code)["id"])
+    assert judged["status"] == "WRONG_ANSWER"
+
+def test_checker_that_does_not_compile_is_rejected(client, admin):
+    challenge = create_challenge(client, admin)
+    response = client.post(
+        f"/challenges/{challenge['id']}/checker",
+        json={"language": "python", "code": "def broken(:\n"},
+        headers=admin["headers"]
+    )
+    assert response.status_code == 400
+    assert "does not compile" in response.json()["detail"]
+
+def test_a_failing_checker_gives_no_verdict(client, admin, user, monkeypatch):
+    challenge = create_challenge(client, admin)
+    set_checker(client, admin, challenge["id"], "raise SystemExit(3)\n")
+    cached = []
+
+    async def put(key, challenge_id, result):
+        cached.append(result)
+
+    monkeypatch.setattr(verdict_cache, "put", put)
+    submission = submit(client, user, challenge["id"], SUM_SOLUTION)
+    # The judge gives up on it, without per-test results or a cached verdict
+    assert wait_for_verdict(client, user, submission["id"])["status"] == "RUNTIME_ERROR"
+    response = client.get(f"/submissions/{submission['id']}/results", headers=user["headers"])
+    assert response.status_code == 404
+    assert cached == []
+
+    response = client.post(
+        "/submissions/run",
+        json={"challenge_id": challenge["id"], "code": SUM_SOLUTION, "language": "python"},
+        headers=user["headers"]
+    )
+    assert response.status_code == 500
+    assert "exit code 3" in response.json()["detail"]
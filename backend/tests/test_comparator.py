@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from app.judge import comparator as comparator_module
+from app.judge.comparator import Comparator, OutputChecker, top_level_items, iter_tokens
+
+def matches(policy: str, expected: str, actual: str, epsilon=None) -> bool:
+    expected_file, actual_file = io.BytesIO(expected.encode()), io.BytesIO(actual.encode())
+    return Comparator(policy, epsilon).compare(
+        expected_file, (0, len(expected.encode())), actual_file, (0, len(actual.encode()))
+    )
+
+@pytest.mark.parametrize("policy, expected, actual, result", [
+    ("exact", "[1, 2]", "  [1, 2]\n", True),
+    ("exact", "[1, 2]", "[1,2]", False),
+    ("exact", "3", "30", False),
+    ("whitespace", "[1, 2]", "[1,2]", True),
+    ("whitespace", "a  b\nc", "a b c", True),
+    ("whitespace", "a b", "a b c", False),
+    ("float", "0.3", "0.30000000000000004", True),
+    ("float", "[0.3, 1]", "[0.3001, 1]", False),
+    ("float", "1000000", "1000000.5", True),
+    ("float", "nan", "nan", True),
+    ("float", "1", "nan", False),
+    ("float", "abc", "abd", False),
+    ("unordered", "[1, [2, 3], 4]", "[4, 1, [2, 3]]", True),
+    ("unordered", "[1, [2, 3]]", "[1, [3, 2]]", False),
+    ("unordered", "[1, 1, 2]", "[1, 2, 2]", False),
+    ("unordered", "b a", "a b", True),
+])
+def test_policies(policy, expected, actual, result):
+    assert matches(policy, expected, actual) is result
+
+def test_epsilon_is_configurable():
+    assert not matches("float", "0.5", "0.51")
+    assert matches("float", "0.5", "0.51", epsilon=0.02)
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        Comparator("fuzzy")
+
+def test_key_identifies_the_policy():
+    assert Comparator().key() == "exact"
+    assert Comparator("float", 0.01).key() != Comparator("float", 0.001).key()
+
+def test_outputs_are_compared_across_chunks(monkeypatch):
+    monkeypatch.setattr(comparator_module, "CHUNK_SIZE", 4)
+    values = " ".join(str(i * 1000) for i in range(100))
+    assert matches("exact", values, f"\n{values}\n")
+    assert matches("whitespace", values, values.replace(" ", "\n  "))
+    assert matches("float", values, values)
+    assert not matches("whitespace", values, values[:-1])
+    assert list(iter_tokens(io.BytesIO(b"[12345, 678]"), 0, 12)) == [b"[", b"12345", b",", b"678", b"]"]
+
+def test_top_level_items():
+    tokens = iter_tokens(io.BytesIO(b'[{"a": 1}, [2]]'), 0, 15)
+    assert top_level_items(tokens) == [(b"{", b'"a"', b":", b"1", b"}"), (b"[", b"2", b"]")]
+
+def write_test_data(path, tests):
+    with open(path, "wb") as f:
+        f.write(f"{len(tests)}\n".encode())
+        for test_input, output in tests:
+            f.write(f"{len(test_input)} {len(output)}\n{test_input}{output}".encode())
+
+def test_output_checker_fills_in_records(tmp_path):
+    write_test_data(tmp_path / "tests", [("[1, 2]", "3"), ("[2, 2]", "4"), ("[0, 0]", "0")])
+    (tmp_path / "outputs").write_bytes(b"3\n5\n")
+    checker = OutputChecker(str(tmp_path / "tests"), str(tmp_path / "outputs"), Comparator())
+
+    records = checker.check([
+        {"index": 0, "output_offset": 0, "output_length": 2},
+        {"index": 1, "output_offset": 2, "output_length": 2},
+        {"index": 2, "error": "ZeroDivisionError"},
+    ])
+    assert [record["passed"] for record in records] == [True, False, False]
+    assert records[1]["input"] == "[2, 2]"
+    assert records[1]["expected"] == "4"
+    assert records[1]["actual"] == "5"
+    assert records[2]["actual"] == "Error: ZeroDivisionError"
@@ -0,0 +1,84 @@
+import shutil
+
+import pytest
+
+from app.judge.compile_cache import CompileCache
+from app.judge.metrics import metrics
+from app.services.code_execution import execute_code
+
+def make_key(source: bytes, version: str = "gcc 12", cmd=("gcc", "main.c")) -> str:
+    return CompileCache.make_key({"main.c": source}, version, list(cmd))
+
+def write_artifact(directory, name: str, size: int):
+    (directory / name).write_bytes(b"x" * size)
+
+def test_key_covers_sources_compiler_and_command():
+    key = make_key(b"int main() {}")
+    assert make_key(b"int main() {}") == key
+    assert make_key(b"int main() { }") != key
+    assert make_key(b"int main() {}", version="gcc 13") != key
+    assert make_key(b"int main() {}", cmd=("gcc", "-O2", "main.c")) != key
+
+def test_artifacts_are_restored(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    build, run = tmp_path / "build", tmp_path / "run"
+    build.mkdir()
+    run.mkdir()
+    write_artifact(build, "test_runner", 100)
+
+    key = make_key(b"int main() {}")
+    assert cache.get(key, str(run)) is None
+    cache.put(key, str(build), ["test_runner"])
+
+    meta = cache.get(key, str(run))
+    assert meta["error"] is None
+    assert (run / "test_runner").read_bytes() == b"x" * 100
+    assert cache.stats()["entries"] == 1
+
+def test_errors_are_cached_without_artifacts(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"), max_bytes=1024 * 1024)
+    key = make_key(b"int main() {")
+    cache.put(key, str(tmp_path), [], "main.c:1: error: expected '}'")
+    assert cache.get(key, str(tmp_path))["error"] == "main.c:1: error: expected '}'"
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"), max_bytes=250)
+    write_artifact(tmp_path, "test_runner", 100)
+    keys = [make_key(str(i).encode()) for i in range(3)]
+
+    cache.put(keys[0], str(tmp_path), ["test_runner"])
+    cache.put(keys[1], str(tmp_path), ["test_runner"])
+    cache.get(keys[0], str(tmp_path))
+    cache.put(keys[2], str(tmp_path), ["test_runner"])
+
+    assert cache.get(keys[1], str(tmp_path)) is None
+    assert cache.get(keys[0], str(tmp_path)) is not None
+    assert cache.stats()["bytes"] == 200
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    write_artifact(tmp_path, "test_runner", 100)
+    key = make_key(b"int main() {}")
+    CompileCache(str(tmp_path / "cache"), max_bytes=1024).put(key, str(tmp_path), ["test_runner"])
+
+    restarted = CompileCache(str(tmp_path / "cache"), max_bytes=1024)
+    assert restarted.stats() == {"entries": 1, "bytes": 100, "max_bytes": 1024}
+
+needs_gcc = pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc is not installed")
+TEST_CASES = [{"input": "1", "output": "1", "is_hidden": False}]
+
+def cache_hits() -> int:
+    return metrics.counters.get("compile_cache_hits", 0)
+
+@needs_gcc
+@pytest.mark.parametrize("code", [
+    "int solve(int n) { return n; }",
+    "int solve(int n) { return n }",
+])
+def test_identical_code_is_compiled_once(portal, code):
+    # Comments keep the source apart from other tests' submissions
+    code = f"/* {__name__} */\n{code}"
+    first = portal.call(execute_code, code, "c", TEST_CASES, 2)
+    hits = cache_hits()
+    second = portal.call(execute_code, code, "c", TEST_CASES, 2)
+    assert cache_hits() == hits + 1
+    assert second["status"] == first["status"]
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.jobs import claim_job, enqueue_job, finish_job, get_job_stats, heartbeat_job, release_job
+from app.judge.worker import JudgeWorker
+from test_judge_queue import SUM_SOLUTION, get_submission, insert_submission, wait_for_status
+
+LEASE = 60
+
+async def clear_jobs():
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        await conn.execute("DELETE FROM judge_jobs")
+
+async def queue_submission(user_id: str, code: str = SUM_SOLUTION) -> str:
+    submission_id = await insert_submission(user_id, code)
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        await enqueue_job(conn, submission_id)
+    return submission_id
+
+async def get_job(submission_id: str) -> dict:
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        return dict(await conn.fetchrow("SELECT * FROM judge_jobs WHERE submission_id = $1", submission_id))
+
+@pytest.fixture
+def jobs(client):
+    """An empty job table."""
+    client.portal.call(clear_jobs)
+    yield
+    client.portal.call(clear_jobs)
+
+def test_job_is_claimed_once(client, user, jobs):
+    async def scenario():
+        submission_id = await queue_submission(user["id"])
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            assert (await get_job_stats(conn))["queued"] == 1
+            job = await claim_job(conn, "worker-a", LEASE)
+            assert str(job["submission_id"]) == submission_id
+            assert job["attempts"] == 1
+            assert await claim_job(conn, "worker-b", LEASE) is None
+
+            assert await heartbeat_job(conn, submission_id, "worker-a", LEASE)
+            assert not await heartbeat_job(conn, submission_id, "worker-b", LEASE)
+
+            await finish_job(conn, submission_id, "worker-a")
+            assert not await heartbeat_job(conn, submission_id, "worker-a", LEASE)
+            assert await claim_job(conn, "worker-b", LEASE) is None
+        return await get_job(submission_id)
+
+    job = client.portal.call(scenario)
+    assert job["state"] == "done"
+    assert job["lease_expires_at"] is None
+
+def test_concurrent_claims_skip_locked_jobs(client, user, jobs):
+    async def scenario():
+        first = await queue_submission(user["id"])
+        second = await queue_submission(user["id"])
+        pool = await get_db()
+        async with pool.acquire() as conn_a, pool.acquire() as conn_b:
+            async with conn_a.transaction():
+                job_a = await claim_job(conn_a, "worker-a", LEASE)
+                # The first job's row is locked until worker-a commits, worker-b
+                # must not wait for it nor claim it
+                async with conn_b.transaction():
+                    job_b = await asyncio.wait_for(claim_job(conn_b, "worker-b", LEASE), timeout=5)
+        return first, second, job_a, job_b
+
+    first, second, job_a, job_b = client.portal.call(scenario)
+    assert str(job_a["submission_id"]) == first
+    assert str(job_b["submission_id"]) == second
+
+def test_expired_lease_is_claimed_again(client, user, jobs):
+    async def scenario():
+        submission_id = await queue_submission(user["id"])
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            await claim_job(conn, "worker-a", LEASE)
+            assert await claim_job(conn, "worker-b", LEASE) is None
+
+            # worker-a stopped sending heartbeats
+            await conn.execute("""
+                UPDATE judge_jobs
+                SET lease_expires_at = CURRENT_TIMESTAMP - INTERVAL '1 second'
+                WHERE submission_id = $1
+            """, submission_id)
+            job = await claim_job(conn, "worker-b", LEASE)
+            lost = not await heartbeat_job(conn, submission_id, "worker-a", LEASE)
+        return submission_id, job, lost
+
+    submission_id, job, lost = client.portal.call(scenario)
+    assert str(job["submission_id"]) == submission_id
+    assert job["attempts"] == 2
+    assert lost
+
+def test_released_job_is_queued_again(client, user, jobs):
+    async def scenario():
+        submission_id = await queue_submission(user["id"])
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            await claim_job(conn, "worker-a", LEASE)
+            await release_job(conn, submission_id, "worker-a")
+            return await claim_job(conn, "worker-b", LEASE)
+
+    assert client.portal.call(scenario)["attempts"] == 2
+
+def test_claims_favour_users_with_fewer_running_jobs(client, user, admin, jobs):
+    async def scenario():
+        pool = await get_db()
+        await queue_submission(user["id"])
+        busy_second = await queue_submission(user["id"])
+        idle_first = await queue_submission(admin["id"])
+        async with pool.acquire() as conn:
+            await claim_job(conn, "worker-a", LEASE)
+            # user has a job running, so admin's newer job goes before theirs
+            job = await claim_job(conn, "worker-a", LEASE)
+            assert str(job["submission_id"]) == idle_first
+            job = await claim_job(conn, "worker-a", LEASE)
+            assert str(job["submission_id"]) == busy_second
+
+    client.portal.call(scenario)
+
+def test_claims_skip_full_languages(client, user, jobs):
+    async def scenario():
+        pool = await get_db()
+        python_job = await queue_submission(user["id"])
+        async with pool.acquire() as conn:
+            assert await claim_job(conn, "worker-a", LEASE, skip_languages=["python"]) is None
+            job = await claim_job(conn, "worker-a", LEASE, skip_languages=["java"])
+            assert str(job["submission_id"]) == python_job
+
+    client.portal.call(scenario)
+
+def test_worker_judges_queued_jobs(client, user, jobs, monkeypatch):
+    monkeypatch.setattr(settings, "JUDGE_POLL_INTERVAL", 0.1)
+
+    async def scenario():
+        worker = JudgeWorker("test-worker", 1)
+        running = asyncio.create_task(worker.run())
+        try:
+            submission_id = await queue_submission(user["id"])
+            status = await wait_for_status(submission_id)
+            # The job is finished just after the verdict is stored
+            for _ in range(50):
+                job = await get_job(submission_id)
+                if job["state"] == "done":
+                    break
+                await asyncio.sleep(0.1)
+        finally:
+            worker.stop()
+            await running
+        return status, job
+
+    status, job = client.portal.call(scenario)
+    assert status == "ACCEPTED"
+    assert job["state"] == "done"
+    assert job["worker_id"] == "test-worker"
+
+def test_worker_gives_up_after_repeated_attempts(client, user, jobs):
+    async def scenario():
+        submission_id = await queue_submission(user["id"])
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE judge_jobs SET attempts = $2 WHERE submission_id = $1",
+                submission_id, settings.JUDGE_MAX_ATTEMPTS
+            )
+            job = await claim_job(conn, "test-worker", LEASE)
+        await JudgeWorker("test-worker", 1)._process(job)
+        return (await get_submission(submission_id))["status"], await get_job(submission_id)
+
+    status, job = client.portal.call(scenario)
+    assert status == "RUNTIME_ERROR"
+    assert job["state"] == "failed"
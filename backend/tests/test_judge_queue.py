@@ -0,0 +1,263 @@
+import asyncio
+import time
+
+from app.api.routes.submissions import code_hash
+from app.db.database import get_db
+from app.judge import queue
+from app.judge.queue import JudgeQueue, judge_queue
+from app.judge.scheduler import judge_scheduler
+from app.services import submission_service
+
+SUM_SOLUTION = "def solve(a, b):\n    return a + b\n"
+
+async def insert_submission(user_id: str, code: str, with_hash: bool = False) -> str:
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        challenge_id = await conn.fetchval("""
+            INSERT INTO challenges (title, description, difficulty, category, points, time_limit)
+            VALUES ('Sum', 'Add two numbers', 'EASY', 'math', 10, 2)
+            RETURNING id
+        """)
+        await conn.execute("""
+            INSERT INTO test_cases (challenge_id, input, output, is_hidden)
+            VALUES ($1, '[1, 2]', '3', false)
+        """, challenge_id)
+        return str(await conn.fetchval("""
+            INSERT INTO submissions (user_id, challenge_id, code, language, status, code_hash)
+            VALUES ($1, $2, $3, 'python', 'PENDING', $4)
+            RETURNING id
+        """, user_id, challenge_id, code, code_hash(code, "python") if with_hash else None))
+
+async def get_submission(submission_id: str) -> dict:
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        return dict(await conn.fetchrow(
+            "SELECT id, challenge_id, status FROM submissions WHERE id = $1", submission_id
+        ))
+
+async def wait_for_status(submission_id: str, timeout: float = 60) -> str:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        submission = await get_submission(submission_id)
+        if submission["status"] != "PENDING":
+            return submission["status"]
+        await asyncio.sleep(0.1)
+    raise AssertionError(f"Submission {submission_id} was not judged within {timeout} seconds")
+
+def test_tests_are_loaded_only_once_the_job_may_run(client, user, monkeypatch):
+    loaded = []
+    get_test_cases = submission_service.get_test_cases
+
+    async def recording_get_test_cases(challenge_id):
+        loaded.append(challenge_id)
+        return await get_test_cases(challenge_id)
+
+    monkeypatch.setattr(submission_service, "get_test_cases", recording_get_test_cases)
+    monkeypatch.setattr(judge_scheduler, "concurrency", 1)
+
+    async def scenario():
+        submission_id = await insert_submission(user["id"], SUM_SOLUTION)
+        async with judge_scheduler.slot("someone-else", "python"):
+            judging = asyncio.create_task(submission_service.judge_submission(submission_id))
+            await asyncio.sleep(0.2)
+            # Waiting for the only slot, without its test data
+            assert not loaded
+            assert not judging.done()
+        return await judging
+
+    result = client.portal.call(scenario)
+    assert len(loaded) == 1
+    assert result["status"] == "ACCEPTED"
+
+def test_pending_submissions_are_recovered(client, user):
+    async def scenario():
+        # Left PENDING by a judge that stopped before judging it
+        submission_id = await insert_submission(user["id"], SUM_SOLUTION)
+        await judge_queue.recover()
+        return await wait_for_status(submission_id)
+
+    assert client.portal.call(scenario) == "ACCEPTED"
+
+async def set_lease(submission_id: str, worker_id: str, seconds: float):
+    """Make `worker_id` hold the submission's job, for `seconds` from now."""
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            INSERT INTO judge_jobs (submission_id, state, worker_id, lease_expires_at)
+            VALUES ($1, 'running', $2, CURRENT_TIMESTAMP + make_interval(secs => $3))
+            ON CONFLICT (submission_id) DO UPDATE
+            SET state = 'running', worker_id = $2, lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => $3)
+        """, submission_id, worker_id, seconds)
+
+def test_submissions_another_judge_holds_are_not_recovered(client, user):
+    async def scenario():
+        submission_id = await insert_submission(user["id"], SUM_SOLUTION)
+        await set_lease(submission_id, "another-api-process", 60)
+        await judge_queue.recover()
+        held = judge_queue.has(submission_id)
+
+        # That process stopped, its lease ran out
+        await set_lease(submission_id, "another-api-process", -1)
+        await judge_queue.recover()
+        return held, await wait_for_status(submission_id)
+
+    assert client.portal.call(scenario) == (False, "ACCEPTED")
+
+def test_queued_jobs_hold_a_lease_until_the_queue_stops(client, user, monkeypatch):
+    started = asyncio.Event()
+
+    async def endless_judge_submission(submission_id):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(queue, "judge_submission", endless_judge_submission)
+
+    async def scenario():
+        submission_id = await insert_submission(user["id"], SUM_SOLUTION)
+        local, other = JudgeQueue(1), JudgeQueue(1)
+        try:
+            assert await local.enqueue(submission_id, user["id"])
+            await started.wait()
+            # A second process does not take the job over
+            assert not await other.enqueue(submission_id, user["id"])
+            pool = await get_db()
+            async with pool.acquire() as conn:
+                worker_id = await conn.fetchval(
+                    "SELECT worker_id FROM judge_jobs WHERE submission_id = $1", submission_id
+                )
+        finally:
+            await other.stop()
+            await local.stop()
+        async with pool.acquire() as conn:
+            expired = await conn.fetchval("""
+                SELECT lease_expires_at <= CURRENT_TIMESTAMP FROM judge_jobs WHERE submission_id = $1
+            """, submission_id)
+        return worker_id == local.worker_id, expired
+
+    assert client.portal.call(scenario) == (True, True)
+
+def test_a_failed_job_does_not_stay_pending(client, user, monkeypatch):
+    async def broken_judge_submission(submission_id):
+        raise RuntimeError("the judge broke")
+
+    monkeypatch.setattr(queue, "judge_submission", broken_judge_submission)
+
+    async def scenario():
+        submission_id = await insert_submission(user["id"], SUM_SOLUTION)
+        await judge_queue.enqueue(submission_id, user["id"])
+        status = await wait_for_status(submission_id)
+        return status, judge_queue.has(submission_id)
+
+    assert client.portal.call(scenario) == ("RUNTIME_ERROR", False)
+
+def test_resubmission_is_not_held_by_a_lost_job(client, user):
+    stuck_id = client.portal.call(insert_submission, user["id"], SUM_SOLUTION, True)
+    challenge_id = str(client.portal.call(get_submission, stuck_id)["challenge_id"])
+    # The process judging it stopped and its lease ran out
+    client.portal.call(set_lease, stuck_id, "another-api-process", -1)
+
+    response = client.post(
+        "/submissions/",
+        json={"challenge_id": challenge_id, "code": SUM_SOLUTION, "language": "python"},
+        headers=user["headers"]
+    )
+    assert response.status_code == 202, response.text
+    submission_id = response.json()["id"]
+    assert submission_id != stuck_id
+    assert client.portal.call(wait_for_status, submission_id) == "ACCEPTED"
+
+def test_resubmission_is_held_by_a_job_being_judged(client, user):
+    pending_id = client.portal.call(insert_submission, user["id"], SUM_SOLUTION, True)
+    challenge_id = str(client.portal.call(get_submission, pending_id)["challenge_id"])
+    # Being judged by another API process, which this one knows only from the database
+    client.portal.call(set_lease, pending_id, "another-api-process", 60)
+    response = client.post(
+        "/submissions/",
+        json={"challenge_id": challenge_id, "code": SUM_SOLUTION, "language": "python"},
+        headers=user["headers"]
+    )
+    assert response.status_code == 202, response.text
+    assert response.json()["id"] == pending_id
+
+async def judged_submission(submission_id: str) -> dict:
+    """A submission in the shape record_verdict takes."""
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        return dict(await conn.fetchrow("""
+            SELECT s.id, s.user_id, s.challenge_id, c.title, c.difficulty, c.points
+            FROM submissions s
+            JOIN challenges c ON s.challenge_id = c.id
+            WHERE s.id = $1
+        """, submission_id))
+
+async def user_stats(user_id: str) -> tuple:
+    pool = await get_db()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow("SELECT points, solved FROM users WHERE id = $1", user_id)
+        return row["points"], row["solved"]
+
+def test_a_verdict_is_recorded_once(client, user):
+    async def scenario():
+        submission = await judged_submission(await insert_submission(user["id"], SUM_SOLUTION))
+        first = await submission_service.record_verdict(submission, {"status": "ACCEPTED"})
+        # Judged again, by a second judge that picked up the same submission
+        again = await submission_service.record_verdict(submission, {"status": "WRONG_ANSWER"})
+        status = (await get_submission(submission["id"]))["status"]
+        return first, again, status, await user_stats(user["id"])
+
+    assert client.portal.call(scenario) == (True, False, "ACCEPTED", (10, 1))
+
+def test_submissions_accepted_together_are_one_solve(client, user, monkeypatch):
+    save_results = submission_service.save_results
+    both_judged = asyncio.Barrier(2)
+
+    async def save_results_together(*args):
+        await save_results(*args)
+        # Neither verdict is committed before the other's submission is updated
+        await both_judged.wait()
+
+    monkeypatch.setattr(submission_service, "save_results", save_results_together)
+
+    async def scenario():
+        first = await judged_submission(await insert_submission(user["id"], SUM_SOLUTION))
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            second_id = await conn.fetchval("""
+                INSERT INTO submissions (user_id, challenge_id, code, language, status)
+                VALUES ($1, $2, $3, 'python', 'PENDING')
+                RETURNING id
+            """, user["id"], first["challenge_id"], SUM_SOLUTION)
+        second = {**first, "id": second_id}
+        test_cases = [{"input": "[1, 2]", "output": "3", "is_hidden": False}]
+        await asyncio.gather(
+            submission_service.record_verdict(first, {"status": "ACCEPTED"}, test_cases),
+            submission_service.record_verdict(second, {"status": "ACCEPTED"}, test_cases),
+        )
+        return await user_stats(user["id"])
+
+    assert client.portal.call(scenario) == (10, 1)
+
+def test_resubmission_is_held_by_a_job_queued_here(client, user, monkeypatch):
+    release = client.portal.call(asyncio.Event)
+
+    async def held_judge_submission(submission_id):
+        await release.wait()
+
+    monkeypatch.setattr(queue, "judge_submission", held_judge_submission)
+    challenge_id = str(client.portal.call(get_submission, client.portal.call(
+        insert_submission, user["id"], SUM_SOLUTION
+    ))["challenge_id"])
+
+    ids = []
+    try:
+        for _ in range(2):
+            response = client.post(
+                "/submissions/",
+                json={"challenge_id": challenge_id, "code": SUM_SOLUTION, "language": "python"},
+                headers=user["headers"]
+            )
+            assert response.status_code == 202, response.text
+            ids.append(response.json()["id"])
+    finally:
+        client.portal.call(release.set)
+    assert ids[0] == ids[1]
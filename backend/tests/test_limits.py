@@ -0,0 +1,81 @@
+import signal
+import shutil
+
+import pytest
+
+from app.judge.sandbox import build_limits, classify_limits
+from app.services.code_execution import execute_code
+
+TEST_CASES = [{"input": "[1]", "output": "1", "is_hidden": False}]
+
+def run_result(**overrides) -> dict:
+    return {
+        "returncode": 0,
+        "signal": None,
+        "timed_out": False,
+        "output_exceeded": None,
+        "stdout": b"",
+        "stderr": b"",
+        "cpu_time_ms": 10,
+        "max_rss_kb": 1024,
+        **overrides,
+    }
+
+def test_runs_within_limits_are_not_classified():
+    assert classify_limits(run_result(), build_limits(1, 64)) is None
+    assert classify_limits(run_result(returncode=1, stderr=b"ValueError"), build_limits(1, 64)) is None
+
+@pytest.mark.parametrize("overrides", [
+    {"timed_out": True, "returncode": -signal.SIGKILL, "signal": signal.SIGKILL},
+    {"returncode": -signal.SIGXCPU, "signal": signal.SIGXCPU},
+    {"cpu_time_ms": 2000},
+])
+def test_time_limit(overrides):
+    assert classify_limits(run_result(**overrides), build_limits(1, 64)) == "TIME_LIMIT_EXCEEDED"
+
+@pytest.mark.parametrize("overrides", [
+    {"max_rss_kb": 64 * 1024 + 1},
+    {"returncode": 1, "stderr": b"Traceback ...\nMemoryError"},
+    {"returncode": -signal.SIGABRT, "signal": signal.SIGABRT, "stderr": b"what():  std::bad_alloc"},
+])
+def test_memory_limit(overrides):
+    assert classify_limits(run_result(**overrides), build_limits(1, 64)) == "MEMORY_LIMIT_EXCEEDED"
+
+def test_out_of_memory_text_from_a_successful_run_is_not_a_memory_limit():
+    result = run_result(stderr=b"handled a MemoryError")
+    assert classify_limits(result, build_limits(1, 64)) is None
+
+def test_limits_of_runtimes_that_reserve_address_space():
+    limits = build_limits(1.5, 64, limit_address_space=False)
+    assert limits["address_space"] is None
+    assert limits["memory_kb"] == 64 * 1024
+    assert limits["cpu_seconds"] == 3
+    assert build_limits(1.5, 64)["address_space"] == 64 * 1024 * 1024
+
+@pytest.mark.parametrize("code, status", [
+    ("def solve(n):\n    return len(bytearray(512 * 1024 * 1024))\n", "MEMORY_LIMIT_EXCEEDED"),
+    ("def solve(n):\n    while True:\n        n += 1\n", "TIME_LIMIT_EXCEEDED"),
+])
+def test_limits_are_enforced(portal, code, status):
+    result = portal.call(execute_code, code, "python", TEST_CASES, 1, 64)
+    assert result["status"] == status, result.get("message")
+
+def test_file_size_signal_is_an_output_limit():
+    result = run_result(returncode=-signal.SIGXFSZ, signal=signal.SIGXFSZ)
+    assert classify_limits(result, build_limits(1, 64)) == "OUTPUT_LIMIT_EXCEEDED"
+
+@pytest.mark.parametrize("language, code", [
+    ("python", "def solve(n):\n    return 'x' * (20 * 1024 * 1024)\n"),
+    pytest.param(
+        "javascript", "function solve(n) { return 'x'.repeat(20 * 1024 * 1024); }",
+        marks=pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+    ),
+])
+def test_large_return_value_is_an_output_limit(portal, language, code):
+    result = portal.call(execute_code, code, language, TEST_CASES, 5, 512)
+    assert result["status"] == "OUTPUT_LIMIT_EXCEEDED", result.get("message")
+
+def test_output_range_past_the_end_of_the_file():
+    import io
+    from app.judge.comparator import trim_range
+    assert trim_range(io.BytesIO(b" 12 "), 0, 100) == (1, 2)
@@ -0,0 +1,64 @@
+import shutil
+
+import pytest
+
+from app.core.config import settings
+from app.judge.sandbox import get_launcher
+from app.services.code_execution import execute_code
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+TEST_CASES = [{"input": "[1, 2]", "output": "3", "is_hidden": False}]
+
+# Rewrites every output a later job writes to the answer of the first test
+POISON = """
+const fs = require('fs');
+const writeSync = fs.writeSync;
+fs.writeSync = function (fd, data, ...rest) {
+    if (Buffer.isBuffer(data) && data.toString() === '0') {
+        data = Buffer.from('3');
+    }
+    return writeSync.call(this, fd, data, ...rest);
+};
+function solve(a, b) { return a + b; }
+"""
+
+WRONG = "function solve(a, b) { return 0; }"
+
+def judge(portal, code: str) -> dict:
+    return portal.call(execute_code, code, "javascript", TEST_CASES, 2)
+
+def test_a_job_cannot_change_what_later_jobs_see(portal):
+    poisoned = judge(portal, POISON)
+    wrong = judge(portal, WRONG)
+    assert poisoned["status"] == "ACCEPTED"
+    assert wrong["status"] == "WRONG_ANSWER"
+
+def test_a_job_runs_under_its_rlimits(portal, monkeypatch):
+    monkeypatch.setattr(settings, "JUDGE_MAX_FILE_SIZE_MB", 1)
+    code = "require('fs').writeFileSync('big', Buffer.alloc(2 * 1024 * 1024));\nfunction solve(a, b) { return a + b; }"
+    result = judge(portal, code)
+    assert result["status"] == "RUNTIME_ERROR"
+    assert "EFBIG" in result["message"]
+
+def test_usage_is_measured_by_the_kernel(portal):
+    if not portal.call(get_launcher):
+        pytest.skip("The launcher cannot be built here")
+    code = (
+        "process.memoryUsage = () => ({ rss: 0 });\n"
+        "const held = Buffer.alloc(96 * 1024 * 1024, 1);\n"
+        "function solve(a, b) { return a + b; }"
+    )
+    result = judge(portal, code)
+    assert result["status"] == "ACCEPTED"
+    assert result["memory"] > 96 * 1024
+
+def test_a_hung_job_does_not_hold_up_the_next(portal):
+    hung = portal.call(execute_code, "function solve(a, b) { while (true) {} }", "javascript", TEST_CASES, 1)
+    assert hung["status"] == "TIME_LIMIT_EXCEEDED"
+    assert judge(portal, "function solve(a, b) { return a + b; }")["status"] == "ACCEPTED"
+
+def test_a_job_that_exits_the_worker_does_not_break_the_next(portal):
+    code = "process.exit(7);\nfunction solve(a, b) { return a + b; }"
+    assert judge(portal, code)["status"] == "RUNTIME_ERROR"
+    assert judge(portal, "function solve(a, b) { return a + b; }")["status"] == "ACCEPTED"
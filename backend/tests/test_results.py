@@ -0,0 +1,112 @@
+import json
+
+from app.core.config import settings
+from app.db.database import get_db
+from app.judge.test_results import failure_diff, get_results, pack_results, save_results, unpack_results
+from app.services.code_execution import ResultsReader, execute_code
+from test_judge_queue import insert_submission
+
+TEST_CASES = [
+    {"input": "[1, 2]", "output": "3", "is_hidden": False},
+    {"input": "[2, 2]", "output": "4", "is_hidden": False},
+]
+
+def test_reader_keeps_the_first_record_of_each_test(tmp_path):
+    path = tmp_path / "results.ndjson"
+    records = [
+        {"index": 0, "output_offset": 0, "output_length": 1, "cpu_time_ms": 5},
+        # A forked copy of the runner reports the same test again
+        {"index": 0, "output_offset": 1, "output_length": 1, "cpu_time_ms": -50},
+        {"index": 7, "output_offset": 2, "output_length": 1, "cpu_time_ms": 1},
+        {"index": 1, "output_offset": 3, "output_length": 1, "cpu_time_ms": 5},
+        {"done": True, "memory": 0, "startup_cpu_ms": 0},
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    reader = ResultsReader(str(path), test_indices=[0, 1])
+    reader.read_new()
+    assert [(r["index"], r["cpu_time_ms"]) for r in reader.records] == [(0, 5), (1, 5)]
+    assert reader.summary["done"]
+
+# Claims the run is over before any test was reported
+EARLY_SUMMARY = """
+def solve(a, b):
+    import json, os
+    with open(os.environ.get('JUDGE_RESULTS_FILE', 'results.ndjson'), 'a') as f:
+        f.write(json.dumps({'done': True, 'memory': 0, 'startup_cpu_ms': 0}) + '\\n')
+    os._exit(0)
+"""
+
+def test_missing_results_are_not_accepted(portal):
+    result = portal.call(execute_code, EARLY_SUMMARY, "python", TEST_CASES, 2)
+    assert result["status"] == "RUNTIME_ERROR"
+    assert "reported 0 of" in result["message"]
+
+def test_all_results_are_accepted(portal):
+    result = portal.call(execute_code, "def solve(a, b):\n    return a + b\n", "python", TEST_CASES, 2)
+    assert result["status"] == "ACCEPTED"
+    assert [r["index"] for r in result["results"]] == [0, 1]
+
+def test_fail_fast_stops_every_shard_at_a_wrong_answer(portal, monkeypatch):
+    monkeypatch.setattr(settings, "JUDGE_FAIL_FAST", True)
+    monkeypatch.setattr(settings, "JUDGE_SHARDS", 2)
+    test_cases = [{"input": f"[{i}]", "output": "0", "is_hidden": False} for i in range(8)]
+    # Only test 0 passes, the whole run would take 2 seconds
+    code = "def solve(n):\n    import time\n    time.sleep(0.5)\n    return n\n"
+    result = portal.call(execute_code, code, "python", test_cases, 5)
+    assert result["status"] == "WRONG_ANSWER"
+    assert len(result["results"]) < 4
+
+def test_results_round_trip():
+    test_cases = [{"input": str(i), "output": str(i), "is_hidden": i == 9} for i in range(11)]
+    results = [
+        {"index": i, "passed": i != 9, "cpu_time_ms": i + 0.5, "memory": 100 + i,
+         "input": str(i), "expected": str(i), "actual": "wrong"}
+        for i in range(10)
+    ]
+    # Not one of the challenge's tests
+    results.append({"index": 11, "passed": True})
+    packed = pack_results(results, test_cases)
+    assert len(packed["passed"]) == 2
+
+    unpacked = unpack_results({**packed, "first_failure": json.dumps(packed["first_failure"])})
+    assert unpacked["test_count"] == 11
+    # Test 10 never ran, the run stopped at the failure of test 9
+    assert unpacked["passed"] == [True] * 9 + [False, False]
+    assert unpacked["passed_count"] == 9
+    assert unpacked["runtimes"][:2] == [0.5, 1.5]
+    assert unpacked["runtimes"][10] is None
+    assert unpacked["memory"][9] == 109
+    assert unpacked["memory"][10] is None
+
+    failure = unpacked["first_failure"]
+    assert failure["index"] == 9
+    assert failure["hidden"]
+    assert failure["input"] is None and failure["expected"] is None
+    assert failure["actual"] == "wrong"
+
+def test_failure_diff_shows_where_outputs_differ(monkeypatch):
+    monkeypatch.setattr(settings, "SUBMISSION_DIFF_CHARS", 8)
+    record = {"index": 0, "input": "x" * 20, "expected": "a" * 100 + "b" + "a" * 100, "actual": "a" * 100 + "c"}
+    diff = failure_diff(record, hidden=False)
+    assert diff["offset"] == 100
+    assert diff["expected"] == "...aabaaaaa..."
+    assert diff["actual"] == "...aac"
+    assert diff["input"] == "x" * 8 + "..."
+
+def test_results_are_kept_per_submission(client, user, admin):
+    async def scenario():
+        submission_id = await insert_submission(user["id"], "def solve(a, b):\n    return 0\n")
+        records = [{"index": 0, "passed": False, "cpu_time_ms": 1, "memory": 10, "expected": "3", "actual": "0"}]
+        pool = await get_db()
+        async with pool.acquire() as conn:
+            await save_results(conn, submission_id, records, TEST_CASES)
+            # Judged again, the later results replace the earlier ones
+            records = [{"index": 0, "passed": True, "cpu_time_ms": 1, "memory": 10}]
+            await save_results(conn, submission_id, records, TEST_CASES)
+        return await get_results(submission_id, user["id"]), await get_results(submission_id, admin["id"])
+
+    own, others = client.portal.call(scenario)
+    assert own["passed"] == [True, False]
+    assert own["first_failure"] is None
+    assert others is None
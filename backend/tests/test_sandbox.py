@@ -0,0 +1,60 @@
+import asyncio
+import gc
+import time
+
+import pytest
+
+from app.judge.sandbox import build_limits, run_sandboxed
+from app.services.code_execution import execute_code
+
+def output_limited(output_bytes: int) -> dict:
+    return {**build_limits(10, 64), "output_bytes": output_bytes}
+
+@pytest.mark.parametrize("command, stream", [
+    ("yes", "stdout"),
+    ("yes >&2", "stderr"),
+])
+def test_endless_output_is_cut_off(portal, command, stream):
+    start = time.monotonic()
+    result = portal.call(run_sandboxed, ["sh", "-c", command], "/tmp", 10, output_limited(1000))
+    assert time.monotonic() - start < 5
+    assert result["output_exceeded"] == stream
+    assert len(result[stream]) == 1000
+    assert not result["timed_out"]
+
+def test_output_within_the_limit_is_kept_whole(portal):
+    script = "head -c 300000 /dev/zero; head -c 1000 /dev/zero >&2"
+    result = portal.call(run_sandboxed, ["sh", "-c", script], "/tmp", 10, output_limited(300000))
+    assert result["output_exceeded"] is None
+    assert len(result["stdout"]) == 300000
+    assert len(result["stderr"]) == 1000
+    assert result["returncode"] == 0
+
+def test_printing_solution_is_an_output_limit(portal):
+    code = "def solve(n):\n    while True:\n        print('x' * 1000)\n"
+    test_cases = [{"input": "[1]", "output": "1", "is_hidden": False}]
+    result = portal.call(execute_code, code, "python", test_cases, 5, 64)
+    assert result["status"] == "OUTPUT_LIMIT_EXCEEDED", result.get("message")
+
+def test_cancelled_run_leaves_no_unretrieved_errors(portal):
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        errors = []
+        handler = loop.get_exception_handler()
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        try:
+            run = asyncio.create_task(run_sandboxed(["sleep", "10"], "/tmp", 10, build_limits(10, 64)))
+            await asyncio.sleep(0.2)
+            run.cancel()
+            try:
+                await run
+            except asyncio.CancelledError:
+                pass
+            del run
+            gc.collect()
+            await asyncio.sleep(0)
+        finally:
+            loop.set_exception_handler(handler)
+        return errors
+
+    assert portal.call(scenario) == []
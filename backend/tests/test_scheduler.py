@@ -0,0 +1,99 @@
+import asyncio
+
+from app.judge.scheduler import JudgeScheduler, parse_language_map
+
+def test_parse_language_map():
+    assert parse_language_map("java=2, cpp=1.5,,bad") == {"java": 2.0, "cpp": 1.5}
+    assert parse_language_map("") == {}
+
+async def run_jobs(scheduler: JudgeScheduler, jobs, hold: float = 0) -> list:
+    """Queue (user, language) jobs behind a running one, return the order they ran in."""
+    order = []
+
+    async def job(user_id: str, language: str):
+        async with scheduler.slot(user_id, language):
+            order.append((user_id, language))
+            await asyncio.sleep(hold)
+
+    async with scheduler.slot("someone-else", "python"):
+        tasks = [asyncio.create_task(job(user_id, language)) for user_id, language in jobs]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+def test_users_are_interleaved():
+    scheduler = JudgeScheduler(1, {}, {})
+    jobs = [("burst", "python")] * 3 + [("single", "python")]
+    order = asyncio.run(run_jobs(scheduler, jobs))
+    assert [user_id for user_id, _ in order] == ["burst", "single", "burst", "burst"]
+
+def test_expensive_languages_cost_more_turns():
+    scheduler = JudgeScheduler(1, {}, {"java": 2})
+    jobs = [("java-user", "java")] * 2 + [("python-user", "python")] * 3
+    order = asyncio.run(run_jobs(scheduler, jobs))
+    assert [user_id for user_id, _ in order] == [
+        "java-user", "python-user", "python-user", "java-user", "python-user"
+    ]
+
+def test_lanes_are_capped():
+    scheduler = JudgeScheduler(3, {"java": 1}, {})
+
+    async def scenario():
+        running = []
+        peak = {"java": 0}
+
+        async def job(user_id: str, language: str):
+            async with scheduler.slot(user_id, language):
+                running.append(language)
+                peak["java"] = max(peak["java"], running.count("java"))
+                await asyncio.sleep(0.05)
+                running.remove(language)
+
+        java = [asyncio.create_task(job(f"user-{i}", "java")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        # A Python job runs next to the Java one instead of queueing behind the Java burst
+        assert scheduler.full_languages() == ["java"]
+        python = asyncio.create_task(job("python-user", "python"))
+        await asyncio.sleep(0.01)
+        assert running == ["java", "python"]
+        await asyncio.gather(*java, python)
+        return peak["java"]
+
+    assert asyncio.run(scenario()) == 1
+    assert scheduler.running == 0
+
+def test_cancelled_waiter_gives_back_its_turn():
+    scheduler = JudgeScheduler(1, {}, {})
+
+    async def scenario():
+        order = []
+
+        async def job(user_id: str):
+            async with scheduler.slot(user_id, "python"):
+                order.append(user_id)
+
+        async with scheduler.slot("someone-else", "python"):
+            gave_up = asyncio.create_task(job("impatient"))
+            await asyncio.sleep(0)
+            gave_up.cancel()
+            await asyncio.gather(gave_up, return_exceptions=True)
+            waiting = asyncio.create_task(job("patient"))
+            await asyncio.sleep(0)
+        await waiting
+        return order
+
+    assert asyncio.run(scenario()) == ["patient"]
+    assert scheduler.running == 0
+    assert scheduler.user_jobs == {}
+    assert scheduler.user_finish == {}
+
+def test_idle_users_do_not_bank_credit():
+    scheduler = JudgeScheduler(1, {}, {})
+
+    async def scenario():
+        # The regular user ran plenty, the newcomer's turn is now, not at the start of time
+        await run_jobs(scheduler, [("regular", "python")] * 5)
+        return await run_jobs(scheduler, [("regular", "python")] * 2 + [("newcomer", "python")] * 2)
+
+    order = asyncio.run(scenario())
+    assert [user_id for user_id, _ in order] == ["regular", "newcomer", "regular", "newcomer"]
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+SUM_CHALLENGE = {
+    "title": "Sum",
+    "description": "Print the sum of two numbers.",
+    "difficulty": "EASY",
+    "category": "math",
+    "points": 10,
+    "time_limit": 2,
+    "test_cases": [
+        {"input": "1, 2", "output": "3", "is_hidden": False},
+        {"input": "10, 20", "output": "30", "is_hidden": True},
+    ],
+}
+
+SUM_SOLUTION = "def solve(a, b):\n    return a + b\n"
+
+def create_challenge(client, admin, **overrides) -> dict:
+    response = client.post("/challenges/", json={**SUM_CHALLENGE, **overrides}, headers=admin["headers"])
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def submit(client, user, challenge_id: str, code: str, language: str = "python") -> dict:
+    response = client.post(
+        "/submissions/",
+        json={"challenge_id": challenge_id, "code": code, "language": language},
+        headers=user["headers"]
+    )
+    assert response.status_code == 202, response.text
+    return response.json()
+
+def wait_for_verdict(client, user, submission_id: str, timeout: float = 60) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get(f"/submissions/{submission_id}", headers=user["headers"])
+        assert response.status_code == 200, response.text
+        submission = response.json()
+        if submission["status"] != "PENDING":
+            return submission
+        time.sleep(0.2)
+    pytest.fail(f"Submission {submission_id} was not judged within {timeout} seconds")
+
+def test_submission_is_judged(client, admin, user):
+    challenge = create_challenge(client, admin)
+    submission = submit(client, user, challenge["id"], SUM_SOLUTION)
+    assert submission["status"] == "PENDING"
+    assert submission["challenge_title"] == "Sum"
+
+    judged = wait_for_verdict(client, user, submission["id"])
+    assert judged["status"] == "ACCEPTED"
+
+    results = client.get(f"/submissions/{submission['id']}/results", headers=user["headers"]).json()
+    assert results["test_count"] == 2
+    assert results["passed"] == [True, True]
+
+def test_wrong_answer_is_judged(client, admin, user):
+    challenge = create_challenge(client, admin)
+    submission = submit(client, user, challenge["id"], "def solve(a, b):\n    return 0\n")
+
+    judged = wait_for_verdict(client, user, submission["id"])
+    assert judged["status"] == "WRONG_ANSWER"
+
+    results = client.get(f"/submissions/{submission['id']}/results", headers=user["headers"]).json()
+    assert results["passed"] == [False, False]
+    assert results["first_failure"]["index"] == 0
+
+def test_submission_lists(client, admin, user):
+    challenge = create_challenge(client, admin)
+    submission = submit(client, user, challenge["id"], SUM_SOLUTION)
+    wait_for_verdict(client, user, submission["id"])
+
+    for path in (f"/submissions/user/{user['id']}", f"/submissions/challenge/{challenge['id']}", "/submissions/me"):
+        response = client.get(path, headers=user["headers"])
+        assert response.status_code == 200, response.text
+        assert [s["id"] for s in response.json()] == [submission["id"]]
+        assert response.json()[0]["user_name"] == "Test User"
+
+def test_hidden_tests_are_not_served(client, admin):
+    challenge = create_challenge(client, admin)
+    served = client.get(f"/challenges/{challenge['id']}").json()
+    assert [tc["input"] for tc in served["test_cases"]] == ["1, 2"]
+
+def test_only_admins_create_challenges(client, user):
+    response = client.post("/challenges/", json=SUM_CHALLENGE, headers=user["headers"])
+    assert response.status_code == 403
+
+def test_challenge_list_needs_a_login(client, admin, user):
+    challenge = create_challenge(client, admin)
+    assert client.get("/challenges/").status_code == 401
+    listed = client.get("/challenges/", headers=user["headers"]).json()
+    assert challenge["id"] in [c["id"] for c in listed]
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import shutil
+import sys
+from typing import Dict, List, Optional
+
+from app.judge import jvm_pool
+from app.judge.jvm_pool import JvmPool
+from app.judge.worker_pool import PooledWorker, WorkerPool
+
+# A worker speaking one JSON line per job, the jobs' targets say what to do
+ECHO_WORKER = """
+import json, os, sys, time
+print("ready", flush=True)
+for line in sys.stdin:
+    job = json.loads(line)
+    if job["target"] == "crash":
+        os._exit(3)
+    if job["target"] == "hang":
+        time.sleep(60)
+    reply = {"pid": os.getpid(), "target": job["target"], "recycle": job["target"] == "recycle"}
+    print(json.dumps(reply), flush=True)
+"""
+
+class EchoWorker(PooledWorker):
+    name = "echo_worker"
+    max_jobs = 3
+
+    async def worker_args(self) -> List[str]:
+        return list(self.command) + ["-c", ECHO_WORKER]
+
+    async def exchange(self, job: Dict) -> Optional[Dict]:
+        self.process.stdin.write(json.dumps(job).encode() + b"\n")
+        await self.process.stdin.drain()
+        line = await self.process.stdout.readline()
+        if not line:
+            return None
+        reply = json.loads(line)
+        return {
+            "returncode": 0,
+            "stdout": str(reply["pid"]).encode(),
+            "stderr": b"",
+            "timed_out": False,
+            "output_exceeded": None,
+            "cpu_time_ms": 0,
+            "memory_kb": 0,
+            "recycle": reply["recycle"],
+        }
+
+def run_jobs(pool: WorkerPool, targets: List[str], command=(sys.executable,), timeout: float = 5) -> List[Dict]:
+    async def scenario():
+        try:
+            return [await pool.run(list(command) + [target], "/tmp", timeout) for target in targets]
+        finally:
+            await pool.stop()
+
+    return asyncio.run(scenario())
+
+def pids(results: List[Dict]) -> List[bytes]:
+    return [result["stdout"] for result in results]
+
+def test_workers_are_reused_until_worn_out():
+    results = run_jobs(WorkerPool(EchoWorker, 1), ["a"] * 4)
+    first, second, third, fourth = pids(results)
+    assert first == second == third
+    assert fourth != first
+
+def test_worker_asking_to_recycle_is_replaced():
+    first, second = pids(run_jobs(WorkerPool(EchoWorker, 1), ["recycle", "a"]))
+    assert first != second
+
+def test_crashed_worker_is_replaced():
+    crashed, after = run_jobs(WorkerPool(EchoWorker, 1), ["crash", "a"])
+    assert crashed["returncode"] == 3
+    assert not crashed["timed_out"]
+    assert after["returncode"] == 0
+
+def test_hung_worker_is_killed():
+    hung, after = run_jobs(WorkerPool(EchoWorker, 1), ["hang", "a"], timeout=0.2)
+    assert hung["timed_out"]
+    assert after["returncode"] == 0
+
+def test_workers_are_kept_per_command_line():
+    pool = WorkerPool(EchoWorker, 2)
+
+    async def scenario():
+        try:
+            results = []
+            for command in ([sys.executable], [sys.executable, "-u"], [sys.executable]):
+                results.append(await pool.run(command + ["a"], "/tmp", 5))
+            return results, pool.workers
+        finally:
+            await pool.stop()
+
+    results, workers = asyncio.run(scenario())
+    first, unbuffered, again = pids(results)
+    assert first == again != unbuffered
+    assert workers == 2
+
+def test_pool_never_holds_more_workers_than_its_size():
+    pool = WorkerPool(EchoWorker, 1)
+
+    async def scenario():
+        try:
+            for command in ([sys.executable], [sys.executable, "-u"], [sys.executable, "-B"]):
+                await pool.run(command + ["a"], "/tmp", 5)
+                assert pool.workers == 1
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+def test_java_runs_without_the_daemon_when_it_cannot_be_built(monkeypatch):
+    async def no_daemon():
+        return None
+
+    monkeypatch.setattr(jvm_pool, "get_daemon_classpath", no_daemon)
+    pool = JvmPool(1)
+    result = asyncio.run(pool.run([shutil.which("echo"), "spawned"], "/tmp", 5))
+    assert result["stdout"] == b"spawned\n"
+    assert pool.workers == 0
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+
+import pytest
+
+from app.judge.sandbox import build_limits
+from app.judge.zygote import PythonZygote
+
+def in_zygote(scenario):
+    """Run `scenario(zygote, run)` against a fresh zygote, `run` runs a script in it."""
+    async def main():
+        zygote = PythonZygote(sys.executable)
+        if not await zygote.ensure_started():
+            pytest.skip("The Python zygote cannot start here")
+        try:
+            return await scenario(zygote)
+        finally:
+            await zygote.stop()
+
+    return asyncio.run(main())
+
+async def run_script(zygote, tmp_path, source: str, timeout: float = 5, limits=None) -> dict:
+    script = tmp_path / "script.py"
+    script.write_text(source)
+    return await zygote.run([sys.executable, str(script)], str(tmp_path), timeout, limits)
+
+def test_run_output_and_exit_status(tmp_path):
+    source = "import sys\nprint('out')\nprint('err', file=sys.stderr)\nsys.exit(3)\n"
+    result = in_zygote(lambda zygote: run_script(zygote, tmp_path, source))
+    assert result["stdout"] == b"out\n"
+    assert result["stderr"] == b"err\n"
+    assert result["returncode"] == 3
+    assert result["max_rss_kb"] > 0
+
+def test_runs_start_from_the_zygote_not_from_earlier_runs(tmp_path):
+    async def scenario(zygote):
+        await run_script(zygote, tmp_path, "import json\njson.dumps = None\nx = 1\n")
+        return await run_script(zygote, tmp_path, "import json\nprint(json.dumps([globals().get('x')]))\n")
+
+    assert in_zygote(scenario)["stdout"] == b"[null]\n"
+
+def test_run_sees_only_its_own_descriptors_and_environment(tmp_path):
+    source = (
+        "import json, os\n"
+        "fds = sorted(int(fd) for fd in os.listdir('/proc/self/fd'))\n"
+        "print(json.dumps([fds, os.getcwd(), os.environ['HOME']]))\n"
+    )
+    result = in_zygote(lambda zygote: run_script(zygote, tmp_path, source))
+    fds, cwd, home = json.loads(result["stdout"])
+    # The fourth is the one listing /proc/self/fd
+    assert fds == [0, 1, 2, 3]
+    assert cwd == str(tmp_path)
+    assert home == str(tmp_path)
+
+def test_limits_apply_to_runs(tmp_path):
+    async def scenario(zygote):
+        out_of_memory = await run_script(
+            zygote, tmp_path, "bytearray(256 * 1024 * 1024)\n", limits=build_limits(2, 64)
+        )
+        endless = await run_script(zygote, tmp_path, "while True:\n    pass\n", timeout=0.5)
+        return out_of_memory, endless
+
+    out_of_memory, endless = in_zygote(scenario)
+    assert out_of_memory["returncode"] == 1
+    assert b"MemoryError" in out_of_memory["stderr"]
+    assert endless["timed_out"]
+    assert endless["signal"] == signal.SIGKILL
+
+def test_zygote_is_restarted_after_it_dies(tmp_path):
+    async def scenario(zygote):
+        os.kill(zygote.process.pid, signal.SIGKILL)
+        await zygote.process.wait()
+        return await run_script(zygote, tmp_path, "print('again')\n")
+
+    assert in_zygote(scenario)["stdout"] == b"again\n"